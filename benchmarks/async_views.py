@@ -0,0 +1,75 @@
+"""
+Sync DRF views vs native async views under ASGI
+
+    python benchmarks/async_views.py --notes 2000 --concurrency 32 --duration 10
+    python benchmarks/async_views.py --mix list=1,get=1 --concurrency 64
+
+Drives the Django ASGI app in-process with load_test.py's mixed workload,
+once with the DRF generics (django_backend.urls) and once with
+notes.async_views (django_backend.urls_async, i.e. DJANGO_ASYNC_VIEWS=true),
+on the same seeded database. Under ASGI a sync view runs in a
+sync_to_async thread hop per request; the async views only hop for the
+ORM calls themselves. Prints a JSON report per variant and the
+throughput ratio (async / sync).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import django_asgi_client, seed_notes, setup_django
+from benchmarks.load_test import drive, existing_note_ids
+
+DEFAULT_MIX = "list=40,get=40,create=10,update=10"
+URLCONFS = {"sync": "django_backend.urls", "async": "django_backend.urls_async"}
+
+
+async def run(variant, args, note_ids):
+    import httpx
+    from django.conf import settings
+
+    # Django resolves settings.ROOT_URLCONF on every request
+    settings.ROOT_URLCONF = URLCONFS[variant]
+    client = django_asgi_client(
+        limits=httpx.Limits(max_connections=args.concurrency * 2), timeout=httpx.Timeout(60.0)
+    )
+    async with client:
+        return await drive(client, args, list(note_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--db", help="reuse this SQLite file instead of a temporary one")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per variant")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.target = "django"
+
+    setup_django(args.db)
+    from notes.models import Note
+    missing = args.notes - Note.objects.count()
+    if missing > 0:
+        seed_notes(missing)
+    note_ids = existing_note_ids()
+
+    results = {variant: asyncio.run(run(variant, args, note_ids)) for variant in URLCONFS}
+    report = {
+        "notes": args.notes,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        **results,
+        "throughput_ratio_async_over_sync": round(
+            results["async"]["throughput_rps"] / results["sync"]["throughput_rps"], 2
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
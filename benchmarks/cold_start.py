@@ -0,0 +1,172 @@
+"""
+Import time and cold start to readiness, for both services
+
+    python benchmarks/cold_start.py --workers 4 --repeat 3
+
+Import: runs `import index` (FastAPI) and Django's setup plus URLconf
+resolution in fresh interpreters and reports the median wall time, and
+the slowest modules they import, from -X importtime.
+
+Cold start: starts each service and times how long it takes until it
+answers a health probe and until every worker is up. The launchers
+compared are:
+
+- fastapi: `uvicorn index:app --workers N`, where every worker imports
+  the app itself, vs launcher.py, which preloads it and forks the workers;
+- django: `manage.py runserver` (system checks plus the autoreloader, as
+  the old batch launchers ran it) vs launcher.py in development mode
+  (checks, preload) and with --production (no checks).
+
+Django uses a throwaway migrated SQLite database. The result is printed as
+a JSON report.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import DJANGO_DIR, ROOT, setup_django
+
+IMPORTS = {
+    "fastapi": (ROOT, "import index"),
+    "django": (
+        DJANGO_DIR,
+        "import os; os.environ['DJANGO_SETTINGS_MODULE'] = 'django_backend.settings'\n"
+        "from django_backend.asgi import application\n"
+        "from django.urls import get_resolver; get_resolver().url_patterns",
+    ),
+}
+# Printed by core.supervisor once every worker is up; uvicorn's own workers each log startup completion
+ALL_READY = re.compile(r"all \d+ workers ready")
+WORKER_READY = "Application startup complete"
+HEALTH = {"fastapi": "/metrics", "django": "/health/"}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(service, repeat):
+    cwd, code = IMPORTS[service]
+    timed = f"import time\nstart = time.perf_counter()\n{code}\nprint(time.perf_counter() - start)"
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", timed], cwd=cwd, capture_output=True, text=True, check=True)
+        samples.append({"import": float(output.stdout.split()[-1]), "process": time.perf_counter() - start})
+
+    # -X importtime: "import time: self | cumulative | name", nesting shown by two spaces per level;
+    # the modules imported by the top-level ones show where the time goes
+    trace = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                           capture_output=True, text=True, check=True).stderr
+    direct = []
+    for line in trace.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2][1:]  # one space after the separator
+            if len(name) - len(name.lstrip()) == 2:
+                direct.append((int(parts[1]), name.strip()))
+    return {
+        "import_seconds": round(statistics.median(s["import"] for s in samples), 3),
+        "process_seconds": round(statistics.median(s["process"] for s in samples), 3),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for us, name in sorted(direct, reverse=True)[:8]},
+    }
+
+
+def commands(service, workers, port):
+    """name -> (command, cwd, ready lines): how many uvicorn startup lines mean every worker is up,
+    None to wait for the supervisor's, 0 when there is nothing to wait for"""
+    launcher = [sys.executable, os.path.join(ROOT, "launcher.py"), service, "--port", str(port),
+                "--workers", str(workers)]
+    if service == "fastapi":
+        return {
+            "uvicorn_workers": ([sys.executable, "-m", "uvicorn", "index:app", "--port", str(port),
+                                 "--workers", str(workers)], ROOT, workers),
+            "launcher": (launcher, ROOT, None),
+        }
+    return {
+        "runserver": ([sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}"], DJANGO_DIR, 0),
+        "launcher": (launcher, ROOT, None),
+        "launcher_production": (launcher + ["--production"], ROOT, None),
+    }
+
+
+def cold_start(service, command, cwd, ready_lines, port, env, timeout=60):
+    """(seconds to first healthy response, seconds until every worker is up) for one start"""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               text=True, start_new_session=True)
+    all_ready = threading.Event()
+    ready_at = []
+
+    def watch_output():
+        seen = 0
+        for line in process.stderr:
+            seen += WORKER_READY in line
+            if ALL_READY.search(line) or (ready_lines and seen >= ready_lines):
+                ready_at.append(time.perf_counter() - start)
+                all_ready.set()
+
+    threading.Thread(target=watch_output, daemon=True).start()
+    healthy = None
+    try:
+        while healthy is None and time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise SystemExit(f"{' '.join(command)} exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{HEALTH[service]}", timeout=1) as response:
+                    if response.status == 200:
+                        healthy = time.perf_counter() - start
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.02)
+        if ready_lines != 0:
+            all_ready.wait(max(0.0, timeout - (time.perf_counter() - start)))
+    finally:
+        os.killpg(process.pid, 15)
+        process.wait(30)
+    return healthy, ready_at[0] if ready_at else healthy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--services", default="fastapi,django")
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    env = {**os.environ, "DJANGO_SQLITE_PATH": db_path, "RATE_LIMIT_BACKEND": "none"}
+    report = {"workers": args.workers, "cpus": os.cpu_count(), "import": {}, "cold_start": {}}
+    for service in args.services.split(","):
+        report["import"][service] = measure_import(service, args.repeat)
+        results = report["cold_start"][service] = {}
+        for name in commands(service, args.workers, 0):
+            samples = []
+            for _ in range(args.repeat):
+                port = free_port()
+                command, cwd, ready_lines = commands(service, args.workers, port)[name]
+                samples.append(cold_start(service, command, cwd, ready_lines, port, env))
+            results[name] = {
+                "healthy_seconds": round(statistics.median(s[0] for s in samples), 3),
+                "all_workers_ready_seconds": round(statistics.median(s[1] for s in samples), 3),
+            }
+        baseline = next(iter(results.values()))["healthy_seconds"]
+        for result in results.values():
+            result["speedup"] = round(baseline / result["healthy_seconds"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark scripts
+Benchmarks run against a throwaway SQLite database migrated with the real
+Django schema, and talk to Django in-process through httpx.ASGITransport
+unless a live server URL is given, so no network access is needed.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DJANGO_DIR = os.path.join(ROOT, "django_backend")
+
+
+def setup_django(db_path=None):
+    """Configure Django against a fresh database file and migrate it; returns the path"""
+    for path in (ROOT, DJANGO_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_backend.settings")
+
+    import django
+    from django.conf import settings
+
+    db_path = db_path or os.path.join(tempfile.mkdtemp(prefix="notes-bench-"), "db.sqlite3")
+    django.setup()
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.ALLOWED_HOSTS = ["*"]
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+    return db_path
+
+
+def seed_notes(count, batch_size=5000, body_size=200):
+    """Insert count notes and their bodies with bulk_create, counted in the stats tables (Django must be set up)"""
+    from notes.models import Note, NoteContent
+    from notes.stats import record_created
+
+    body = ("lorem ipsum dolor sit amet " * (body_size // 27 + 1))[:body_size]
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        notes = Note.objects.bulk_create([
+            Note(title=f"Note {created + i}", desc=f"Description {created + i}", important=(created + i) % 10 == 0)
+            for i in range(size)
+        ])
+        NoteContent.objects.bulk_create([NoteContent.build(note.pk, body) for note in notes])
+        record_created(notes)
+        created += size
+
+
+def django_asgi_client(base_url="http://localhost:8002", **kwargs):
+    """httpx client that calls the Django ASGI app in-process"""
+    import httpx
+    from django.core.asgi import get_asgi_application
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=get_asgi_application()), base_url=base_url, **kwargs)
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def timed(samples, coro):
+    """Await coro, appending its duration to samples"""
+    start = time.perf_counter()
+    result = await coro
+    samples.append(time.perf_counter() - start)
+    return result
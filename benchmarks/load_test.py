@@ -0,0 +1,240 @@
+"""
+Load test for the notes stack with mixed read/write workloads
+
+    # FastAPI -> Django, both in-process, 1k seeded notes, 16 concurrent clients
+    python benchmarks/load_test.py --dataset 1k --concurrency 16 --duration 10
+
+    # Drive the Django API alone with a write-heavy mix
+    python benchmarks/load_test.py --target django --mix list=2,get=2,create=3,update=3
+
+    # Reuse a seeded database between runs, or hit live servers instead
+    python benchmarks/load_test.py --dataset 100k --db /tmp/notes-100k.sqlite3
+    python benchmarks/load_test.py --base-url http://localhost:8000 --target stack
+
+In-process runs need no network: FastAPI (index.py) is called through
+httpx.ASGITransport and its upstream client is pointed at the Django ASGI
+app. The report is JSON with per-endpoint throughput, status counts and
+latency percentiles.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import django_asgi_client, seed_notes, setup_django, summarize
+
+DATASETS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_MIX = "list=40,get=35,search=5,create=10,update=10"
+
+# Endpoint paths per target: (FastAPI integration layer, Django API)
+PATHS = {
+    "stack": {
+        "list": "/api/integration/notes",
+        "detail": "/api/integration/notes/{id}",
+        "search": "/api/integration/notes/search",
+        "update_method": "PUT",
+    },
+    "django": {
+        "list": "/api/notes/",
+        "detail": "/api/notes/{id}/",
+        "search": "/api/notes/search/",
+        "update_method": "PATCH",
+    },
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"list", "get", "search", "create", "update"}
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Workload:
+    """Issues one randomly chosen operation per call and records its latency"""
+
+    def __init__(self, client, target, mix, note_ids, seed):
+        self.client = client
+        self.paths = PATHS[target]
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.note_ids = note_ids
+        self.random = random.Random(seed)
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def step(self):
+        operation = self.random.choices(self.operations, self.weights)[0]
+        start = time.perf_counter()
+        try:
+            status = await getattr(self, operation)()
+        except Exception as e:  # connection errors, timeouts
+            status = type(e).__name__
+        self.samples[operation].append(time.perf_counter() - start)
+        self.statuses[operation][str(status)] += 1
+
+    def random_id(self):
+        return self.random.choice(self.note_ids)
+
+    async def list(self):
+        response = await self.client.get(self.paths["list"], params={"limit": 50})
+        return response.status_code
+
+    async def get(self):
+        response = await self.client.get(self.paths["detail"].format(id=self.random_id()))
+        return response.status_code
+
+    async def search(self):
+        term = self.random.choice(["note", "description", "lorem", "ipsum"])
+        response = await self.client.get(self.paths["search"], params={"q": term, "limit": 20})
+        return response.status_code
+
+    async def create(self):
+        response = await self.client.post(self.paths["list"], json={
+            "title": "load test", "desc": "created by load_test.py", "note": "body", "important": False
+        })
+        if response.status_code in (200, 201):
+            self.note_ids.append(int(response.json()["id"]))
+        return response.status_code
+
+    async def update(self):
+        response = await self.client.request(
+            self.paths["update_method"],
+            self.paths["detail"].format(id=self.random_id()),
+            json={"title": "updated", "desc": "d", "note": "updated body", "important": True}
+        )
+        return response.status_code
+
+
+async def drive(client, args, note_ids):
+    mix = parse_mix(args.mix)
+    workloads = [Workload(client, args.target, mix, note_ids, args.seed + i) for i in range(args.concurrency)]
+
+    # Short warm-up so connection setup and first-query costs are not measured
+    warmup = Workload(client, args.target, mix, note_ids, args.seed - 1)
+    for _ in range(min(20, args.concurrency * 2)):
+        await warmup.step()
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    async def worker(workload):
+        while time.perf_counter() < deadline:
+            await workload.step()
+
+    await asyncio.gather(*(worker(w) for w in workloads))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for operation in mix:
+        samples = [s for w in workloads for s in w.samples[operation]]
+        statuses = defaultdict(int)
+        for w in workloads:
+            for status, count in w.statuses[operation].items():
+                statuses[status] += count
+        endpoints[operation] = {
+            "throughput_rps": round(len(samples) / elapsed, 1),
+            "statuses": dict(statuses),
+            "latency": summarize(samples),
+        }
+    total = sum(len(s) for w in workloads for s in w.samples.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+def existing_note_ids(limit=10_000):
+    from notes.models import Note
+    return list(Note.objects.order_by("-id").values_list("id", flat=True)[:limit])
+
+
+async def run_in_process(args, note_ids):
+    import httpx
+    import index
+
+    django_client = django_asgi_client(
+        limits=httpx.Limits(max_connections=args.concurrency * 2),
+        timeout=httpx.Timeout(30.0)
+    )
+    if args.target == "django":
+        async with django_client:
+            return await drive(django_client, args, note_ids)
+
+    # Point the FastAPI app's shared upstream client (and NOTES_BACKEND=sqlite) at the benchmark database
+    from config.services import ServiceConfig
+    ServiceConfig.NOTES_SQLITE_PATH = args.db
+    # Every benchmark client shares one address: measure the stack, not the per-client rate limit
+    ServiceConfig.RATE_LIMIT_BACKEND = "none"
+    index.create_http_client = lambda: django_client
+    async with index.app.router.lifespan_context(index.app):
+        transport = httpx.ASGITransport(app=index.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=30.0) as client:
+            return await drive(client, args, note_ids)
+
+
+async def run_live(args, note_ids):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        return await drive(client, args, note_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="1k", help="1k, 100k, 1m or an explicit note count")
+    parser.add_argument("--db", help="SQLite file to seed (if short of the dataset size) and reuse")
+    parser.add_argument("--target", choices=["stack", "django"], default="stack",
+                        help="stack = FastAPI -> Django, django = Django API only")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="drive a live server instead of in-process apps")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    notes = DATASETS.get(args.dataset.lower()) or int(args.dataset)
+    db_path = args.db = setup_django(args.db)
+    from notes.models import Note
+    missing = notes - Note.objects.count()
+    seed_started = time.perf_counter()
+    if missing > 0:
+        seed_notes(missing)
+    seed_seconds = time.perf_counter() - seed_started
+
+    note_ids = existing_note_ids()
+    runner = run_live if args.base_url else run_in_process
+    result = asyncio.run(runner(args, note_ids))
+    report = {
+        "target": args.target,
+        "mode": args.base_url or "in-process",
+        "dataset_notes": notes,
+        "database": db_path,
+        "seed_seconds": round(seed_seconds, 2),
+        "concurrency": args.concurrency,
+        "mix": parse_mix(args.mix),
+        **result,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Note statistics: aggregate queries over notes_note vs the summary tables
+
+    python benchmarks/note_stats.py --sizes 1000,10000,100000 --iterations 50
+
+Grows one database through each size in --sizes, with created_at spread
+over the last --spread-days days, and at each size times:
+
+- scan: what a dashboard computes from notes_note itself, i.e. COUNT(*),
+  the important count, and notes per day and per week (GROUP BY over the
+  days and weeks the endpoint returns);
+- summary: notes.stats.read_stats(), which reads NoteStats and at most
+  one NoteDailyStats row per day of the window;
+- api: GET /api/notes/stats/ through Django in-process.
+
+It also times `rebuild_note_stats` at each size, and what the receivers
+add to a single create + delete (timed with them connected, then
+disconnected). The result is printed as a JSON report.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import django_asgi_client, seed_notes, setup_django, summarize, timed
+
+DAYS = 30
+WEEKS = 12
+# The scan equivalent of read_stats(DAYS, WEEKS) on SQLite
+SCAN_QUERIES = (
+    "SELECT COUNT(*) FROM notes_note",
+    "SELECT COUNT(*) FROM notes_note WHERE important",
+    "SELECT date(created_at) AS day, COUNT(*), SUM(important) FROM notes_note "
+    f"WHERE created_at >= date('now', '-{DAYS - 1} days') GROUP BY day",
+    "SELECT date(created_at, 'weekday 0', '-6 days') AS week, COUNT(*), SUM(important) FROM notes_note "
+    f"WHERE created_at >= date('now', 'weekday 0', '-{WEEKS * 7 - 1} days') GROUP BY week",
+)
+
+
+def spread_created_at(after_id, days):
+    """Move the created_at of the notes after after_id back by up to `days` days (the stats need a rebuild)"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE notes_note SET created_at = datetime(created_at, '-' || (id * 7919 %% %s) || ' days', "
+            "'-' || (id %% 86400) || ' seconds') WHERE id > %s",
+            [days, after_id],
+        )
+
+
+def time_scan(iterations):
+    from django.db import connection
+
+    samples = []
+    with connection.cursor() as cursor:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            for sql in SCAN_QUERIES:
+                cursor.execute(sql)
+                cursor.fetchall()
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def time_summary(iterations):
+    from notes.stats import read_stats
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        read_stats(DAYS, WEEKS)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def time_api(iterations):
+    samples = []
+    async with django_asgi_client() as client:
+        for _ in range(iterations):
+            response = await timed(samples, client.get("/api/notes/stats/", params={"days": DAYS, "weeks": WEEKS}))
+            response.raise_for_status()
+    return summarize(samples)
+
+
+def time_writes(iterations):
+    """Single create + delete latency with the stats receivers connected and disconnected"""
+    from django.db.models.signals import post_delete, post_save, pre_save
+    from notes import stats
+    from notes.models import Note
+
+    receivers = ((pre_save, stats.note_loading_stats), (post_save, stats.note_saved_stats),
+                 (post_delete, stats.note_deleted_stats))
+
+    def run():
+        samples = []
+        for i in range(iterations):
+            start = time.perf_counter()
+            Note.objects.create(title=f"bench {i}", desc="d", note="n", important=i % 2 == 0).delete()
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    with_stats = run()
+    for signal, receiver in receivers:
+        signal.disconnect(receiver, sender=Note)
+    try:
+        without_stats = run()
+    finally:
+        for signal, receiver in receivers:
+            signal.connect(receiver, sender=Note)
+    return {"with_stats": with_stats, "without_stats": without_stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--spread-days", type=int, default=365)
+    parser.add_argument("--db", help="database file (default: a temporary one)")
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from notes.models import Note
+    from notes.stats import rebuild
+
+    report = {"days": DAYS, "weeks": WEEKS, "sizes": {}}
+    for size in sorted(int(value) for value in args.sizes.split(",")):
+        last_id = Note.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        seed_notes(size - Note.objects.count(), body_size=50)
+        spread_created_at(last_id, args.spread_days)
+        start = time.perf_counter()
+        rebuild()
+        rebuild_seconds = time.perf_counter() - start
+        scan, summary = time_scan(args.iterations), time_summary(args.iterations)
+        report["sizes"][size] = {
+            "scan": scan,
+            "summary": summary,
+            "api": asyncio.run(time_api(args.iterations)),
+            "speedup_p50": round(scan["p50_ms"] / summary["p50_ms"], 1),
+            "rebuild_seconds": round(rebuild_seconds, 3),
+        }
+    report["single_write"] = time_writes(args.iterations)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Note body storage: inline notes_note.note vs compressed NoteContent rows
+
+    python benchmarks/note_storage.py --notes 5000 --body-size 8000
+
+Seeds --notes notes with --body-size character bodies (random words, which
+compress about as well as prose) into a database at the schema before
+migration 0006, when bodies were an inline column of notes_note, and
+measures it. Then it applies 0006, which moves the bodies into compressed
+NoteContent rows, and measures again. For both layouts it reports the
+database size after VACUUM and the latency of:
+
+- the list page query;
+- a full scan of notes_note, which is what an unindexed filter costs;
+- a single-note read.
+
+Where SQLite has dbstat, bytes per notes table are reported too; the FTS
+index is the same size before and after, since it indexes the same text.
+
+After the migration, the list API is also timed through Django in-process,
+with and without ?fields=...,note. The result is printed as a JSON report.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import django_asgi_client, setup_django, summarize, timed
+
+PAGE_SIZE = 50
+# (list page, full scan, single note) queries per layout; the old list view returned bodies
+QUERIES = {
+    "inline": (
+        'SELECT id, title, "desc", note, important, created_at, updated_at FROM notes_note '
+        "ORDER BY created_at DESC, id DESC LIMIT 51",
+        'SELECT COUNT(*) FROM notes_note WHERE "desc" LIKE \'%7%\'',
+        'SELECT id, title, "desc", note, important, created_at, updated_at FROM notes_note WHERE id = %s',
+    ),
+    "separate": (
+        'SELECT id, title, "desc", important, created_at, updated_at FROM notes_note '
+        "ORDER BY created_at DESC, id DESC LIMIT 51",
+        'SELECT COUNT(*) FROM notes_note WHERE "desc" LIKE \'%7%\'',
+        'SELECT n.id, n.title, n."desc", note_body(c.encoding, c.body), n.important, n.created_at, n.updated_at '
+        "FROM notes_note n LEFT JOIN notes_notecontent c ON c.note_id = n.id WHERE n.id = %s",
+    ),
+}
+
+
+def make_bodies(size, count=100, seed=1):
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 10)))
+                  for _ in range(2000)]
+    return [" ".join(rng.choice(vocabulary) for _ in range(size // 5))[:size] for _ in range(count)]
+
+
+def seed_inline(count, body_size, batch_size=1000):
+    """Insert notes with inline bodies through SQL (the Note model no longer has the column)"""
+    from django.db import connection, transaction
+
+    bodies = make_bodies(body_size)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, count, batch_size):
+            cursor.executemany(
+                'INSERT INTO notes_note (title, "desc", note, important, created_at, updated_at) '
+                "VALUES (%s, %s, %s, %s, datetime('now', %s), datetime('now'))",
+                [(f"Note {i}", f"Description {i}", bodies[i % len(bodies)], i % 10 == 0, f"-{i} seconds")
+                 for i in range(start, min(start + batch_size, count))],
+            )
+
+
+def database_size(db_path):
+    """File size after VACUUM, and bytes per table (with its indexes) when SQLite has dbstat"""
+    from django.db import DatabaseError, connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        try:
+            cursor.execute(
+                "SELECT coalesce(m.tbl_name, s.name), SUM(s.pgsize) FROM dbstat s "
+                "LEFT JOIN sqlite_schema m ON m.name = s.name GROUP BY 1 ORDER BY 2 DESC"
+            )
+            tables = {name: size for name, size in cursor.fetchall() if name.startswith("notes_note")}
+        except DatabaseError:
+            tables = None
+    return {"db_bytes": os.path.getsize(db_path), "table_bytes": tables}
+
+
+def measure_queries(layout, iterations, note_ids):
+    from django.db import connection
+
+    list_sql, scan_sql, detail_sql = QUERIES[layout]
+    samples = {"list_page": [], "full_scan": [], "detail": []}
+    rng = random.Random(2)
+    with connection.cursor() as cursor:
+        for _ in range(iterations):
+            for name, sql, params in (
+                ("list_page", list_sql, []),
+                ("full_scan", scan_sql, []),
+                ("detail", detail_sql, [rng.choice(note_ids)]),
+            ):
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                samples[name].append(time.perf_counter() - start)
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+async def measure_api(iterations):
+    samples = {"list": [], "list_with_bodies": []}
+    fields = "id,title,desc,note,important,created_at,updated_at"
+    async with django_asgi_client() as client:
+        for _ in range(iterations):
+            await timed(samples["list"], client.get("/api/notes/", params={"limit": PAGE_SIZE}))
+            await timed(
+                samples["list_with_bodies"], client.get("/api/notes/", params={"limit": PAGE_SIZE, "fields": fields})
+            )
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--body-size", type=int, default=8000, help="characters per note body")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command("migrate", "notes", "0005", verbosity=0)
+    seed_inline(args.notes, args.body_size)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM notes_note")
+        note_ids = [row[0] for row in cursor.fetchall()]
+
+    inline = {**database_size(db_path), **measure_queries("inline", args.iterations, note_ids)}
+    start = time.perf_counter()
+    call_command("migrate", "notes", verbosity=0)
+    migration_seconds = round(time.perf_counter() - start, 2)
+    separate = {**database_size(db_path), **measure_queries("separate", args.iterations, note_ids)}
+    separate["api"] = asyncio.run(measure_api(args.iterations))
+
+    from notes.models import NoteContent
+    report = {
+        "notes": args.notes,
+        "body_size": args.body_size,
+        "compressed_bodies": NoteContent.objects.filter(encoding=NoteContent.Encoding.ZLIB).count(),
+        "migration_seconds": migration_seconds,
+        "inline": inline,
+        "separate": separate,
+        "db_size_ratio": round(inline["db_bytes"] / separate["db_bytes"], 2),
+        "speedup": {
+            name: round(inline[name]["mean_ms"] / separate[name]["mean_ms"], 2)
+            for name in ("list_page", "full_scan", "detail")
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare note repository latency: HTTP proxy to Django vs direct SQLite
+
+    python benchmarks/repository_latency.py --notes 10000 --iterations 500
+    python benchmarks/repository_latency.py --django-url http://localhost:8002 \
+        --db django_backend/db.sqlite3
+
+Without --django-url the HTTP repository talks to Django in-process via
+ASGI, which leaves out the TCP hop; pass a live server URL (pointing at the
+same --db) to include it. Prints a JSON report of per-operation latency.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import django_asgi_client, seed_notes, setup_django, summarize, timed
+
+
+async def run_operations(repository, iterations):
+    samples = {"list": [], "get": [], "create": [], "update": []}
+    page, _ = await repository.list_notes({"limit": 50})
+    note_id = page["results"][0]["id"]
+    for i in range(iterations):
+        await timed(samples["list"], repository.list_notes({"limit": 50}))
+        await timed(samples["get"], repository.get_note(str(note_id)))
+        created = await timed(
+            samples["create"], repository.create_note({"title": f"bench {i}", "desc": "d", "note": "n", "important": False})
+        )
+        await timed(
+            samples["update"],
+            repository.update_note(str(created["id"]), {"title": f"bench {i}", "desc": "d", "note": "updated", "important": True})
+        )
+    return {op: summarize(values) for op, values in samples.items()}
+
+
+async def main(args):
+    from core.repository import HttpNoteRepository, SqliteNoteRepository
+
+    import httpx
+
+    if args.django_url:
+        client = httpx.AsyncClient(base_url=args.django_url)
+    else:
+        client = django_asgi_client()
+
+    report = {"notes": args.notes, "iterations": args.iterations, "django": args.django_url or "in-process ASGI"}
+    async with client:
+        report["http"] = await run_operations(HttpNoteRepository(client), args.iterations)
+    sqlite_repository = await SqliteNoteRepository(args.db).open()
+    try:
+        report["sqlite"] = await run_operations(sqlite_repository, args.iterations)
+    finally:
+        await sqlite_repository.close()
+
+    report["speedup_p50"] = {
+        op: round(report["http"][op]["p50_ms"] / report["sqlite"][op]["p50_ms"], 2)
+        for op in report["http"] if report["sqlite"][op]["p50_ms"]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=1000, help="notes to seed into a fresh database")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--db", help="existing SQLite database (skips seeding)")
+    parser.add_argument("--django-url", help="benchmark a live Django server instead of in-process ASGI")
+    args = parser.parse_args()
+
+    if args.db:
+        setup_django(args.db)
+    else:
+        args.db = setup_django()
+        seed_notes(args.notes)
+    asyncio.run(main(args))
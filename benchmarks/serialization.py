@@ -0,0 +1,123 @@
+"""
+Compare the note read serialization paths: DRF/json vs values()/orjson
+
+    python benchmarks/serialization.py --notes 5000 --limit 500 --iterations 200
+
+Times each stage of a list read separately, on the same page of notes:
+
+  django   ModelSerializer + JSONRenderer (previous path) vs values() rows +
+           NoteValuesSerializer + ORJSONRenderer, with and without fields=
+  proxy    FastAPI's handling of the upstream body: json decode, transform,
+           JSONResponse encode (previous path) vs orjson decode/encode, and
+           a cache hit served from pre-encoded bytes
+
+Prints a JSON report of per-stage latency and the speed-up of each new path.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import seed_notes, setup_django, summarize
+
+
+def measure(fn, iterations):
+    fn()  # warm-up (query compilation, imports)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def django_stages(limit, iterations):
+    from rest_framework.renderers import JSONRenderer
+    from notes.models import Note
+    from notes.renderers import ORJSONRenderer
+    from notes.serializers import NoteSerializer, NoteValuesSerializer
+
+    ordered = Note.objects.order_by("-created_at", "-id")
+    sparse = NoteValuesSerializer(["id", "title", "desc", "important"])
+    full = NoteValuesSerializer()
+    return {
+        "serializer_json": measure(
+            lambda: JSONRenderer().render(NoteSerializer(ordered[:limit], many=True).data), iterations),
+        "values_orjson": measure(
+            lambda: ORJSONRenderer().render(full.many(ordered.values(*full.fields)[:limit])), iterations),
+        "values_orjson_sparse": measure(
+            lambda: ORJSONRenderer().render(sparse.many(ordered.values(*sparse.fields)[:limit])), iterations),
+    }
+
+
+def proxy_stages(limit, iterations):
+    from starlette.responses import JSONResponse
+    from notes.models import Note
+    from notes.renderers import ORJSONRenderer
+    from notes.serializers import NoteValuesSerializer
+    from core.serialization import dumps, loads
+    from routes.integration import note_to_response, page_body
+
+    serializer = NoteValuesSerializer()
+    rows = Note.objects.order_by("-created_at", "-id").values(*serializer.fields)[:limit]
+    upstream = ORJSONRenderer().render({"next_cursor": None, "results": serializer.many(rows)})
+
+    def previous():
+        page = json.loads(upstream)
+        results = [note_to_response(note) for note in page["results"]]
+        JSONResponse({"results": results, "next_cursor": page["next_cursor"], "next": None})
+
+    def fast_miss():
+        page = loads(upstream)
+        results_json = dumps([note_to_response(note) for note in page["results"]]).decode()
+        page_body(results_json, next_cursor=page["next_cursor"], next=None)
+
+    cached = dumps([note_to_response(note) for note in loads(upstream)["results"]]).decode()
+    return {
+        "upstream_bytes": len(upstream),
+        "json_transform_jsonresponse": measure(previous, iterations),
+        "orjson_transform_encode_once": measure(fast_miss, iterations),
+        "cache_hit_preencoded": measure(lambda: page_body(cached, next_cursor=None, next=None), iterations),
+    }
+
+
+def speedup(report, baseline, candidate):
+    return round(report[baseline]["mean_ms"] / report[candidate]["mean_ms"], 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=500, help="notes per page")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--db", help="reuse this SQLite file instead of a temporary one")
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from notes.models import Note
+    missing = args.notes - Note.objects.count()
+    if missing > 0:
+        seed_notes(missing)
+
+    django_report = django_stages(args.limit, args.iterations)
+    proxy_report = proxy_stages(args.limit, args.iterations)
+    report = {
+        "notes": args.notes,
+        "page_size": args.limit,
+        "django": django_report,
+        "proxy": proxy_report,
+        "speedup": {
+            "django_values_orjson": speedup(django_report, "serializer_json", "values_orjson"),
+            "django_values_orjson_sparse": speedup(django_report, "serializer_json", "values_orjson_sparse"),
+            "proxy_miss": speedup(proxy_report, "json_transform_jsonresponse", "orjson_transform_encode_once"),
+            "proxy_hit": speedup(proxy_report, "json_transform_jsonresponse", "cache_hit_preencoded"),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Load spreading across several Django processes
+
+    python benchmarks/upstream_balancing.py --instances 3 --duration 10
+    python benchmarks/upstream_balancing.py --strategy round_robin --kill-after 3
+
+Starts --instances Django servers (uvicorn, one process each) on free local
+ports over one seeded SQLite database, points the FastAPI app's upstream
+client at all of them (DJANGO_SERVICE_URLS) and drives it in-process with
+load_test.py's mixed workload. The response cache is off so every read
+reaches Django. With --kill-after the last instance is terminated that
+many seconds into the run, to show it being ejected while the others take
+over. Prints a JSON report with the requests each instance served, and
+exits non-zero if an instance that stayed up got less than half its even
+share.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import DJANGO_DIR, seed_notes, setup_django
+from benchmarks.load_test import DEFAULT_MIX, drive, existing_note_ids
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_instances(count, db_path):
+    """Launch count Django processes; returns [(url, process)] once all answer /health/"""
+    import httpx
+
+    env = {**os.environ, "DJANGO_SQLITE_PATH": db_path}
+    instances = []
+    for _ in range(count):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "django_backend.asgi:application",
+             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=DJANGO_DIR, env=env,
+        )
+        instances.append((f"http://127.0.0.1:{port}", process))
+
+    deadline = time.monotonic() + 30
+    for url, process in instances:
+        while True:
+            try:
+                if httpx.get(f"{url}/health/", timeout=1).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                stop_instances(instances)
+                raise SystemExit(f"Django instance {url} did not start")
+            time.sleep(0.2)
+    return instances
+
+
+def stop_instances(instances):
+    for _, process in instances:
+        if process.poll() is None:
+            process.terminate()
+    for _, process in instances:
+        process.wait(timeout=10)
+
+
+async def run(args, instances, note_ids):
+    import httpx
+    import index
+    from config.services import ServiceConfig
+    from core.balancer import get_balancer
+
+    ServiceConfig.DJANGO_URLS = [url for url, _ in instances]
+    ServiceConfig.UPSTREAM_BALANCER = args.strategy
+    ServiceConfig.UPSTREAM_HEALTH_INTERVAL = 1.0
+    ServiceConfig.NOTES_BACKEND = "http"
+    ServiceConfig.CACHE_BACKEND = "none"
+    ServiceConfig.RATE_LIMIT_BACKEND = "none"
+
+    async def kill_last():
+        await asyncio.sleep(args.kill_after)
+        instances[-1][1].terminate()
+
+    async with index.app.router.lifespan_context(index.app):
+        killer = asyncio.ensure_future(kill_last()) if args.kill_after is not None else None
+        transport = httpx.ASGITransport(app=index.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=30.0) as client:
+            result = await drive(client, args, note_ids)
+        if killer is not None:
+            await killer
+        return result, get_balancer(index.app.state.http_client).stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=3)
+    parser.add_argument("--strategy", choices=["least_outstanding", "round_robin"], default="least_outstanding")
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--kill-after", type=float, help="terminate the last instance this many seconds in")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.target = "stack"
+    if args.instances < 2:
+        raise SystemExit("--instances must be at least 2")
+
+    db_path = setup_django()
+    seed_notes(args.notes)
+    note_ids = existing_note_ids()
+
+    instances = start_instances(args.instances, db_path)
+    try:
+        result, balancer = asyncio.run(run(args, instances, note_ids))
+    finally:
+        stop_instances(instances)
+
+    served = {instance["url"]: instance["requests"] for instance in balancer["instances"]}
+    survivors = served if args.kill_after is None else dict(list(served.items())[:-1])
+    share = sum(served.values()) / len(served)
+    spread_ok = all(count >= share / 2 for count in survivors.values())
+    report = {
+        "instances": args.instances,
+        "strategy": args.strategy,
+        "concurrency": args.concurrency,
+        "killed": list(served)[-1] if args.kill_after is not None else None,
+        "requests_per_instance": served,
+        "balancer": balancer,
+        "spread_ok": spread_ok,
+        **result,
+    }
+    print(json.dumps(report, indent=2))
+    if not spread_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
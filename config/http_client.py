@@ -0,0 +1,86 @@
+"""
+Shared HTTP client for upstream service calls
+A single pooled httpx.AsyncClient is created in the app lifespan and reused
+by every route, so proxied calls to Django get connection keep-alive.
+Its transport adds timeouts, retries, a circuit breaker and GET coalescing
+(core.resilience) on top of per-call metrics (core.metrics), and balances
+calls over every Django instance ServiceConfig lists (core.balancer).
+"""
+import httpx
+from fastapi import Request
+
+from config.services import ServiceConfig
+from core.balancer import BalancingTransport
+from core.metrics import InstrumentedTransport
+from core.resilience import CircuitBreaker, ResilientTransport
+
+
+def upstream_timeout_rules() -> list:
+    """(methods, path regex, seconds) rules mapping Django endpoints to their read timeouts"""
+    timeouts = ServiceConfig.get_upstream_timeouts()
+    reads = {"GET", "HEAD"}
+    return [
+        (None, r"/api/notes/bulk/", timeouts["bulk"]),
+        (reads, r"/api/notes/export/", timeouts["export"]),
+        (reads, r"/api/notes/search/", timeouts["search"]),
+        (reads, r"/api/notes/changes/", timeouts["list"]),
+        (reads, r"/api/notes/\d+/", timeouts["detail"]),
+        (reads, r"/api/notes/", timeouts["list"]),
+        (None, r"/api/notes/.*", timeouts["write"]),
+    ]
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build the application-scoped client from ServiceConfig settings.
+    HTTP/2 needs the optional `h2` package (pip install "httpx[http2]") and
+    is only negotiated over TLS; plain http:// upstreams stay on HTTP/1.1.
+    """
+    settings = ServiceConfig.get_http_client_settings()
+    limits = httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+    timeout = httpx.Timeout(
+        settings["timeout"],
+        connect=settings["connect_timeout"],
+        pool=settings["pool_timeout"],
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=settings["http2"])
+    urls = ServiceConfig.discover_service_instances("django")
+    if len(urls) > 1:
+        # Innermost, so a retried call can land on another instance
+        transport = BalancingTransport(
+            transport,
+            urls,
+            strategy=ServiceConfig.UPSTREAM_BALANCER,
+            eject_failures=ServiceConfig.UPSTREAM_EJECT_FAILURES,
+            eject_duration=ServiceConfig.UPSTREAM_EJECT_DURATION,
+            health_path=ServiceConfig.UPSTREAM_HEALTH_PATH,
+            health_interval=ServiceConfig.UPSTREAM_HEALTH_INTERVAL,
+        )
+    # Pool settings live on the transport; each retry attempt is timed separately
+    transport = ResilientTransport(
+        InstrumentedTransport(transport),
+        breaker=CircuitBreaker(
+            failure_threshold=ServiceConfig.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=ServiceConfig.CIRCUIT_RECOVERY_TIMEOUT,
+        ),
+        timeout_rules=upstream_timeout_rules(),
+        retries=ServiceConfig.UPSTREAM_RETRIES,
+        backoff=ServiceConfig.UPSTREAM_RETRY_BACKOFF,
+        backoff_max=ServiceConfig.UPSTREAM_RETRY_BACKOFF_MAX,
+        coalesce=ServiceConfig.UPSTREAM_COALESCE,
+    )
+    return httpx.AsyncClient(
+        base_url=urls[0],
+        headers={"Accept-Encoding": ServiceConfig.UPSTREAM_ACCEPT_ENCODING},
+        timeout=timeout,
+        transport=transport,
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the shared client from app state"""
+    return request.app.state.http_client
@@ -12,6 +12,10 @@ class ServiceConfig:
     DJANGO_HOST = os.getenv("DJANGO_SERVICE_HOST", "localhost")
     DJANGO_PORT = os.getenv("DJANGO_SERVICE_PORT", "8002")
     DJANGO_URL = f"http://{DJANGO_HOST}:{DJANGO_PORT}"
+    # Several Django instances to balance over, e.g. http://10.0.0.5:8002,http://10.0.0.6:8002
+    DJANGO_URLS = [
+        url.strip().rstrip("/") for url in os.getenv("DJANGO_SERVICE_URLS", "").split(",") if url.strip()
+    ] or [DJANGO_URL]
     
     # FastAPI Integration Service
     FASTAPI_HOST = os.getenv("FASTAPI_SERVICE_HOST", "localhost") 
@@ -23,6 +27,132 @@ class ServiceConfig:
     REACT_PORT = os.getenv("REACT_SERVICE_PORT", "3000") 
     REACT_URL = f"http://{REACT_HOST}:{REACT_PORT}"
     
+    # Shared upstream HTTP client (connection pool, keep-alive, timeouts)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+    HTTP_BULK_TIMEOUT = float(os.getenv("HTTP_BULK_TIMEOUT", "60"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+    
+    @classmethod
+    def get_http_client_settings(cls) -> dict:
+        """Get connection pool and timeout settings for the shared HTTP client"""
+        return {
+            "max_connections": cls.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": cls.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": cls.HTTP_KEEPALIVE_EXPIRY,
+            "timeout": cls.HTTP_TIMEOUT,
+            "connect_timeout": cls.HTTP_CONNECT_TIMEOUT,
+            "pool_timeout": cls.HTTP_POOL_TIMEOUT,
+            "http2": cls.HTTP2_ENABLED,
+        }
+    
+    # Upstream resilience: per-endpoint read timeouts (seconds), retries, circuit breaker, coalescing
+    UPSTREAM_TIMEOUT_LIST = float(os.getenv("UPSTREAM_TIMEOUT_LIST", "5"))
+    UPSTREAM_TIMEOUT_DETAIL = float(os.getenv("UPSTREAM_TIMEOUT_DETAIL", "3"))
+    UPSTREAM_TIMEOUT_SEARCH = float(os.getenv("UPSTREAM_TIMEOUT_SEARCH", "5"))
+    UPSTREAM_TIMEOUT_WRITE = float(os.getenv("UPSTREAM_TIMEOUT_WRITE", "10"))
+    UPSTREAM_TIMEOUT_EXPORT = float(os.getenv("UPSTREAM_TIMEOUT_EXPORT", "60"))
+    UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+    UPSTREAM_RETRY_BACKOFF = float(os.getenv("UPSTREAM_RETRY_BACKOFF", "0.1"))
+    UPSTREAM_RETRY_BACKOFF_MAX = float(os.getenv("UPSTREAM_RETRY_BACKOFF_MAX", "1"))
+    UPSTREAM_COALESCE = os.getenv("UPSTREAM_COALESCE", "true").lower() in ("1", "true", "yes")
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30"))
+    
+    @classmethod
+    def get_upstream_timeouts(cls) -> dict:
+        """Read timeouts for each kind of upstream call"""
+        return {
+            "list": cls.UPSTREAM_TIMEOUT_LIST,
+            "detail": cls.UPSTREAM_TIMEOUT_DETAIL,
+            "search": cls.UPSTREAM_TIMEOUT_SEARCH,
+            "write": cls.UPSTREAM_TIMEOUT_WRITE,
+            "bulk": cls.HTTP_BULK_TIMEOUT,
+            "export": cls.UPSTREAM_TIMEOUT_EXPORT,
+        }
+    
+    # Response cache for integration reads (memory | redis | none)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    # How long past its TTL an entry may still be served when Django is unavailable
+    CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "300"))
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+    
+    # Note change feed (SSE): how often the change log is polled while clients listen,
+    # and how many undelivered events a slow client may have before it is told to resync
+    CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "1"))
+    CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))
+    
+    # Balancing across DJANGO_SERVICE_URLS (least_outstanding | round_robin), passive
+    # ejection after consecutive failures, and active health checks of each instance
+    UPSTREAM_BALANCER = os.getenv("UPSTREAM_BALANCER", "least_outstanding").lower()
+    UPSTREAM_EJECT_FAILURES = int(os.getenv("UPSTREAM_EJECT_FAILURES", "3"))
+    UPSTREAM_EJECT_DURATION = float(os.getenv("UPSTREAM_EJECT_DURATION", "10"))
+    UPSTREAM_HEALTH_PATH = os.getenv("UPSTREAM_HEALTH_PATH", "/health/")
+    UPSTREAM_HEALTH_INTERVAL = float(os.getenv("UPSTREAM_HEALTH_INTERVAL", "5"))
+    
+    # Admission control on /api/integration: per-route concurrency limits with a bounded wait
+    # queue (503 when full), and per-client token buckets (429); see core.admission
+    ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "64"))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "128"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+    ADMISSION_RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+    # Route (path after /api/integration) = concurrency limit; 0 = never limited
+    ADMISSION_ROUTE_LIMITS = os.getenv(
+        "ADMISSION_ROUTE_LIMITS",
+        "/notes/bulk=4,/notes/export=4,/notes/search=16,/notes/events=0,/notes/stats=0,/health=0,/cache/stats=0,/admission/stats=0",
+    )
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()  # memory | redis | none
+    RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "50"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+    # Header identifying a client (e.g. X-API-Key); the peer address is used when unset or absent
+    RATE_LIMIT_CLIENT_HEADER = os.getenv("RATE_LIMIT_CLIENT_HEADER", "")
+    
+    @classmethod
+    def get_admission_route_limits(cls) -> dict:
+        """Parse ADMISSION_ROUTE_LIMITS into {route: limit}"""
+        limits = {}
+        for item in cls.ADMISSION_ROUTE_LIMITS.split(","):
+            route, _, limit = item.strip().rpartition("=")
+            if route:
+                limits[route] = int(limit)
+        return limits
+    
+    # Response compression (gzip, plus brotli with the optional `brotli` package)
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    # Encodings asked of Django; identity skips compressing loopback traffic only to decompress it
+    UPSTREAM_ACCEPT_ENCODING = os.getenv("UPSTREAM_ACCEPT_ENCODING", "identity")
+    
+    # Notes data access: "http" proxies to Django, "sqlite" reads Django's database directly
+    NOTES_BACKEND = os.getenv("NOTES_BACKEND", "http").lower()
+    NOTES_SQLITE_PATH = os.getenv(
+        "NOTES_SQLITE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "django_backend", "db.sqlite3")
+    )
+    # Same variable as Django's setting: note bodies this large (UTF-8 bytes) are stored zlib-compressed
+    NOTE_BODY_COMPRESS_MIN_SIZE = int(os.getenv("NOTE_BODY_COMPRESS_MIN_SIZE", "1024"))
+    
+    # On-demand profiling (core.profiling): when disabled the middleware and /debug routes are not installed
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # required in X-Profile-Token
+    PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "20"))
+    PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+    PROFILING_SAMPLE_INTERVAL = float(os.getenv("PROFILING_SAMPLE_INTERVAL", "0.005"))
+    
+    # Process launcher (launcher.py): worker processes per service (0 = one per CPU), seconds
+    # workers get to finish in-flight requests on stop/reload, and to start up before giving up
+    FASTAPI_WORKERS = int(os.getenv("FASTAPI_WORKERS", "0"))
+    DJANGO_WORKERS = int(os.getenv("DJANGO_WORKERS", "0"))
+    WORKER_GRACEFUL_TIMEOUT = float(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+    WORKER_READY_TIMEOUT = float(os.getenv("WORKER_READY_TIMEOUT", "60"))
+    
     # CORS Origins (dynamic)
     @classmethod
     def get_cors_origins(cls) -> list[str]:
@@ -39,6 +169,14 @@ class ServiceConfig:
     # Service Discovery (for future use)
     SERVICE_REGISTRY_URL = os.getenv("SERVICE_REGISTRY_URL", "http://localhost:8500")
     
+    @classmethod
+    def get_service_urls(cls, service_name: str) -> list[str]:
+        """All configured instances of a service (Django may have several)"""
+        if service_name.lower() == "django":
+            return list(cls.DJANGO_URLS)
+        url = cls.get_service_url(service_name)
+        return [url] if url else []
+    
     @classmethod
     def get_service_url(cls, service_name: str) -> Optional[str]:
         """
@@ -49,7 +187,7 @@ class ServiceConfig:
         - Docker service discovery
         """
         service_map = {
-            "django": cls.DJANGO_URL,
+            "django": cls.DJANGO_URLS[0],
             "fastapi": cls.FASTAPI_URL,
             "react": cls.REACT_URL,
         }
@@ -73,4 +211,12 @@ class ServiceConfig:
         # service = c.health.service(service_name, passing=True)[1]
         # if service:
         #     return f"http://{service[0]['Service']['Address']}:{service[0]['Service']['Port']}"
-        # return None
\ No newline at end of file
+        # return None
+    
+    @classmethod
+    def discover_service_instances(cls, service_name: str) -> list[str]:
+        """
+        Discover every instance of a service; the integration layer balances
+        its Django calls over these (core.balancer)
+        """
+        return cls.get_service_urls(service_name)
@@ -0,0 +1,299 @@
+"""
+Admission control for the integration routes
+AdmittedRoute runs every /api/integration request through two gates
+before it reaches a handler:
+
+- a per-client token bucket (RateLimiter). A client that empties its
+  bucket gets 429 with Retry-After set to when a token is next available.
+  Buckets live in process memory by default, or in Redis so that several
+  FastAPI workers share them.
+- a per-route concurrency limit with a bounded wait queue
+  (ConcurrencyLimiter). Once a route has `limit` requests in flight,
+  up to queue_size more wait up to queue_timeout seconds for a slot. Past
+  that they are shed at once with 503 and Retry-After, instead of piling up
+  on Django until every request times out.
+
+A slot is held until the response has been fully sent, so streamed exports
+count for their whole duration. Routes with a limit of 0 (the change feed,
+health check and stats) are never queued or shed.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from config.services import ServiceConfig
+from core.metrics import REGISTRY
+from core.serialization import dumps
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency
+    redis_asyncio = None
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "admission_in_flight", "Admitted requests in flight per route", ("route",))
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "admission_queued", "Requests waiting for a concurrency slot per route", ("route",))
+ADMISSION_QUEUED_TOTAL = REGISTRY.counter(
+    "admission_queued_total", "Requests that had to wait for a concurrency slot", ("route",))
+ADMISSION_SHED = REGISTRY.counter(
+    "admission_shed_total", "Requests rejected by admission control", ("route", "reason"))
+
+
+class Rejected(Exception):
+    """A request was not admitted; carries the status and Retry-After to send"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """At most `limit` holders at a time, with at most `queue_size` waiting for up to `queue_timeout`"""
+
+    def __init__(self, route: str, limit: int, queue_size: int, queue_timeout: float, retry_after: float = 1.0):
+        self.route = route
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.counters = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_queue_timeout": 0}
+
+    async def acquire(self) -> None:
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                self._shed("queue_full")
+            self.waiting += 1
+            self.counters["queued"] += 1
+            ADMISSION_QUEUED.inc(route=self.route)
+            ADMISSION_QUEUED_TOTAL.inc(route=self.route)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._shed("queue_timeout")
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUED.dec(route=self.route)
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.counters["admitted"] += 1
+        ADMISSION_IN_FLIGHT.inc(route=self.route)
+
+    def release(self) -> None:
+        self.active -= 1
+        ADMISSION_IN_FLIGHT.dec(route=self.route)
+        self._semaphore.release()
+
+    def _shed(self, reason: str):
+        self.counters[f"shed_{reason}"] += 1
+        ADMISSION_SHED.inc(route=self.route, reason=reason)
+        raise Rejected(503, reason, self.retry_after)
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting, **self.counters}
+
+
+class MemoryBucketStore:
+    """Token buckets in process memory, forgetting the least recently seen clients past max_clients"""
+
+    def __init__(self, max_clients: int = 10_000):
+        self.max_clients = max_clients
+        self._buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 if granted, else seconds until a token is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def close(self) -> None:
+        pass
+
+
+# Refill and take atomically in Redis: KEYS[1] bucket, ARGV rate, burst, now (seconds)
+TOKEN_BUCKET_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared through Redis, so every FastAPI worker enforces one limit per client"""
+
+    def __init__(self, client, namespace: str = "integration:ratelimit:"):
+        self.client = client
+        self.namespace = namespace
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key, rate, burst):
+        return float(await self._script(keys=[self.namespace + key], args=[rate, burst, time.time()]))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """Per-client token buckets refilled at `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, store, rate: float, burst: float):
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.counters = {"allowed": 0, "limited": 0, "store_errors": 0}
+
+    async def check(self, client_key: str, route: str) -> None:
+        try:
+            wait = await self.store.take(client_key, self.rate, self.burst)
+        except Exception:
+            # A shared store that is down must not take the API down with it: fail open
+            self.counters["store_errors"] += 1
+            return
+        if wait > 0:
+            self.counters["limited"] += 1
+            ADMISSION_SHED.inc(route=route, reason="rate_limited")
+            raise Rejected(429, "rate_limited", wait)
+        self.counters["allowed"] += 1
+
+    def stats(self) -> dict:
+        return {"backend": type(self.store).__name__, "rate": self.rate, "burst": self.burst, **self.counters}
+
+
+class AdmissionController:
+    """Route concurrency limiters plus the optional client rate limiter"""
+
+    def __init__(self, route_limits: dict, default_limit: int, queue_size: int, queue_timeout: float,
+                 retry_after: float = 1.0, rate_limiter: Optional[RateLimiter] = None, client_header: str = "",
+                 prefix: str = "/api/integration"):
+        self.route_limits = route_limits
+        self.prefix = prefix
+        self.default_limit = default_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.rate_limiter = rate_limiter
+        self.client_header = client_header.lower().encode()
+        self.limiters: dict = {}
+
+    def limiter(self, path: str) -> Optional[ConcurrencyLimiter]:
+        """The limiter for a route path template, created on first use; None for unlimited routes"""
+        route = path[len(self.prefix):] if path.startswith(self.prefix) else path
+        limiter = self.limiters.get(route)
+        if limiter is None:
+            limit = self.route_limits.get(route, self.default_limit)
+            if limit <= 0:
+                return None
+            limiter = self.limiters[route] = ConcurrencyLimiter(
+                route, limit, self.queue_size, self.queue_timeout, self.retry_after
+            )
+        return limiter
+
+    def client_key(self, scope) -> str:
+        """Rate limit key: the configured client header (e.g. an API key) or the peer address"""
+        if self.client_header:
+            for name, value in scope.get("headers") or []:
+                if name == self.client_header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def stats(self) -> dict:
+        return {
+            "routes": {route: limiter.stats() for route, limiter in self.limiters.items()},
+            "rate_limit": self.rate_limiter.stats() if self.rate_limiter else None,
+        }
+
+    async def close(self) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.store.close()
+
+
+def create_admission_controller() -> AdmissionController:
+    """Build the admission controller from ServiceConfig settings"""
+    rate_limiter = None
+    backend = ServiceConfig.RATE_LIMIT_BACKEND
+    if backend != "none" and ServiceConfig.RATE_LIMIT_RPS > 0:
+        if backend == "redis":
+            if redis_asyncio is None:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install redis)")
+            store = RedisBucketStore(redis_asyncio.from_url(ServiceConfig.REDIS_URL))
+        else:
+            store = MemoryBucketStore()
+        rate_limiter = RateLimiter(store, ServiceConfig.RATE_LIMIT_RPS, ServiceConfig.RATE_LIMIT_BURST)
+    return AdmissionController(
+        route_limits=ServiceConfig.get_admission_route_limits(),
+        default_limit=ServiceConfig.ADMISSION_CONCURRENCY,
+        queue_size=ServiceConfig.ADMISSION_QUEUE_SIZE,
+        queue_timeout=ServiceConfig.ADMISSION_QUEUE_TIMEOUT,
+        retry_after=ServiceConfig.ADMISSION_RETRY_AFTER,
+        rate_limiter=rate_limiter,
+        client_header=ServiceConfig.RATE_LIMIT_CLIENT_HEADER,
+    )
+
+
+class AdmittedRoute(APIRoute):
+    """
+    Route class for integration_router: every request passes the app's
+    AdmissionController (app.state.admission) before its handler runs, and
+    holds its concurrency slot until the response has been fully sent
+    """
+
+    async def handle(self, scope, receive, send):
+        controller = getattr(scope["app"].state, "admission", None)
+        limiter = controller.limiter(self.path) if controller is not None else None
+        if limiter is None or scope["method"] not in self.methods:
+            # Unlimited routes (SSE, health) are not throttled; wrong methods just get their 405
+            await super().handle(scope, receive, send)
+            return
+        try:
+            if controller.rate_limiter is not None:
+                await controller.rate_limiter.check(controller.client_key(scope), limiter.route)
+            await limiter.acquire()
+        except Rejected as e:
+            await self._reject(send, e)
+            return
+        try:
+            await super().handle(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send, rejected: Rejected) -> None:
+        detail = "Too many requests" if rejected.status_code == 429 else "Service overloaded, retry later"
+        body = dumps({"detail": detail, "reason": rejected.reason})
+        await send({
+            "type": "http.response.start",
+            "status": rejected.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(rejected.retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
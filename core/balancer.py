@@ -0,0 +1,221 @@
+"""
+Client-side load balancing across Django instances
+BalancingTransport sits under the resilience and metrics wrappers of the
+shared httpx client and sends each request to one of several Django
+instances (ServiceConfig.get_django_urls()), rewriting only the request's
+scheme, host and port. Instances are picked round-robin or by fewest
+outstanding requests. Consecutive failures (transport errors or 5xx)
+eject an instance for a while (passive ejection), and a background task
+probes every instance's health endpoint so ejected instances come back as
+soon as they answer and dead ones are taken out before a client hits them.
+If every instance is out, requests still go to the least recently ejected
+one rather than failing outright.
+"""
+import asyncio
+import itertools
+import time
+from typing import Optional
+
+import httpx
+
+from core.metrics import REGISTRY
+
+UPSTREAM_INSTANCE_REQUESTS = REGISTRY.counter(
+    "upstream_instance_requests_total", "Upstream calls per Django instance", ("instance", "outcome"))
+UPSTREAM_INSTANCE_OUTSTANDING = REGISTRY.gauge(
+    "upstream_instance_outstanding", "Upstream calls in flight per Django instance", ("instance",))
+UPSTREAM_EJECTIONS = REGISTRY.counter(
+    "upstream_ejections_total", "Django instances taken out of rotation", ("instance", "reason"))
+
+
+class Instance:
+    """One Django instance and its balancing state"""
+
+    def __init__(self, url: str):
+        self.url = httpx.URL(url)
+        self.name = f"{self.url.host}:{self.url.port or (443 if self.url.scheme == 'https' else 80)}"
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def stats(self, now: float) -> dict:
+        return {
+            "url": str(self.url),
+            "available": self.available(now),
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.failures,
+            "requests": self.requests,
+            "ejected_for": round(max(self.ejected_until - now, 0.0), 1),
+        }
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that releases its instance once fully read or closed"""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class BalancingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport spreading requests over several upstream instances.
+
+    strategy is "least_outstanding" (fewest calls in flight, ties broken
+    round-robin) or "round_robin". An instance is ejected for eject_duration
+    seconds after eject_failures consecutive failures, or when its health
+    check fails; health_interval <= 0 turns the active checks off.
+    """
+    STRATEGIES = ("least_outstanding", "round_robin")
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        urls,
+        strategy: str = "least_outstanding",
+        eject_failures: int = 3,
+        eject_duration: float = 10.0,
+        health_path: str = "/health/",
+        health_interval: float = 5.0,
+        health_timeout: float = 2.0,
+    ):
+        if not urls:
+            raise ValueError("BalancingTransport needs at least one upstream URL")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown balancing strategy: {strategy!r}")
+        self.transport = transport
+        self.instances = [Instance(url) for url in urls]
+        self.strategy = strategy
+        self.eject_failures = eject_failures
+        self.eject_duration = eject_duration
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._turn = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Instance:
+        now = time.monotonic()
+        candidates = [instance for instance in self.instances if instance.available(now)]
+        if not candidates:
+            # Everything is ejected: try the one that has been out longest instead of failing
+            return min(self.instances, key=lambda instance: instance.ejected_until)
+        start = next(self._turn) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+        if self.strategy == "round_robin":
+            return rotated[0]
+        return min(rotated, key=lambda instance: instance.outstanding)
+
+    def _eject(self, instance: Instance, reason: str) -> None:
+        if instance.available(time.monotonic()):
+            UPSTREAM_EJECTIONS.inc(instance=instance.name, reason=reason)
+        instance.ejected_until = time.monotonic() + self.eject_duration
+
+    def _record(self, instance: Instance, failed: bool) -> None:
+        UPSTREAM_INSTANCE_REQUESTS.inc(instance=instance.name, outcome="failure" if failed else "success")
+        if not failed:
+            instance.failures = 0
+            return
+        instance.failures += 1
+        if instance.failures >= self.eject_failures:
+            self._eject(instance, "failures")
+
+    def _acquire(self, instance: Instance):
+        instance.outstanding += 1
+        instance.requests += 1
+        UPSTREAM_INSTANCE_OUTSTANDING.inc(instance=instance.name)
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                instance.outstanding -= 1
+                UPSTREAM_INSTANCE_OUTSTANDING.dec(instance=instance.name)
+        return release
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._start_health_checks()
+        instance = self.pick()
+        request.url = request.url.copy_with(scheme=instance.url.scheme, host=instance.url.host, port=instance.url.port)
+        request.headers["Host"] = request.url.netloc.decode("ascii")
+        release = self._acquire(instance)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TransportError:
+            release()
+            self._record(instance, failed=True)
+            raise
+        except BaseException:
+            release()
+            raise
+        self._record(instance, failed=response.status_code >= 500)
+        # Streamed bodies (e.g. the export) keep the instance busy until they are closed
+        response.stream = _TrackedStream(response.stream, release)
+        return response
+
+    def _start_health_checks(self) -> None:
+        if self.health_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(instance) for instance in self.instances))
+            await asyncio.sleep(self.health_interval)
+
+    async def check(self, instance: Instance) -> bool:
+        """Probe one instance's health endpoint, ejecting or restoring it"""
+        request = httpx.Request(
+            "GET", instance.url.join(self.health_path),
+            extensions={"timeout": {"connect": self.health_timeout, "read": self.health_timeout,
+                                    "write": self.health_timeout, "pool": self.health_timeout}},
+        )
+        try:
+            response = await self.transport.handle_async_request(request)
+            await response.aread()
+            await response.aclose()
+            healthy = response.status_code == 200
+        except httpx.TransportError:
+            healthy = False
+        if healthy:
+            instance.failures = 0
+            instance.ejected_until = 0.0
+        else:
+            self._eject(instance, "health_check")
+        return healthy
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {"strategy": self.strategy, "instances": [instance.stats(now) for instance in self.instances]}
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        await self.transport.aclose()
+
+
+def get_balancer(client: httpx.AsyncClient) -> Optional[BalancingTransport]:
+    """The balancing transport under a client built by create_http_client, if any"""
+    transport = getattr(client, "_transport", None)
+    while transport is not None and not isinstance(transport, BalancingTransport):
+        transport = getattr(transport, "transport", None)
+    return transport
@@ -0,0 +1,230 @@
+"""
+Response cache for the integration layer
+Read handlers consult the cache before calling Django; write handlers
+invalidate the keys they affect. Backends share one small async interface.
+Expired entries are kept for a further stale_ttl so reads can fall back to
+them (get_stale) while Django is unavailable.
+Every delete / delete_prefix also bumps an invalidation generation, so a
+read that loaded its value before a write can tell (generation() changed)
+and skip storing it. Generations are per process: invalidations made by
+another worker against a shared Redis are only bounded by the TTL.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from fastapi import Request
+
+from config.services import ServiceConfig
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency
+    redis_asyncio = None
+
+
+# delete() bumps one of this many counters, picked by the key's hash, so
+# tracking deleted keys takes constant memory however many keys there are
+GENERATION_SLOTS = 256
+
+
+class CacheBackend:
+    """Interface every cache backend implements"""
+
+    def __init__(self):
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale_hits": 0}
+        self._key_generations = [0] * GENERATION_SLOTS
+        self._prefix_generations: dict[str, int] = {}
+
+    def generation(self, key: str) -> tuple:
+        """
+        Token that changes whenever delete() or delete_prefix() may have
+        dropped key; compare it before and after loading a value to store
+        """
+        prefixes = tuple(count for prefix, count in self._prefix_generations.items() if key.startswith(prefix))
+        return self._key_generations[hash(key) % GENERATION_SLOTS], prefixes
+
+    def _invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self._key_generations[hash(key) % GENERATION_SLOTS] += 1
+
+    def _invalidate_prefix(self, prefix: str) -> None:
+        self._prefix_generations[prefix] = self._prefix_generations.get(prefix, 0) + 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Return the entry even if expired (within its stale window), or None"""
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "backend": type(self).__name__,
+            **self.counters,
+            "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+class NullCache(CacheBackend):
+    """Cache that stores nothing (CACHE_BACKEND=none)"""
+
+    async def get(self, key):
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key, value, ttl=None):
+        pass
+
+    async def delete(self, *keys):
+        pass
+
+    async def delete_prefix(self, prefix):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache with per-entry TTL and LRU eviction at a bounded size"""
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 30.0, stale_ttl: float = 0.0):
+        super().__init__()
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, tuple[float, float, Any]]" = OrderedDict()
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        expires_at, stale_until, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if stale_until <= now:
+                del self._entries[key]
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return value
+
+    async def get_stale(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        self.counters["stale_hits"] += 1
+        return entry[2]
+
+    async def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl
+        self._entries[key] = (expires_at, expires_at + self.stale_ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    async def delete(self, *keys):
+        self._invalidate(*keys)
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.counters["invalidations"] += 1
+
+    async def delete_prefix(self, prefix):
+        self._invalidate_prefix(prefix)
+        await self.delete(*[key for key in self._entries if key.startswith(prefix)])
+
+    def stats(self):
+        return {**super().stats(), "size": len(self._entries), "max_entries": self.max_entries}
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache stored in Redis (or any client with the redis.asyncio get/set/delete/scan_iter API).
+    Values are JSON encoded; eviction is left to the server's maxmemory policy.
+    """
+
+    def __init__(self, client, default_ttl: float = 30.0, namespace: str = "integration:", stale_ttl: float = 0.0):
+        super().__init__()
+        self.client = client
+        self.default_ttl = default_ttl
+        self.namespace = namespace
+        self.stale_ttl = stale_ttl
+
+    async def _load(self, key):
+        raw = await self.client.get(self.namespace + key)
+        return None if raw is None else json.loads(raw)
+
+    async def get(self, key):
+        # Stored as {"expires_at": <unix time>, "value": ...}; Redis keeps it through the stale window
+        entry = await self._load(key)
+        if entry is None or entry["expires_at"] <= time.time():
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return entry["value"]
+
+    async def get_stale(self, key):
+        entry = await self._load(key)
+        if entry is None:
+            return None
+        self.counters["stale_hits"] += 1
+        return entry["value"]
+
+    async def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = {"expires_at": time.time() + ttl, "value": value}
+        await self.client.set(self.namespace + key, json.dumps(entry), px=int((ttl + self.stale_ttl) * 1000))
+
+    async def delete(self, *keys):
+        self._invalidate(*keys)
+        if keys:
+            removed = await self.client.delete(*[self.namespace + key for key in keys])
+            self.counters["invalidations"] += removed or 0
+
+    async def delete_prefix(self, prefix):
+        self._invalidate_prefix(prefix)
+        keys = [key async for key in self.client.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if keys:
+            removed = await self.client.delete(*keys)
+            self.counters["invalidations"] += removed or 0
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_cache() -> CacheBackend:
+    """Build the cache backend selected by ServiceConfig.CACHE_BACKEND"""
+    backend = ServiceConfig.CACHE_BACKEND
+    if backend == "none":
+        return NullCache()
+    if backend == "redis":
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        client = redis_asyncio.from_url(ServiceConfig.REDIS_URL)
+        return RedisCache(client, default_ttl=ServiceConfig.CACHE_TTL, stale_ttl=ServiceConfig.CACHE_STALE_TTL)
+    return MemoryCache(
+        max_entries=ServiceConfig.CACHE_MAX_ENTRIES,
+        default_ttl=ServiceConfig.CACHE_TTL,
+        stale_ttl=ServiceConfig.CACHE_STALE_TTL,
+    )
+
+
+def get_cache(request: Request) -> CacheBackend:
+    """FastAPI dependency returning the shared cache from app state"""
+    return request.app.state.cache
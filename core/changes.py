@@ -0,0 +1,153 @@
+"""
+Note change feed fan-out for the integration layer
+ChangeFeed follows Django's change log (GET /api/notes/changes/?since=) with
+one poller per process, and only while someone is listening. Each change is
+handed to every subscriber's bounded queue, so a thousand open browser tabs
+cost one upstream poll per interval instead of a thousand list refetches.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import Request
+
+from core.metrics import REGISTRY
+from core.repository import NoteRepository
+
+logger = logging.getLogger(__name__)
+
+FEED_SUBSCRIBERS = REGISTRY.gauge(
+    "change_feed_subscribers", "Clients currently subscribed to the note change feed")
+FEED_EVENTS = REGISTRY.counter(
+    "change_feed_events_total", "Note changes read from the upstream change log", ("action",))
+FEED_RESYNCS = REGISTRY.counter(
+    "change_feed_resyncs_total", "Subscribers told to reload because they fell too far behind")
+
+
+class Resync:
+    """
+    Queued in place of the dropped backlog when a subscriber falls behind;
+    changes after seq are still delivered
+    """
+
+    def __init__(self, seq: int):
+        self.seq = seq
+
+
+class Subscription:
+    """One listener's queue of change dicts (or a Resync)"""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, change: dict) -> None:
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what is queued and ask the client to reload
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Resync(change["seq"]))
+            FEED_RESYNCS.inc()
+
+
+class ChangeFeed:
+    """
+    Polls the repository's change log and publishes each change to every
+    subscriber. invalidate(changes) is awaited for each batch before it is
+    published, so cached reads never trail the events clients receive.
+    """
+
+    def __init__(
+        self,
+        repository: NoteRepository,
+        invalidate=None,
+        poll_interval: float = 1.0,
+        queue_size: int = 256,
+        page_size: int = 500,
+    ):
+        self.repository = repository
+        self.invalidate = invalidate
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.page_size = page_size
+        self.last_seq: Optional[int] = None
+        self._subscribers: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def head(self) -> int:
+        """Sequence number of the newest change"""
+        return (await self.repository.list_changes(None))["last_seq"]
+
+    async def backlog(self, since: int, until: int) -> Optional[list]:
+        """
+        Changes after since up to at least until, or None when there are more
+        than one subscriber queue's worth (the client should reload instead)
+        """
+        changes = []
+        while since < until:
+            page = await self.repository.list_changes(since, self.page_size)
+            changes.extend(page["changes"])
+            if len(changes) > self.queue_size:
+                return None
+            if not page["has_more"]:
+                break
+            since = page["last_seq"]
+        return changes
+
+    def subscribe(self, since: int) -> tuple[Subscription, int]:
+        """
+        Register a listener that has seen every change up to since. Returns
+        the subscription and the seq the feed has already published up to;
+        changes in (since, that seq] must be read with backlog().
+        """
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        FEED_SUBSCRIBERS.set(len(self._subscribers))
+        if self._task is None:
+            self.last_seq = since
+            self._task = asyncio.create_task(self._poll())
+        return subscription, self.last_seq
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        FEED_SUBSCRIBERS.set(len(self._subscribers))
+
+    async def _poll(self) -> None:
+        failures = 0
+        try:
+            while self._subscribers:
+                try:
+                    page = await self.repository.list_changes(self.last_seq, self.page_size)
+                    if page["changes"] and self.invalidate is not None:
+                        await self.invalidate(page["changes"])
+                except Exception as e:
+                    # Keep subscribers connected and back off until Django is back
+                    failures += 1
+                    logger.warning("Change feed poll failed: %s", e)
+                    await asyncio.sleep(min(self.poll_interval * 2 ** failures, 30.0))
+                    continue
+                failures = 0
+                for change in page["changes"]:
+                    FEED_EVENTS.inc(action=change["action"])
+                    for subscription in list(self._subscribers):
+                        subscription.push(change)
+                self.last_seq = page["last_seq"]
+                if not page["has_more"]:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            self._task = None
+
+    async def close(self) -> None:
+        task = self._task
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+def get_change_feed(request: Request) -> ChangeFeed:
+    """FastAPI dependency returning the change feed from app state"""
+    return request.app.state.change_feed
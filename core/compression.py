@@ -0,0 +1,163 @@
+"""
+Response compression for the integration layer
+CompressionMiddleware negotiates brotli or gzip from Accept-Encoding and
+compresses text-like responses (JSON, HTML, CSS, JS, NDJSON, CSV) once
+they reach minimum_size. Streamed bodies are compressed chunk by chunk and
+flushed after each one, so a streamed page still arrives progressively.
+Server-Sent Events and responses that already carry a Content-Encoding
+(e.g. precompressed static files) are passed through untouched.
+Brotli needs the optional `brotli` package; without it only gzip is offered.
+"""
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+# Never buffered or compressed: events must reach the client as they are sent
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+def available_encodings() -> tuple:
+    """Encodings this process can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str, offered) -> Optional[str]:
+    """Pick the offered encoding with the highest q-value in Accept-Encoding (ties go to the first offered)"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(EXCLUDED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class Encoder:
+    """Incremental gzip or brotli compressor"""
+
+    def __init__(self, encoding: str, gzip_level: int = 6, brotli_quality: int = 4):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._compressor.process(chunk)
+            return data + (self._compressor.finish() if final else self._compressor.flush())
+        data = self._compressor.compress(chunk)
+        return data + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _vary(headers: list) -> list:
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the client's preferred encoding"""
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = b""
+        for name, value in scope.get("headers") or []:
+            if name == b"accept-encoding":
+                accept = value
+        encoding = negotiate_encoding(accept.decode("latin-1"), available_encodings())
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                names = {name.lower(): value for name, value in headers}
+                content_type = names.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in names or not is_compressible(content_type):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Held back until the first body chunk shows whether compression pays off
+                start = {**message, "headers": _vary(headers)}
+                passthrough = encoding is None
+                if passthrough:
+                    await send(start)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = []
+                for name, value in start["headers"]:
+                    if name.lower() == b"content-length":
+                        continue
+                    if name.lower() == b"etag" and value.startswith(b'"'):
+                        # The compressed bytes are a different representation of the same resource
+                        value = b"W/" + value
+                    headers.append((name, value))
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    compressed = encoder.compress(body, final=True)
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": encoder.compress(body, final=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,63 @@
+"""
+Conditional GET support for proxied reads
+Django computes the validators (ETag / Last-Modified); the integration
+layer stores them next to cached bodies, forwards the client's
+If-None-Match / If-Modified-Since upstream and answers 304 itself when a
+cached entry still matches.
+"""
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+from fastapi import Request, Response
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+
+def conditional_headers(request: Request) -> dict:
+    """Client validators to forward to the upstream request"""
+    return {name: request.headers[name] for name in CONDITIONAL_HEADERS if name in request.headers}
+
+
+def response_validators(response: httpx.Response) -> dict:
+    """Validators returned by the upstream response"""
+    return {name: response.headers[name] for name in VALIDATOR_HEADERS if name in response.headers}
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def validators_match(request: Request, validators: dict) -> bool:
+    """
+    True if the client's copy is still current (RFC 9110: If-None-Match
+    takes precedence over If-Modified-Since when both are sent)
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    etag = validators.get("ETag")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        candidates = [_strip_weak(tag.strip()) for tag in if_none_match.split(",")]
+        return "*" in candidates or _strip_weak(etag) in candidates
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    last_modified = validators.get("Last-Modified")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified(validators: Optional[dict] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(validators or {}))
+
+
+def validator_headers(validators: dict) -> dict:
+    """Response headers for a body carrying these validators"""
+    if not validators:
+        return {}
+    return {**validators, "Cache-Control": "no-cache"}
@@ -0,0 +1,157 @@
+"""
+Prometheus-style metrics and trace-id propagation for the integration layer
+A small in-process registry (counters, gauges, histograms with labels,
+from core.prometheus, shared with the Django API) rendered in the
+Prometheus text exposition format at /metrics.
+MetricsMiddleware times every request per route; InstrumentedTransport
+times every upstream call made through the shared httpx client and splits
+it into Django's own time (from its Server-Timing header) and the hop.
+"""
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+
+from core.prometheus import Registry
+
+TRACE_HEADER = "X-Request-ID"
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "fastapi_requests_total", "Requests handled by the integration layer", ("method", "route", "status"))
+REQUEST_LATENCY = REGISTRY.histogram(
+    "fastapi_request_duration_seconds", "End-to-end request latency in FastAPI", ("method", "route"))
+IN_FLIGHT = REGISTRY.gauge(
+    "fastapi_requests_in_flight", "Requests currently being handled", ("method",))
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "upstream_requests_total", "Calls from FastAPI to upstream services", ("method", "endpoint", "status"))
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Upstream call latency seen by FastAPI (until headers)", ("method", "endpoint"))
+UPSTREAM_SERVER_LATENCY = REGISTRY.histogram(
+    "upstream_server_duration_seconds", "Time Django reports spending on the request (Server-Timing app)",
+    ("method", "endpoint"))
+UPSTREAM_DB_LATENCY = REGISTRY.histogram(
+    "upstream_db_duration_seconds", "Time Django reports spending in SQL (Server-Timing db)", ("method", "endpoint"))
+UPSTREAM_HOP_LATENCY = REGISTRY.histogram(
+    "upstream_hop_duration_seconds", "Upstream latency not spent inside Django (network, queueing, parsing)",
+    ("method", "endpoint"))
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+_VALID_TRACE_ID = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+
+def endpoint_label(path: str) -> str:
+    """Collapse numeric path segments so labels stay low-cardinality"""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+def parse_server_timing(header: str) -> dict:
+    """Parse 'db;dur=1.2, app;dur=3.4' into {'db': 0.0012, 'app': 0.0034} (seconds)"""
+    timings = {}
+    for entry in header.split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        for param in parts[1:]:
+            if param.startswith("dur="):
+                try:
+                    timings[parts[0]] = float(param[4:]) / 1000
+                except ValueError:
+                    pass
+    return timings
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled this request (e.g. /api/integration/notes/{note_id})"""
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests,
+    and propagating the X-Request-ID trace id. The router stores the matched
+    route in the scope, so the route label is read after the app has run.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id = headers.get(TRACE_HEADER.lower().encode(), b"").decode("latin-1")
+        if not _VALID_TRACE_ID.fullmatch(trace_id):
+            trace_id = new_trace_id()
+        token = trace_id_var.set(trace_id)
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (TRACE_HEADER.lower().encode(), trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        IN_FLIGHT.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec(method=method)
+            route = route_template(scope)
+            REQUESTS.inc(method=method, route=route, status=status["code"])
+            REQUEST_LATENCY.observe(elapsed, method=method, route=route)
+            trace_id_var.reset(token)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport wrapper timing each upstream call and forwarding the
+    current trace id, so every handler's Django calls are measured.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        trace_id = trace_id_var.get()
+        if trace_id and TRACE_HEADER not in request.headers:
+            request.headers[TRACE_HEADER] = trace_id
+        method = request.method
+        endpoint = endpoint_label(request.url.path)
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            UPSTREAM_REQUESTS.inc(method=method, endpoint=endpoint, status=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        UPSTREAM_REQUESTS.inc(method=method, endpoint=endpoint, status=response.status_code)
+        UPSTREAM_LATENCY.observe(elapsed, method=method, endpoint=endpoint)
+
+        timings = parse_server_timing(response.headers.get("server-timing", ""))
+        if "app" in timings:
+            UPSTREAM_SERVER_LATENCY.observe(timings["app"], method=method, endpoint=endpoint)
+            UPSTREAM_HOP_LATENCY.observe(max(elapsed - timings["app"], 0.0), method=method, endpoint=endpoint)
+        if "db" in timings:
+            UPSTREAM_DB_LATENCY.observe(timings["db"], method=method, endpoint=endpoint)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,162 @@
+"""
+Profile capture shared by both services' on-demand profiling
+The stack sampler, the profile records and the in-memory store behind
+core.profiling (FastAPI) and django_backend/notes/profiling.py (Django).
+Nothing here depends on either framework; each service keeps its own
+middleware, views and settings around it.
+"""
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Optional
+
+TEXT_LINES = 60  # rows of the text rendering of a cProfile profile
+
+# Leaf frames of a thread that is waiting rather than working, left out unless idle=True
+IDLE_FRAMES = {
+    ("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get"),
+    ("socket.py", "accept"), ("thread.py", "_worker"), ("socketserver.py", "serve_forever"),
+    ("core.py", "_connection_worker_thread"),  # aiosqlite's connection thread
+}
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame, root: str) -> str:
+    """A frame's stack in collapsed form: root;outermost;...;innermost"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+def is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+class StackSampler:
+    """
+    Records the stack of every other thread (or only thread_id's) every
+    `interval` seconds from a background thread, as collapsed-stack counts
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None, idle: bool = False):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.idle = idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames[self.thread_id]} if self.thread_id in frames else {}
+            for ident, frame in frames.items():
+                if ident == own or (not self.idle and is_idle(frame)):
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                self.stacks[collapse(frame, names.get(ident, str(ident)))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileRecord:
+    """One captured profile: cProfile stats or collapsed stacks"""
+
+    def __init__(self, kind: str, label: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.label = label
+        self.started = time.time()
+        self.duration: Optional[float] = None
+        self.clock: Optional[float] = None  # perf_counter() at start, when started and stopped apart
+        self.profile: Optional[cProfile.Profile] = None
+        self.stacks: Optional[str] = None
+        self.samples = 0
+
+    @property
+    def formats(self) -> tuple:
+        return ("pstats", "text") if self.kind == "cprofile" else ("collapsed",)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "label": self.label,
+            "started": self.started,
+            "duration": self.duration,
+            "samples": self.samples if self.kind == "sample" else None,
+            "formats": self.formats,
+            "complete": self.duration is not None,
+        }
+
+    def render(self, fmt: Optional[str] = None) -> tuple:
+        """(body, media type, file name) in fmt, the first of self.formats by default"""
+        fmt = fmt or self.formats[0]
+        if fmt not in self.formats:
+            raise ValueError(f"A {self.kind} profile downloads as {', '.join(self.formats)}")
+        if fmt == "pstats":
+            # The format pstats.Stats.dump_stats writes and pstats.Stats(path) reads
+            return marshal.dumps(pstats.Stats(self.profile).stats), "application/octet-stream", f"{self.id}.pstats"
+        if fmt == "text":
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(TEXT_LINES)
+            return stream.getvalue().encode(), "text/plain; charset=utf-8", f"{self.id}.txt"
+        return self.stacks.encode(), "text/plain; charset=utf-8", f"{self.id}.collapsed"
+
+
+class ProfileStore:
+    """The last max_profiles profiles of this process, in memory"""
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._profiles: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, record: ProfileRecord) -> None:
+        with self._lock:
+            self._profiles[record.id] = record
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return [record.summary() for record in reversed(self._profiles.values())]
+
+
+def token_matches(token: str, expected: str) -> bool:
+    """Whether a request's profiling token is the configured one (never, if none is)"""
+    return bool(expected) and hmac.compare_digest(token.encode(), expected.encode())
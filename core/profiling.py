@@ -0,0 +1,123 @@
+"""
+On-demand profiling
+Off unless PROFILING_ENABLED is set, in which case index.py installs
+ProfilingMiddleware and the /debug routes; disabled, neither exists, so an
+ordinary request pays nothing for it. Every use needs the X-Profile-Token
+header to match PROFILING_TOKEN.
+
+- One request: send it with `X-Profile: cprofile` (or `?_profile=cprofile`)
+  to run it under cProfile, or `sample` to run it under the stack sampler.
+  The response is unchanged apart from an X-Profile-ID header; the profile
+  is kept in memory (the last PROFILING_MAX_PROFILES) and downloaded from
+  /debug/profiles/{id}.
+- The whole process: POST /debug/profile?seconds=N samples the stack of
+  every thread for N seconds and returns it.
+
+cProfile results download as .pstats files (python -m pstats, snakeviz) or
+as text; sampled results as collapsed stacks (flamegraph.pl, speedscope).
+Both profilers watch the event loop thread, so other requests being served
+at the same time show up in a single request's profile too. The sampler and
+the store are core.profiles, shared with the Django API.
+"""
+import cProfile
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException, Request
+
+from config.services import ServiceConfig
+from core.profiles import ProfileRecord, ProfileStore, StackSampler, token_matches
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_PARAM = "_profile"
+TOKEN_HEADER = "X-Profile-Token"
+MODES = ("cprofile", "sample")
+
+
+def require_profiling_token(request: Request) -> None:
+    """Dependency guarding the /debug routes"""
+    if not token_matches(request.headers.get(TOKEN_HEADER, ""), ServiceConfig.PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+
+
+def get_profile_store(request: Request) -> ProfileStore:
+    return request.app.state.profiles
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with a profiling flag and a valid token. A
+    flagged request without a valid token is served normally; so is one
+    arriving while another is being profiled, with `X-Profile: busy`, since
+    cProfile cannot profile two overlapping requests on the one event loop
+    thread.
+    """
+
+    def __init__(self, app, store: ProfileStore):
+        self.app = app
+        self.store = store
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        mode = self.requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if self._busy:
+            await self.app(scope, receive, self.with_header(send, b"x-profile", b"busy"))
+            return
+
+        self._busy = True
+        record = ProfileRecord(mode, f"{scope['method']} {scope['path']}")
+        self.store.add(record)
+        send = self.with_header(send, b"x-profile-id", record.id.encode())
+        start = time.perf_counter()
+        try:
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profile.disable()
+                    record.profile = profile
+            else:
+                sampler = StackSampler(ServiceConfig.PROFILING_SAMPLE_INTERVAL, threading.get_ident())
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    sampler.stop()
+                    record.stacks, record.samples = sampler.collapsed(), sampler.samples
+        finally:
+            record.duration = time.perf_counter() - start
+            self._busy = False
+
+    @staticmethod
+    def requested_mode(scope) -> Optional[str]:
+        """The profiler a request asks for, if it carries a valid token"""
+        headers = dict(scope["headers"])
+        mode = headers.get(PROFILE_HEADER, b"").decode("latin-1").lower()
+        if not mode and PROFILE_PARAM.encode() in scope["query_string"]:
+            mode = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_PARAM, [""])[0].lower()
+        if mode not in MODES:
+            return None
+        token = headers.get(TOKEN_HEADER.lower().encode(), b"").decode("latin-1")
+        return mode if token_matches(token, ServiceConfig.PROFILING_TOKEN) else None
+
+    @staticmethod
+    def with_header(send, name: bytes, value: bytes):
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (name, value)]}
+            await send(message)
+        return send_with_header
+
+
+def create_profile_store() -> ProfileStore:
+    """The store behind the /debug routes; PROFILING_ENABLED requires a token"""
+    if not ServiceConfig.PROFILING_TOKEN:
+        raise RuntimeError("PROFILING_ENABLED requires PROFILING_TOKEN")
+    return ProfileStore(ServiceConfig.PROFILING_MAX_PROFILES)
@@ -0,0 +1,673 @@
+"""
+Note repositories for the integration layer
+HttpNoteRepository proxies to the Django REST API (the default).
+SqliteNoteRepository reads and writes Django's notes_note and
+notes_notecontent tables directly with aiosqlite, skipping the HTTP hop and
+DRF when both services share a host. Both return notes in the Django API shape, so route handlers do not
+care which one is active (ServiceConfig.NOTES_BACKEND).
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from email.utils import format_datetime
+from typing import Optional
+from urllib.parse import urlencode
+
+import httpx
+from fastapi import Request
+
+from config.services import ServiceConfig
+from core.conditional import response_validators
+from core.serialization import loads
+
+try:
+    import aiosqlite
+except ImportError:  # optional dependency, only needed for NOTES_BACKEND=sqlite
+    aiosqlite = None
+
+
+class RepositoryError(Exception):
+    """A note operation failed; carries the HTTP status to report"""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class NoteNotFound(RepositoryError):
+    def __init__(self):
+        super().__init__(404, "Note not found")
+
+
+class InvalidCursor(RepositoryError):
+    def __init__(self):
+        super().__init__(400, "Invalid cursor")
+
+
+class UpstreamUnavailable(RepositoryError):
+    """Django could not be reached, timed out, failed, or its circuit is open"""
+
+    def __init__(self, status_code: int = 503, detail="Notes service unavailable"):
+        super().__init__(status_code, detail)
+
+
+def upstream_unavailable(error: Exception) -> UpstreamUnavailable:
+    """Map an httpx transport error to the error reported to clients"""
+    if isinstance(error, httpx.TimeoutException):
+        return UpstreamUnavailable(504, "Notes service timed out")
+    return UpstreamUnavailable()
+
+
+class NotModified(Exception):
+    """The client's validators still match; carries the current validators"""
+
+    def __init__(self, validators: dict):
+        super().__init__("Not modified")
+        self.validators = validators
+
+
+class NoteRepository:
+    """
+    Interface for note storage. Notes are dicts shaped like the Django API
+    (id, title, desc, note, important, created_at, updated_at).
+    """
+
+    async def list_notes(self, params: dict, headers: Optional[dict] = None) -> tuple[dict, dict]:
+        """Return ({"results": [...], "next_cursor": ...}, validators) for one page"""
+        raise NotImplementedError
+
+    async def get_note(self, note_id: str, headers: Optional[dict] = None) -> tuple[dict, dict]:
+        """Return (note, validators)"""
+        raise NotImplementedError
+
+    async def create_note(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    async def update_note(self, note_id: str, data: dict) -> dict:
+        """Partially update a note: only the fields in data change"""
+        raise NotImplementedError
+
+    async def delete_note(self, note_id: str) -> None:
+        raise NotImplementedError
+
+    async def list_changes(self, since: Optional[int], limit: int = 500) -> dict:
+        """
+        Return {"changes": [...], "last_seq": ..., "has_more": ...} for the
+        change log after seq `since`; with since=None only last_seq is set
+        """
+        raise NotImplementedError
+
+    async def note_stats(self, days: int = 30, weeks: int = 12) -> dict:
+        """
+        Return {"total", "important", "per_day": [...], "per_week": [...]},
+        read from Django's note stats tables
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpNoteRepository(NoteRepository):
+    """Notes served by the Django REST API through the shared httpx client"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            raise upstream_unavailable(e)
+        if response.status_code >= 500:
+            raise UpstreamUnavailable(502, "Notes service error")
+        return response
+
+    @staticmethod
+    def _json(data) -> dict:
+        """
+        Request arguments sending data as ASCII-escaped JSON, so strings that
+        are not valid UTF-8 (lone surrogates) reach Django's validation
+        """
+        return {"content": json.dumps(data).encode(), "headers": {"Content-Type": "application/json"}}
+
+    async def list_notes(self, params, headers=None):
+        response = await self._request("GET", "/api/notes/", params=params, headers=headers)
+        if response.status_code == 304:
+            raise NotModified(response_validators(response))
+        if response.status_code == 404:
+            raise InvalidCursor()
+        if response.status_code == 400:
+            raise RepositoryError(400, loads(response.content))
+        if response.status_code != 200:
+            raise RepositoryError(response.status_code, "Failed to fetch notes from Django")
+        return loads(response.content), response_validators(response)
+
+    async def get_note(self, note_id, headers=None):
+        response = await self._request("GET", f"/api/notes/{note_id}/", headers=headers)
+        if response.status_code == 304:
+            raise NotModified(response_validators(response))
+        if response.status_code == 404:
+            raise NoteNotFound()
+        if response.status_code != 200:
+            raise RepositoryError(response.status_code, "Failed to fetch note")
+        return loads(response.content), response_validators(response)
+
+    async def create_note(self, data):
+        response = await self._request("POST", "/api/notes/", **self._json(data))
+        if response.status_code == 400:
+            raise RepositoryError(400, loads(response.content))
+        if response.status_code != 201:
+            raise RepositoryError(response.status_code, "Failed to create note")
+        return loads(response.content)
+
+    async def update_note(self, note_id, data):
+        response = await self._request("PATCH", f"/api/notes/{note_id}/", **self._json(data))
+        if response.status_code == 404:
+            raise NoteNotFound()
+        if response.status_code == 400:
+            raise RepositoryError(400, loads(response.content))
+        if response.status_code != 200:
+            raise RepositoryError(response.status_code, "Failed to update note")
+        return loads(response.content)
+
+    async def delete_note(self, note_id):
+        response = await self._request("DELETE", f"/api/notes/{note_id}/")
+        if response.status_code == 404:
+            raise NoteNotFound()
+        if response.status_code != 204:
+            raise RepositoryError(response.status_code, "Failed to delete note")
+
+    async def list_changes(self, since, limit=500):
+        params = {"limit": limit} if since is None else {"since": since, "limit": limit}
+        response = await self._request("GET", "/api/notes/changes/", params=params)
+        if response.status_code != 200:
+            raise RepositoryError(response.status_code, "Failed to fetch note changes")
+        return loads(response.content)
+
+    async def note_stats(self, days=30, weeks=12):
+        response = await self._request("GET", "/api/notes/stats/", params={"days": days, "weeks": weeks})
+        if response.status_code == 400:
+            raise RepositoryError(400, loads(response.content))
+        if response.status_code != 200:
+            raise RepositoryError(response.status_code, "Failed to fetch note stats")
+        return loads(response.content)
+
+
+# Fields a sparse fieldset (?fields=) may name; matches Django's NoteSerializer
+NOTE_FIELDS = ("id", "title", "desc", "note", "important", "created_at", "updated_at")
+# List pages leave the body out unless ?fields= asks for it (Django's LIST_FIELDS)
+LIST_FIELDS = tuple(name for name in NOTE_FIELDS if name != "note")
+
+
+def parse_fields(value: Optional[str]) -> Optional[tuple]:
+    """Parse a ?fields= value into field names with id first, or None for full notes"""
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = sorted(set(fields) - set(NOTE_FIELDS))
+    if unknown:
+        raise RepositoryError(400, {"fields": [f"Unknown field(s): {', '.join(unknown)}"]})
+    return tuple(dict.fromkeys(["id", *fields]))
+
+
+# Column limits enforced by Django's model validation; SQLite itself does not check them
+FIELD_MAX_LENGTHS = {"title": 200, "desc": 500}
+# The text fields NoteSerializer requires on create
+TEXT_FIELDS = ("title", "desc", "note")
+# Bodies are stored in notes_notecontent, encoded as in django_backend/notes/content.py
+BODY_COMPRESS_MIN_SIZE = ServiceConfig.NOTE_BODY_COMPRESS_MIN_SIZE
+NOTE_SOURCE = "notes_note LEFT JOIN notes_notecontent ON notes_notecontent.note_id = notes_note.id"
+BODY_COLUMN = "coalesce(note_body(notes_notecontent.encoding, notes_notecontent.body), '')"
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# List filters and orderings; matches django_backend/notes/filters.py
+ORDERING_FIELDS = ("created_at", "updated_at", "title")
+DEFAULT_ORDERING = "-created_at"
+DATETIME_FIELDS = ("created_at", "updated_at")
+DATE_RANGE_FILTERS = {
+    "created_after": "created_at >= ?",
+    "created_before": "created_at < ?",
+    "updated_after": "updated_at >= ?",
+    "updated_before": "updated_at < ?",
+}
+BOOLEAN_VALUES = {"true": 1, "1": 1, "false": 0, "0": 0}
+
+
+def _to_db(value: datetime) -> str:
+    """Format a datetime the way Django's SQLite backend stores it (naive UTC)"""
+    return str(value.astimezone(timezone.utc).replace(tzinfo=None))
+
+
+def _from_db(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def _to_api(value: datetime) -> str:
+    """Format a datetime the way DRF renders it"""
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _stamp(value: Optional[datetime]) -> int:
+    return int(value.timestamp() * 1_000_000) if value else 0
+
+
+def _parse_moment(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _encode_cursor(key, pk: int) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    raw = f"{key}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, field: str = "created_at") -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, pk = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        if field in DATETIME_FIELDS:
+            key = _to_db(_parse_moment(key))
+        return key, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor()
+
+
+def _list_filters(params: dict) -> tuple[list, list]:
+    """SQL conditions and arguments for the list filters, as notes/filters.py applies them"""
+    conditions, args = [], []
+    if params.get("important"):
+        if params["important"] not in BOOLEAN_VALUES:
+            raise RepositoryError(400, {"important": ["Must be true or false."]})
+        conditions.append("important = ?")
+        args.append(BOOLEAN_VALUES[params["important"]])
+    for name, condition in DATE_RANGE_FILTERS.items():
+        if params.get(name):
+            try:
+                args.append(_to_db(_parse_moment(params[name])))
+            except ValueError:
+                raise RepositoryError(400, {name: ["Must be an ISO 8601 date or datetime."]})
+            conditions.append(condition)
+    return conditions, args
+
+
+def _list_ordering(params: dict) -> tuple[str, bool]:
+    value = params.get("ordering") or DEFAULT_ORDERING
+    field = value.lstrip("-")
+    if field not in ORDERING_FIELDS or value.count("-") > 1:
+        allowed = ", ".join(f"{name}, -{name}" for name in ORDERING_FIELDS)
+        raise RepositoryError(400, {"ordering": [f"Must be one of: {allowed}."]})
+    return field, value.startswith("-")
+
+
+def _text_errors(value: str, max_length: Optional[int]) -> list:
+    """What DRF's CharField reports for value (already trimmed), in its order and wording"""
+    if not value:
+        return ["This field may not be blank."]
+    errors = []
+    if max_length is not None and len(value) > max_length:
+        errors.append(f"Ensure this field has no more than {max_length} characters.")
+    if "\x00" in value:
+        errors.append("Null characters are not allowed.")
+    surrogate = next((ch for ch in value if 0xD800 <= ord(ch) <= 0xDFFF), None)
+    if surrogate is not None:
+        errors.append(f"Surrogate characters are not allowed: U+{ord(surrogate):X}.")
+    return errors
+
+
+def _encode_body(text: str) -> tuple[str, bytes]:
+    data = text.encode()
+    if len(data) >= BODY_COMPRESS_MIN_SIZE:
+        compressed = zlib.compress(data)
+        if len(compressed) < len(data):
+            return "zlib", compressed
+    return "identity", data
+
+
+def _decode_body(encoding: Optional[str], data: Optional[bytes]) -> Optional[str]:
+    if data is None:
+        return None
+    if encoding == "zlib":
+        data = zlib.decompress(data)
+    return bytes(data).decode()
+
+
+def _select(fields) -> tuple[str, str]:
+    """Select list and FROM clause for fields; the body table is only joined in when `note` is asked for"""
+    if "note" not in fields:
+        return ", ".join(f'"{name}"' for name in fields), "notes_note"
+    columns = ", ".join(f'{BODY_COLUMN} AS note' if name == "note" else f'notes_note."{name}"' for name in fields)
+    return columns, NOTE_SOURCE
+
+
+def _note_validators(pk: int, updated_at: datetime) -> dict:
+    # Same formula as django_backend/notes/conditional.py
+    return {
+        "ETag": f'"{pk}-{_stamp(updated_at)}"',
+        "Last-Modified": format_datetime(updated_at.replace(microsecond=0), usegmt=True),
+    }
+
+
+def _collection_validators(version: int, query_string: str) -> dict:
+    digest = hashlib.sha1(f"{version}:{query_string}".encode()).hexdigest()[:20]
+    return {"ETag": f'"c-{digest}"'}
+
+
+def _stats_windows(rows: dict, days: int, weeks: int, today: date) -> tuple[list, list]:
+    """
+    per_day and per_week lists from {day: (total, important)}, as
+    django_backend/notes/stats.py read_stats() builds them
+    """
+    first_day = today - timedelta(days=days - 1)
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    per_day = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        total, important = rows.get(day, (0, 0))
+        per_day.append({"date": day.isoformat(), "total": total, "important": important})
+    per_week = []
+    for offset in range(weeks):
+        week = first_week + timedelta(weeks=offset)
+        counts = [rows.get(week + timedelta(days=i), (0, 0)) for i in range(7)]
+        per_week.append({
+            "week": week.isoformat(),
+            "total": sum(total for total, _ in counts),
+            "important": sum(important for _, important in counts),
+        })
+    return per_day, per_week
+
+
+class SqliteNoteRepository(NoteRepository):
+    """
+    Notes read and written straight from Django's SQLite database.
+    Triggers (e.g. the FTS index) still fire, with the note_body() SQL
+    function they need registered on this connection too; Django model
+    signals do not, since no Django code runs in this mode, so each write
+    appends its notes_notechange row and adjusts the note stats tables
+    itself in the same transaction.
+
+    Reads share one connection in autocommit mode. Writes go through a
+    second one, one at a time (an asyncio.Lock), each in a BEGIN IMMEDIATE
+    transaction that is rolled back if any step fails, so a failed write
+    leaves nothing behind and reads never see a write before it commits.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db = None
+        self.writer = None
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self):
+        # isolation_level=None: no implicit BEGIN, transactions are opened explicitly
+        db = await aiosqlite.connect(self.db_path, isolation_level=None)
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA busy_timeout = 5000")
+        # Same tuning as Django's connections (django_backend/database.py); WAL lets both read during writes
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.create_function("note_body", 2, _decode_body, deterministic=True)
+        return db
+
+    async def open(self) -> "SqliteNoteRepository":
+        if aiosqlite is None:
+            raise RuntimeError("NOTES_BACKEND=sqlite requires the 'aiosqlite' package (pip install aiosqlite)")
+        self.db = await self._connect()
+        self.writer = await self._connect()
+        return self
+
+    async def close(self):
+        for db in (self.db, self.writer):
+            if db is not None:
+                await db.close()
+
+    @asynccontextmanager
+    async def _transaction(self):
+        """The writer connection, inside a transaction committed on success and rolled back on any error"""
+        async with self._write_lock:
+            # IMMEDIATE takes the write lock now, waiting out Django's writers behind busy_timeout
+            await self.writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.writer
+            except BaseException:
+                await self.writer.rollback()
+                raise
+            await self.writer.commit()
+
+    @staticmethod
+    def _row_to_note(row, fields=NOTE_FIELDS) -> dict:
+        note = {}
+        for name in fields:
+            value = row[name]
+            if name == "important":
+                value = bool(value)
+            elif name in ("created_at", "updated_at"):
+                value = _to_api(_from_db(value))
+            note[name] = value
+        return note
+
+    @staticmethod
+    def _validate(data: dict, partial: bool = False) -> dict:
+        """
+        Check data as Django's NoteSerializer would and return it with the
+        text fields trimmed; raises RepositoryError(400) with DRF's errors
+        """
+        data = dict(data)
+        errors = {}
+        for field in TEXT_FIELDS:
+            if data.get(field) is None:
+                if not partial:
+                    errors[field] = ["This field is required."]
+                continue
+            data[field] = data[field].strip()
+            field_errors = _text_errors(data[field], FIELD_MAX_LENGTHS.get(field))
+            if field_errors:
+                errors[field] = field_errors
+        if errors:
+            raise RepositoryError(400, errors)
+        return data
+
+    @staticmethod
+    def _note_id(note_id) -> int:
+        try:
+            return int(note_id)
+        except (TypeError, ValueError):
+            raise NoteNotFound()
+
+    async def list_notes(self, params, headers=None):
+        limit = min(int(params.get("limit") or PAGE_SIZE), MAX_PAGE_SIZE)
+        fields = parse_fields(params.get("fields")) or LIST_FIELDS
+        field, descending = _list_ordering(params)
+        conditions, filter_args = _list_filters(params)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        # The ordering field is the pagination key, so it is read even when not returned
+        columns, source = _select(dict.fromkeys([*fields, field]))
+        sql = f"SELECT {columns} FROM {source}{where}"
+        args = list(filter_args)
+        if params.get("cursor"):
+            key, pk = _decode_cursor(params["cursor"], field)
+            op = "<" if descending else ">"
+            sql += (f'{" AND" if conditions else " WHERE"} notes_note."{field}" {op}= ? '
+                    f'AND (notes_note."{field}" {op} ? OR notes_note.id {op} ?)')
+            args += [key, key, pk]
+        direction = "DESC" if descending else "ASC"
+        sql += f' ORDER BY notes_note."{field}" {direction}, notes_note.id {direction} LIMIT ?'
+        args.append(limit + 1)
+
+        async with self.db.execute(sql, args) as cursor:
+            rows = await cursor.fetchall()
+        # Collection version as notes.conditional reads it: the last change-log seq,
+        # one primary key lookup instead of an aggregate over the filtered notes
+        async with self.db.execute("SELECT MAX(seq) FROM notes_notechange") as cursor:
+            (version,) = await cursor.fetchone()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            key = rows[-1][field]
+            next_cursor = _encode_cursor(_from_db(key) if field in DATETIME_FIELDS else key, rows[-1]["id"])
+        page = {"results": [self._row_to_note(row, fields) for row in rows], "next_cursor": next_cursor}
+        return page, _collection_validators(version or 0, urlencode(params))
+
+    async def _log_change(self, db, action: str, pk: int) -> None:
+        await db.execute(
+            "INSERT INTO notes_notechange (note_id, action, changed_at) VALUES (?, ?, ?)",
+            [pk, action, _to_db(datetime.now(timezone.utc))],
+        )
+
+    async def _count_stats(self, db, pk: int, sign: int) -> None:
+        """Add a note's row to (sign=1) or take it out of (sign=-1) the stats tables, as notes.stats does"""
+        for table, key in (("notes_notedailystats", "day"), ("notes_notestats", "id")):
+            # Django stores created_at in UTC as "YYYY-MM-DD HH:MM:SS...", so its first 10 characters are the day
+            value = "substr(created_at, 1, 10)" if key == "day" else "1"
+            await db.execute(
+                f"INSERT INTO {table} ({key}, total, important) "
+                f"SELECT {value}, ?, ? * important FROM notes_note WHERE id = ? "
+                f"ON CONFLICT ({key}) DO UPDATE SET total = {table}.total + excluded.total, "
+                f"important = {table}.important + excluded.important",
+                [sign, sign, pk],
+            )
+
+    async def _fetch(self, pk: int, db=None) -> dict:
+        columns, source = _select(NOTE_FIELDS)
+        async with (db or self.db).execute(f"SELECT {columns} FROM {source} WHERE notes_note.id = ?", [pk]) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            raise NoteNotFound()
+        return self._row_to_note(row)
+
+    async def _store_body(self, db, pk: int, text: str) -> None:
+        encoding, body = _encode_body(text)
+        await db.execute(
+            "INSERT INTO notes_notecontent (note_id, encoding, body) VALUES (?, ?, ?) "
+            "ON CONFLICT (note_id) DO UPDATE SET encoding = excluded.encoding, body = excluded.body",
+            [pk, encoding, body],
+        )
+
+    async def get_note(self, note_id, headers=None):
+        note = await self._fetch(self._note_id(note_id))
+        updated_at = datetime.fromisoformat(note["updated_at"].replace("Z", "+00:00"))
+        return note, _note_validators(note["id"], updated_at)
+
+    async def create_note(self, data):
+        data = self._validate(data)
+        now = _to_db(datetime.now(timezone.utc))
+        async with self._transaction() as db:
+            async with db.execute(
+                'INSERT INTO notes_note (title, "desc", important, created_at, updated_at) '
+                "VALUES (?, ?, ?, ?, ?) RETURNING id",
+                [data["title"], data["desc"], bool(data.get("important")), now, now],
+            ) as cursor:
+                (pk,) = await cursor.fetchone()
+            await self._store_body(db, pk, data["note"])
+            await self._count_stats(db, pk, 1)
+            await self._log_change(db, "created", pk)
+            return await self._fetch(pk, db)
+
+    async def update_note(self, note_id, data):
+        pk = self._note_id(note_id)
+        async with self._transaction() as db:
+            # Django looks the note up before validating, so a missing note is a 404 whatever the data
+            async with db.execute("SELECT 1 FROM notes_note WHERE id = ?", [pk]) as cursor:
+                if await cursor.fetchone() is None:
+                    raise NoteNotFound()
+            data = self._validate(data, partial=True)
+            fields = {k: v for k, v in data.items() if k in ("title", "desc", "important")}
+            fields["updated_at"] = _to_db(datetime.now(timezone.utc))
+            assignments = ", ".join(f'"{column}" = ?' for column in fields)
+            recount = "important" in fields
+            if recount:
+                await self._count_stats(db, pk, -1)
+            await db.execute(f"UPDATE notes_note SET {assignments} WHERE id = ?", [*fields.values(), pk])
+            if recount:
+                await self._count_stats(db, pk, 1)
+            if data.get("note") is not None:
+                await self._store_body(db, pk, data["note"])
+            await self._log_change(db, "updated", pk)
+            return await self._fetch(pk, db)
+
+    async def delete_note(self, note_id):
+        pk = self._note_id(note_id)
+        async with self._transaction() as db:
+            await self._count_stats(db, pk, -1)  # adds nothing if there is no such note
+            # The notes_note delete trigger removes the body as well
+            cursor = await db.execute("DELETE FROM notes_note WHERE id = ?", [pk])
+            if cursor.rowcount == 0:
+                raise NoteNotFound()
+            await self._log_change(db, "deleted", pk)
+
+    async def list_changes(self, since, limit=500):
+        if since is None:
+            async with self.db.execute("SELECT MAX(seq) FROM notes_notechange") as cursor:
+                (last_seq,) = await cursor.fetchone()
+            return {"changes": [], "last_seq": last_seq or 0, "has_more": False}
+
+        async with self.db.execute(
+            "SELECT seq, action, note_id, changed_at FROM notes_notechange WHERE seq > ? ORDER BY seq LIMIT ?",
+            [since, limit + 1],
+        ) as cursor:
+            rows = await cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        live_ids = list({row["note_id"] for row in rows if row["action"] != "deleted"})
+        notes = {}
+        if live_ids:
+            placeholders = ", ".join("?" * len(live_ids))
+            columns, source = _select(NOTE_FIELDS)
+            async with self.db.execute(
+                f"SELECT {columns} FROM {source} WHERE notes_note.id IN ({placeholders})", live_ids
+            ) as cursor:
+                notes = {row["id"]: self._row_to_note(row) for row in await cursor.fetchall()}
+        changes = [
+            {
+                "seq": row["seq"],
+                "action": row["action"],
+                "note_id": row["note_id"],
+                "changed_at": _to_api(_from_db(row["changed_at"])),
+                "note": notes.get(row["note_id"]),
+            }
+            for row in rows
+        ]
+        return {"changes": changes, "last_seq": changes[-1]["seq"] if changes else since, "has_more": has_more}
+
+    async def note_stats(self, days=30, weeks=12):
+        today = datetime.now(timezone.utc).date()
+        first_day = today - timedelta(days=max(days - 1, 0))
+        first_week = today - timedelta(days=today.weekday(), weeks=max(weeks - 1, 0))
+        async with self.db.execute(
+            "SELECT day, total, important FROM notes_notedailystats WHERE day >= ? AND day <= ?",
+            [min(first_day, first_week).isoformat(), today.isoformat()],
+        ) as cursor:
+            rows = {date.fromisoformat(row["day"]): (row["total"], row["important"]) for row in await cursor.fetchall()}
+        async with self.db.execute("SELECT total, important FROM notes_notestats WHERE id = 1") as cursor:
+            totals = await cursor.fetchone()
+        per_day, per_week = _stats_windows(rows, days, weeks, today)
+        return {
+            "total": totals["total"] if totals else 0,
+            "important": totals["important"] if totals else 0,
+            "per_day": per_day,
+            "per_week": per_week,
+        }
+
+
+async def create_note_repository(client: httpx.AsyncClient) -> NoteRepository:
+    """Build the repository selected by ServiceConfig.NOTES_BACKEND"""
+    if ServiceConfig.NOTES_BACKEND == "sqlite":
+        return await SqliteNoteRepository(ServiceConfig.NOTES_SQLITE_PATH).open()
+    return HttpNoteRepository(client)
+
+
+def get_note_repository(request: Request) -> NoteRepository:
+    """FastAPI dependency returning the active repository from app state"""
+    return request.app.state.note_repository
@@ -0,0 +1,242 @@
+"""
+Upstream resilience for the integration layer
+ResilientTransport wraps the shared httpx client's transport and gives
+every upstream call per-endpoint timeouts, jittered retries of calls that
+are safe to repeat, a circuit breaker that fails fast while Django is down,
+and single-flight coalescing of identical concurrent GETs.
+"""
+import asyncio
+import random
+import re
+import time
+from typing import Optional
+
+import httpx
+
+from core.metrics import REGISTRY, endpoint_label
+
+# Retried after any transient failure: repeating them changes nothing
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Retried only when the request never left: after a read timeout or a 5xx the first attempt may have applied
+IDEMPOTENT_METHODS = frozenset({"PUT", "DELETE"})
+# Failures raised before any of the request was sent
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+RETRY_STATUSES = frozenset({502, 503, 504})
+# Request headers that change the upstream response, so they are part of the coalescing key
+VARY_HEADERS = ("accept", "accept-encoding", "if-none-match", "if-modified-since")
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "upstream_circuit_state", "Upstream circuit breaker state (0 closed, 1 half-open, 2 open)")
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "upstream_retries_total", "Upstream calls retried after a transient failure", ("method", "endpoint"))
+UPSTREAM_COALESCED = REGISTRY.counter(
+    "upstream_coalesced_total", "GETs answered by an identical request already in flight", ("endpoint",))
+UPSTREAM_SHORT_CIRCUITED = REGISTRY.counter(
+    "upstream_short_circuited_total", "Upstream calls rejected while the circuit was open", ("endpoint",))
+
+
+class CircuitOpen(httpx.ConnectError):
+    """
+    Raised instead of calling an upstream whose circuit is open. It is a
+    ConnectError so callers that already handle an unreachable Django treat
+    both the same way.
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After failure_threshold failures in
+    a row the circuit opens and calls fail fast; after recovery_timeout one
+    trial call is let through (half-open) and its outcome closes or reopens it.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def record_abandoned(self) -> None:
+        """The call was cancelled before it had an outcome"""
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed (0 unless open)"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.recovery_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.set((self.CLOSED, self.HALF_OPEN, self.OPEN).index(state))
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_after": round(self.retry_after(), 1)}
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time; concurrent callers with the same key
+    await the call already in flight. The call runs as its own task, so a
+    caller that gives up does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return leader, await asyncio.shield(task)
+
+    def _done(self, key, task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport wrapper adding timeouts, retries, a circuit breaker and
+    GET coalescing around an inner transport.
+
+    timeout_rules is a list of (methods, path regex, seconds); the first rule
+    matching the request sets its read/write timeout. A request sent with
+    extensions={"single_flight": False} (e.g. a streamed export) is never
+    coalesced or buffered.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        breaker: Optional[CircuitBreaker] = None,
+        timeout_rules=(),
+        retries: int = 2,
+        backoff: float = 0.1,
+        backoff_max: float = 1.0,
+        coalesce: bool = True,
+    ):
+        self.transport = transport
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout_rules = [(methods, re.compile(pattern), seconds) for methods, pattern, seconds in timeout_rules]
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.single_flight = SingleFlight() if coalesce else None
+
+    def _apply_timeout(self, request: httpx.Request) -> None:
+        for methods, pattern, seconds in self.timeout_rules:
+            if (methods is None or request.method in methods) and pattern.fullmatch(request.url.path):
+                timeout = dict(request.extensions.get("timeout", {}))
+                timeout["read"] = timeout["write"] = seconds
+                request.extensions["timeout"] = timeout
+                return
+
+    def _delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _retryable(request: httpx.Request, error: Optional[Exception] = None, status_code: int = 0) -> bool:
+        if request.method in SAFE_METHODS:
+            return error is not None or status_code in RETRY_STATUSES
+        return request.method in IDEMPOTENT_METHODS and isinstance(error, UNSENT_ERRORS)
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        """
+        One logical call: the breaker is asked once and records one outcome,
+        however many attempts the retries take
+        """
+        endpoint = endpoint_label(request.url.path)
+        if not self.breaker.allow():
+            UPSTREAM_SHORT_CIRCUITED.inc(endpoint=endpoint)
+            raise CircuitOpen(f"Circuit open for {request.url.host}", request=request)
+        try:
+            response = await self._send_attempts(request, endpoint)
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.record_abandoned()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _send_attempts(self, request: httpx.Request, endpoint: str) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            # No more attempts once the breaker has opened on other calls' failures
+            last_attempt = attempt == self.retries or self.breaker.state == CircuitBreaker.OPEN
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                if last_attempt or not self._retryable(request, error=e):
+                    raise
+            else:
+                if last_attempt or not self._retryable(request, status_code=response.status_code):
+                    return response
+                await response.aclose()
+            UPSTREAM_RETRIES.inc(method=request.method, endpoint=endpoint)
+            await asyncio.sleep(self._delay(attempt))
+
+    async def _send_buffered(self, request: httpx.Request) -> tuple:
+        response = await self._send(request)
+        try:
+            body = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        return response.status_code, response.headers.raw, body, response.extensions
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._apply_timeout(request)
+        if self.single_flight is None or request.method != "GET" or not request.extensions.get("single_flight", True):
+            return await self._send(request)
+
+        key = (str(request.url), tuple(request.headers.get(name) for name in VARY_HEADERS))
+        leader, (status_code, headers, body, extensions) = await self.single_flight.do(
+            key, lambda: self._send_buffered(request)
+        )
+        if not leader:
+            UPSTREAM_COALESCED.inc(endpoint=endpoint_label(request.url.path))
+        # Raw (still encoded) bytes, so every caller decodes its own copy
+        return httpx.Response(status_code, headers=headers, content=body, extensions=extensions)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def get_circuit_breaker(client: httpx.AsyncClient) -> Optional[CircuitBreaker]:
+    """The breaker guarding a client built by create_http_client, if any"""
+    return getattr(getattr(client, "_transport", None), "breaker", None)
@@ -0,0 +1,124 @@
+"""
+Static assets with fingerprinted URLs and precompressed variants
+AssetFiles hashes every file under its directory at startup and also
+serves each one under a fingerprinted name (style.css -> style.1a2b3c4d.css).
+Fingerprinted URLs change whenever the content does, so they are sent with
+a one-year immutable Cache-Control; plain names stay servable with
+no-cache, revalidated through their ETag. A style.css.br / style.css.gz
+written next to a file (python -m core.static) is sent instead of the
+original to clients that accept that encoding.
+
+    python -m core.static [directory]
+"""
+import gzip
+import hashlib
+import os
+import sys
+from mimetypes import guess_type
+from typing import Optional
+
+from starlette.staticfiles import StaticFiles
+
+from core.compression import brotli, is_compressible, negotiate_encoding
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Variant file suffix per Content-Encoding, in order of preference
+VARIANTS = {"br": ".br", "gzip": ".gz"}
+PRECOMPRESS_MIN_SIZE = 500
+
+
+def fingerprinted_name(path: str, digest: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:12]}{ext}"
+
+
+def _asset_files(directory: str):
+    """Relative paths (with / separators) of the assets under directory, skipping variants"""
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith(tuple(VARIANTS.values())):
+                continue
+            full = os.path.join(root, name)
+            yield os.path.relpath(full, directory).replace(os.sep, "/"), full
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles serving fingerprinted, immutable URLs and precompressed variants"""
+
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.fingerprints = {}  # path -> fingerprinted path
+        self.originals = {}  # fingerprinted path -> path
+        self.variants = {}  # path -> encodings with an up-to-date variant on disk
+        for path, full in _asset_files(directory):
+            with open(full, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self.fingerprints[path] = fingerprinted_name(path, digest)
+            self.originals[self.fingerprints[path]] = path
+            mtime = os.stat(full).st_mtime
+            self.variants[path] = tuple(
+                encoding for encoding, suffix in VARIANTS.items()
+                if os.path.exists(full + suffix) and os.stat(full + suffix).st_mtime >= mtime
+            )
+
+    def url(self, path: str) -> str:
+        """Fingerprinted path for an asset, or the path itself if it is unknown"""
+        return self.fingerprints.get(path, path)
+
+    async def get_response(self, path: str, scope):
+        path = path.replace(os.sep, "/")
+        original = self.originals.get(path)
+        name = original or path
+        encoding = self._encoding(name, scope)
+        if encoding is None:
+            response = await super().get_response(name, scope)
+        else:
+            response = await super().get_response(name + VARIANTS[encoding], scope)
+            if response.status_code == 200:
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Content-Type"] = self._media_type(name)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE if original else REVALIDATE
+            if self.variants.get(name) or is_compressible(response.headers.get("content-type", "")):
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def _encoding(self, path: str, scope) -> Optional[str]:
+        offered = self.variants.get(path)
+        if not offered:
+            return None
+        accept = dict(scope.get("headers") or []).get(b"accept-encoding", b"").decode("latin-1")
+        return negotiate_encoding(accept, offered)
+
+    @staticmethod
+    def _media_type(path: str) -> str:
+        media_type = guess_type(path)[0] or "application/octet-stream"
+        return f"{media_type}; charset=utf-8" if media_type.startswith("text/") else media_type
+
+
+def precompress(directory: str, minimum_size: int = PRECOMPRESS_MIN_SIZE) -> list:
+    """
+    Write .gz (and, with brotli installed, .br) variants of the compressible
+    assets in directory at maximum compression; returns the files written
+    """
+    written = []
+    for path, full in _asset_files(directory):
+        if not is_compressible(guess_type(path)[0] or "") or os.path.getsize(full) < minimum_size:
+            continue
+        with open(full, "rb") as f:
+            data = f.read()
+        # mtime=0 keeps the .gz bytes reproducible between builds
+        encoded = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            encoded[".br"] = brotli.compress(data, quality=11)
+        for suffix, body in encoded.items():
+            with open(full + suffix, "wb") as f:
+                f.write(body)
+            written.append(path + suffix)
+    return written
+
+
+if __name__ == "__main__":
+    for name in precompress(sys.argv[1] if len(sys.argv) > 1 else "static"):
+        print(name)
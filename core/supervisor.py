@@ -0,0 +1,278 @@
+"""
+Preforking process supervisor for the ASGI apps
+Binds the listening socket, loads the app once in the parent (with
+preload: imports, templates, Django setup), then forks `workers` uvicorn
+servers that all accept on that socket. The workers share the parent's
+loaded modules, so each of them starts in milliseconds instead of
+re-importing everything, and copy-on-write keeps that memory shared.
+
+A worker reports ready over a pipe once its lifespan startup has finished.
+The supervisor restarts workers that die, and handles these signals:
+
+- SIGHUP: rolling reload. Each worker is replaced by a fresh one, and the
+  old one is only told to stop (finishing its in-flight requests) once its
+  replacement is ready, so the socket never stops accepting. With preload
+  the new workers run the code loaded at startup; without it they import
+  the app again and pick up code changes.
+- SIGTTIN / SIGTTOU: one worker more / fewer.
+- SIGTERM / SIGINT: graceful stop. Workers get graceful_timeout seconds to
+  finish what they are doing before they are killed.
+
+Needs os.fork (POSIX); see launcher.py for the fallback elsewhere.
+"""
+import errno
+import logging
+import os
+import select
+import signal
+import socket
+import time
+from typing import Callable, Optional
+
+import uvicorn
+
+logger = logging.getLogger("supervisor")
+
+STARTUP_FAILURE = 3  # worker exit status when the app's startup failed (as uvicorn)
+# Give up when this many workers in a row die before becoming ready: the app cannot start
+MAX_FAILED_STARTS = 5
+
+
+class ReadyServer(uvicorn.Server):
+    """uvicorn server that writes to ready_fd once startup has completed"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started and not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class Worker:
+    def __init__(self, pid: int, ready_fd: int):
+        self.pid = pid
+        self.ready_fd = ready_fd  # read end of its ready pipe, open while ready is False
+        self.ready = False  # True once started, None if its startup failed
+        self.retiring = False
+
+
+class Supervisor:
+    def __init__(self, name: str, load_app: Callable, host: str, port: int, workers: int,
+                 preload: bool = True, graceful_timeout: float = 30.0, ready_timeout: float = 60.0,
+                 **uvicorn_options):
+        self.name = name
+        self.load_app = load_app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+        self.ready_timeout = ready_timeout
+        self.uvicorn_options = uvicorn_options
+        self.app = None
+        self.socket: Optional[socket.socket] = None
+        self.children: dict = {}
+        self.failed_starts = 0
+        self._signals: list = []
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+    # Parent
+
+    def run(self) -> int:
+        self.socket = self.bind()
+        if self.preload:
+            start = time.perf_counter()
+            self.app = self.load_app()
+            logger.info("%s: app preloaded in %.2fs", self.name, time.perf_counter() - start)
+        self.install_signals()
+        logger.info("%s: listening on http://%s:%d with %d workers", self.name, self.host, self.port, self.workers)
+
+        for _ in range(self.workers):
+            self.spawn()
+        announced = False
+        try:
+            while True:
+                self.wait_for_events(1.0)
+                self.reap()
+                if self.failed_starts >= MAX_FAILED_STARTS:
+                    logger.error("%s: %d workers failed to start in a row, giving up", self.name, self.failed_starts)
+                    return 1
+                stop = False
+                for signum in self._drain_signals():
+                    if signum in (signal.SIGTERM, signal.SIGINT):
+                        stop = True
+                    elif signum == signal.SIGHUP:
+                        self.reload()
+                    elif signum == signal.SIGTTIN:
+                        self.workers += 1
+                    elif signum == signal.SIGTTOU and self.workers > 1:
+                        self.workers -= 1
+                if stop:
+                    return 0
+                self.scale()
+                if not announced and self.ready_count() >= self.workers:
+                    announced = True
+                    logger.info("%s: all %d workers ready", self.name, self.workers)
+        finally:
+            self.stop()
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.uvicorn_options.get("backlog", 2048))
+        sock.set_inheritable(True)
+        self.port = sock.getsockname()[1]  # the one picked for port 0
+        return sock
+
+    def install_signals(self) -> None:
+        os.set_blocking(self._wakeup_w, False)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum != signal.SIGCHLD:
+            self._signals.append(signum)
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _drain_signals(self) -> list:
+        signals, self._signals = self._signals, []
+        return signals
+
+    def wait_for_events(self, timeout: float) -> None:
+        """Sleep until a signal arrives, a worker reports ready or timeout passes"""
+        pending = {worker.ready_fd: worker for worker in self.children.values() if worker.ready is False}
+        try:
+            readable, _, _ = select.select([self._wakeup_r, *pending], [], [], timeout)
+        except InterruptedError:
+            return
+        for fd in readable:
+            if fd == self._wakeup_r:
+                os.read(self._wakeup_r, 4096)
+                continue
+            worker = pending[fd]
+            # Closed without a ready byte: startup failed, and reap() will collect the process
+            worker.ready = True if os.read(fd, 1) == b"1" else None
+            os.close(fd)
+            if worker.ready:
+                self.failed_starts = 0
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.children.pop(pid, None)
+            if worker is None:
+                continue
+            if worker.ready is False:
+                os.close(worker.ready_fd)
+            if not worker.ready:
+                self.failed_starts += 1
+            if not worker.retiring:
+                logger.warning("%s: worker %d exited with status %d", self.name, pid, os.waitstatus_to_exitcode(status))
+
+    def ready_count(self) -> int:
+        return sum(1 for worker in self.children.values() if worker.ready and not worker.retiring)
+
+    def scale(self) -> None:
+        """Spawn or retire workers until `workers` are running"""
+        active = [worker for worker in self.children.values() if not worker.retiring]
+        for _ in range(self.workers - len(active)):
+            self.spawn()
+        for worker in active[self.workers:]:
+            self.retire(worker)
+
+    def spawn(self) -> Worker:
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Whatever happens, the child must not return into the parent's loop
+            status = 1
+            try:
+                os.close(ready_r)
+                status = self.serve(ready_w)
+            finally:
+                os._exit(status)
+        os.close(ready_w)
+        worker = self.children[pid] = Worker(pid, ready_r)
+        return worker
+
+    def retire(self, worker: Worker) -> None:
+        worker.retiring = True
+        self.kill(worker.pid, signal.SIGTERM)
+
+    def reload(self) -> None:
+        """Replace every worker, one at a time, keeping `workers` ready throughout"""
+        logger.info("%s: reloading %d workers", self.name, len(self.children))
+        for old in [worker for worker in self.children.values() if not worker.retiring]:
+            new = self.spawn()
+            deadline = time.monotonic() + self.ready_timeout
+            while new.ready is False and new.pid in self.children and time.monotonic() < deadline:
+                self.wait_for_events(0.1)
+                self.reap()
+            if not new.ready:
+                logger.error("%s: replacement worker did not become ready; keeping the old workers", self.name)
+                if new.pid in self.children:
+                    self.retire(new)
+                return
+            self.retire(old)
+
+    def stop(self) -> None:
+        """SIGTERM every worker, wait for them up to graceful_timeout, then SIGKILL"""
+        for worker in self.children.values():
+            self.retire(worker)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.children):
+            self.kill(pid, signal.SIGKILL)
+        while self.children:
+            self.reap()
+            time.sleep(0.01)
+        self.socket.close()
+
+    @staticmethod
+    def kill(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    # Worker
+
+    def serve(self, ready_fd: int) -> int:
+        """Run one uvicorn server on the shared socket (in the forked child); returns the exit status"""
+        for signum in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        for worker in self.children.values():
+            if worker.ready is False:
+                os.close(worker.ready_fd)
+        try:
+            app = self.app if self.app is not None else self.load_app()
+            config = uvicorn.Config(
+                app, timeout_graceful_shutdown=self.graceful_timeout, **self.uvicorn_options
+            )
+            server = ReadyServer(config, ready_fd)
+            server.run(sockets=[self.socket])
+        except SystemExit as e:
+            # uvicorn exits this way when it cannot start
+            return e.code if isinstance(e.code, int) else 1
+        except Exception:
+            logger.exception("%s: worker %d failed", self.name, os.getpid())
+            return 1
+        return 0 if server.started else STARTUP_FAILURE
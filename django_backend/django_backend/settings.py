@@ -2,11 +2,20 @@
 Django settings for django_backend project.
 """
 
+import os
+import sys
 from pathlib import Path
 
+from .database import default_database, env_bool, sqlite_pragmas
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The repository root, for the framework-neutral modules both services share
+# (core.profiles, core.prometheus). Appended, so nothing there shadows a module of this project.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-your-secret-key-here'
@@ -32,6 +41,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.middleware.MetricsMiddleware',  # first, so timings cover the whole stack
+    # Compresses what every later middleware produced; skips bodies under 200 bytes
+    'django.middleware.gzip.GZipMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -42,7 +54,17 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'django_backend.urls'
+# Opt-in request profiling (notes.profiling). Disabled, its middleware and debug/ views are not installed
+PROFILING_ENABLED = env_bool('DJANGO_PROFILING_ENABLED')
+PROFILING_TOKEN = os.getenv('DJANGO_PROFILING_TOKEN', '')  # required in X-Profile-Token
+PROFILING_MAX_PROFILES = int(os.getenv('DJANGO_PROFILING_MAX_PROFILES', '20'))
+PROFILING_MAX_SECONDS = float(os.getenv('DJANGO_PROFILING_MAX_SECONDS', '60'))
+PROFILING_SAMPLE_INTERVAL = float(os.getenv('DJANGO_PROFILING_SAMPLE_INTERVAL', '0.005'))
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'notes.profiling.ProfilingMiddleware')
+
+# DJANGO_ASYNC_VIEWS=true serves note list/detail CRUD with the native async views (for ASGI)
+ROOT_URLCONF = 'django_backend.urls_async' if env_bool('DJANGO_ASYNC_VIEWS') else 'django_backend.urls'
 
 TEMPLATES = [
     {
@@ -63,20 +85,28 @@ TEMPLATES = [
 WSGI_APPLICATION = 'django_backend.wsgi.application'
 
 
-# Database
+# Database: SQLite by default, PostgreSQL when DJANGO_DATABASE_URL is set (see database.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': default_database(BASE_DIR),
 }
 
+# Applied to every new SQLite connection by notes.db
+SQLITE_PRAGMAS = sqlite_pragmas()
+
+# Note bodies of at least this many UTF-8 bytes are stored zlib-compressed (see notes.content)
+NOTE_BODY_COMPRESS_MIN_SIZE = int(os.getenv('NOTE_BODY_COMPRESS_MIN_SIZE', '1024'))
+NOTE_BODY_COMPRESS_LEVEL = int(os.getenv('NOTE_BODY_COMPRESS_LEVEL', '6'))
+
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'notes.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # CORS settings
@@ -0,0 +1,38 @@
+"""
+SQLite backend whose transactions take the write lock up front
+Django's SQLite backend opens atomic() blocks with a plain BEGIN, a
+deferred transaction: it starts as a reader and asks for the write lock at
+its first write. If another connection committed in between, SQLite cannot
+upgrade it (its snapshot is stale) and fails with "database is locked" at
+once, without waiting out the busy timeout. Every write path here reads
+before it writes inside atomic() (the bulk views' in_bulk, Note.save's row
+plus body plus stats), so under concurrent writers they failed.
+
+OPTIONS['transaction_mode'] = 'IMMEDIATE' opens them with BEGIN IMMEDIATE
+instead, which queues for the write lock behind the busy timeout like an
+autocommit write does. Same option and values as Django 5.1's own backend.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}, not {mode!r}"
+            )
+        return mode and mode.upper()
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('transaction_mode', None)  # not a sqlite3.connect() argument
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
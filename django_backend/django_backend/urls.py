@@ -1,10 +1,20 @@
 """
 URL configuration for django_backend project.
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
+from notes.health import health_view
+from notes.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('notes.urls')),
-]
\ No newline at end of file
+    path('metrics/', metrics_view, name='metrics'),
+    path('health/', health_view, name='health'),
+]
+
+if settings.PROFILING_ENABLED:
+    from notes.profiling import debug_urlpatterns
+    urlpatterns.append(path('debug/', include(debug_urlpatterns)))
@@ -0,0 +1,22 @@
+"""
+URL configuration serving the notes CRUD endpoints with the async views
+Selected with DJANGO_ASYNC_VIEWS=true; same routes and names as urls.py.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.urls import path, include
+
+from notes.health import health_view
+from notes.metrics import metrics_view
+from notes.urls import note_urlpatterns
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('api/', include(note_urlpatterns(async_crud=True))),
+    path('metrics/', metrics_view, name='metrics'),
+    path('health/', health_view, name='health'),
+]
+
+if settings.PROFILING_ENABLED:
+    from notes.profiling import debug_urlpatterns
+    urlpatterns.append(path('debug/', include(debug_urlpatterns)))
@@ -1,9 +1,54 @@
+from django import forms
 from django.contrib import admin
-from .models import Note
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from .models import Note, NoteStats
+from .search import filter_matching
+
+
+class NoteAdminForm(forms.ModelForm):
+    # Note.note is a property over NoteContent, so ModelForm does not generate a field for it
+    note = forms.CharField(widget=forms.Textarea)
+
+    class Meta:
+        model = Note
+        fields = ('title', 'desc', 'note', 'important')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.initial.setdefault('note', self.instance.note)
+
+    def save(self, commit=True):
+        self.instance.note = self.cleaned_data['note']
+        return super().save(commit)
+
+
+class NoteStatsPaginator(Paginator):
+    """Takes the unfiltered changelist's count from NoteStats instead of a COUNT(*) over every note"""
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            stats = NoteStats.objects.filter(pk=1).first()
+            if stats is not None:
+                return stats.total
+        return super().count
+
 
 @admin.register(Note)
 class NoteAdmin(admin.ModelAdmin):
+    form = NoteAdminForm
     list_display = ('title', 'desc', 'important', 'created_at')
     list_filter = ('important', 'created_at')
-    search_fields = ('title', 'desc', 'note')
-    ordering = ('-created_at',)
\ No newline at end of file
+    search_fields = ('title', 'desc')
+    ordering = ('-created_at',)
+    paginator = NoteStatsPaginator
+    # The "N total" next to a filtered count would be one more full-table COUNT(*) per page view
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the FTS index instead of icontains scans over search_fields
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return filter_matching(queryset, search_term), False
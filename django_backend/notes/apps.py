@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'notes'
\ No newline at end of file
+    name = 'notes'
+
+    def ready(self):
+        # Connect the SQLite tuning, query timing, change-log and stats receivers
+        from . import db, middleware, signals, stats  # noqa: F401
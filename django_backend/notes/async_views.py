@@ -0,0 +1,145 @@
+"""
+Native async views for the notes CRUD endpoints
+Same URLs, payloads and validators as NoteListCreateView / NoteDetailView,
+but written as async Django views on the async ORM (aget, acreate, asave,
+async iteration), so under an ASGI server a request waiting on the
+database does not hold a worker thread. DRF's APIView is sync-only, so
+these are plain Django views; NoteSerializer still does input validation
+and ORJSONRenderer the encoding. Serve them with DJANGO_ASYNC_VIEWS=true
+(see django_backend/urls_async.py).
+"""
+import json
+from io import BytesIO
+
+from django.http import Http404, HttpResponse, QueryDict
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError, UnsupportedMediaType
+
+from .conditional import (
+    acollection_version, collection_etag, not_modified_response, note_etag, set_validators,
+)
+from .filters import filter_notes, parse_ordering
+from .models import Note
+from .pagination import NoteKeysetPagination
+from .renderers import ORJSONRenderer
+from .serializers import LIST_FIELDS, NoteSerializer, NoteValuesSerializer, parse_requested_fields
+
+
+class JSONResponse(HttpResponse):
+    """JSON response keeping its payload on .data, like DRF's Response"""
+
+    def __init__(self, data, status=status.HTTP_200_OK):
+        super().__init__(ORJSONRenderer().render(data), content_type='application/json', status=status)
+        self.data = data
+
+
+def parse_body(request):
+    """Request payload as DRF would parse it: JSON, urlencoded or multipart"""
+    content_type = request.content_type or ''
+    if content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'null')
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+    if content_type == 'application/x-www-form-urlencoded':
+        return QueryDict(request.body, encoding=request.encoding)
+    if content_type == 'multipart/form-data':
+        # Django only parses multipart bodies of POST requests by itself
+        data, _ = request.parse_file_upload(request.META, BytesIO(request.body))
+        return data
+    raise UnsupportedMediaType(content_type)
+
+
+class AsyncNoteView(View):
+    """Base for the async note views: CSRF exempt and DRF-style error responses"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True  # same as DRF's APIView
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return JSONResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return JSONResponse(detail, status=exc.status_code)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return JSONResponse(
+            {'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+
+class NoteListCreateView(AsyncNoteView):
+    async def get(self, request):
+        queryset = filter_notes(Note.objects.all(), request.GET)
+        etag = collection_etag(await acollection_version(), request.META.get('QUERY_STRING', ''))
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        sort_field, _ = parse_ordering(request.GET)
+        serializer = NoteValuesSerializer(parse_requested_fields(request.GET.get('fields')) or LIST_FIELDS)
+        paginator = NoteKeysetPagination()
+        page = await paginator.apaginate_queryset(
+            queryset.values(*dict.fromkeys([*serializer.columns, sort_field])), request
+        )
+        return set_validators(JSONResponse(paginator.get_paginated_data(serializer.many(page))), etag)
+
+    async def post(self, request):
+        serializer = NoteSerializer(data=parse_body(request))
+        if not serializer.is_valid():
+            return JSONResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        note = await Note.objects.acreate(**serializer.validated_data)
+        return JSONResponse(NoteSerializer(note).data, status=status.HTTP_201_CREATED)
+
+
+class NoteDetailView(AsyncNoteView):
+    async def get_note(self, pk):
+        try:
+            # Joins the body in, since the lazy Note.note load would be a sync query
+            return await Note.objects.select_related('content').aget(pk=pk)
+        except Note.DoesNotExist:
+            raise Http404
+
+    async def get(self, request, pk):
+        # Check validators against updated_at alone before loading the full row
+        updated_at = await Note.objects.filter(pk=pk).values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            raise Http404
+        not_modified = not_modified_response(request, note_etag(pk, updated_at), updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = NoteValuesSerializer()
+        row = await Note.objects.filter(pk=pk).values(*serializer.columns).afirst()
+        if row is None:
+            raise Http404
+        response = JSONResponse(serializer.to_representation(row))
+        return set_validators(response, note_etag(row['id'], row['updated_at']), row['updated_at'])
+
+    async def update(self, request, pk, partial):
+        note = await self.get_note(pk)
+        serializer = NoteSerializer(note, data=parse_body(request), partial=partial)
+        if not serializer.is_valid():
+            return JSONResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        for name, value in serializer.validated_data.items():
+            setattr(note, name, value)
+        await note.asave()
+        return JSONResponse(NoteSerializer(note).data)
+
+    async def put(self, request, pk):
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk):
+        return await self.update(request, pk, partial=True)
+
+    async def delete(self, request, pk):
+        note = await self.get_note(pk)
+        await note.adelete()
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
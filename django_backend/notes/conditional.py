@@ -0,0 +1,55 @@
+"""
+HTTP validators (ETag / Last-Modified) for note reads
+A single note is versioned by (id, updated_at); a list by the collection
+version (the last NoteChange seq) plus the query that selected the page.
+Every note write appends a NoteChange in its own transaction, so the seq
+moves on any create, update or delete, and reading it is one primary key
+lookup however many notes the filters match.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import NoteChange
+
+
+def note_etag(pk, updated_at):
+    return f'"{pk}-{int(updated_at.timestamp() * 1_000_000)}"'
+
+
+def _last_change():
+    return NoteChange.objects.order_by('-seq').values_list('seq', flat=True)
+
+
+def collection_version():
+    """Return the seq of the last note write (0 before the first one)"""
+    return _last_change().first() or 0
+
+
+async def acollection_version():
+    """Async collection_version(), for the async views"""
+    return await _last_change().afirst() or 0
+
+
+def collection_etag(version, query_string=''):
+    digest = hashlib.sha1(f'{version}:{query_string}'.encode()).hexdigest()[:20]
+    return f'"c-{digest}"'
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """
+    Return a 304 response if the request's If-None-Match / If-Modified-Since
+    validators still match, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let clients keep the body but revalidate before every reuse
+    response['Cache-Control'] = 'no-cache'
+    return response
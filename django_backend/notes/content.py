@@ -0,0 +1,34 @@
+"""
+Note body encoding
+Bodies are stored in NoteContent rows, away from the small notes_note rows
+that lists and ordering scan. A body of at least
+settings.NOTE_BODY_COMPRESS_MIN_SIZE UTF-8 bytes is zlib-compressed when
+that makes it smaller; shorter ones are stored as plain UTF-8, where
+compression would not pay for its overhead. The encoding is kept per row,
+so changing the threshold only affects bodies written afterwards.
+"""
+import zlib
+
+from django.conf import settings
+
+IDENTITY = 'identity'
+ZLIB = 'zlib'
+
+
+def encode_body(text):
+    """Return (encoding, data) to store for a body"""
+    data = text.encode('utf-8')
+    if len(data) >= settings.NOTE_BODY_COMPRESS_MIN_SIZE:
+        compressed = zlib.compress(data, settings.NOTE_BODY_COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            return ZLIB, compressed
+    return IDENTITY, data
+
+
+def decode_body(encoding, data):
+    """Body text from a stored (encoding, data) pair; None when there is no content row"""
+    if data is None:
+        return None
+    if encoding == ZLIB:
+        data = zlib.decompress(data)
+    return bytes(data).decode('utf-8')
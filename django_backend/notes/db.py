@@ -0,0 +1,22 @@
+"""
+Per-connection SQLite setup
+Runs settings.SQLITE_PRAGMAS whenever Django opens a SQLite connection.
+They go through the raw sqlite3 connection, so they are not counted as
+request queries by the metrics middleware. Also registers the
+note_body(encoding, body) SQL function, which the full-text index
+triggers call to read compressed note bodies.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .content import decode_body
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+    connection.connection.create_function('note_body', 2, decode_body, deterministic=True)
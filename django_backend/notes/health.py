@@ -0,0 +1,17 @@
+"""
+Health endpoint for load balancers (/health/)
+Answers 200 while this instance can reach its database and 503 otherwise.
+It runs a trivial query rather than touching the notes table, so probing
+every instance every few seconds costs next to nothing.
+"""
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+
+
+def health_view(request):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return JsonResponse({'status': 'unavailable'}, status=503)
+    return JsonResponse({'status': 'ok'})
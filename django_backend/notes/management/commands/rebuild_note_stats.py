@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from notes.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the note statistics tables (NoteStats, NoteDailyStats) from the notes table. '
+        'Writes keep them current; run this after loading notes some other way, such as raw SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to rebuild the stats of')
+
+    def handle(self, *args, **options):
+        stats = rebuild(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt note stats: {stats.total} notes, {stats.important} important'))
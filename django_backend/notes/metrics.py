@@ -0,0 +1,33 @@
+"""
+Prometheus-style metrics for the Django API
+Counters and histograms are kept per process and rendered in the text
+exposition format by metrics_view (/metrics/). With several worker
+processes each one reports its own values. The metric types and the
+rendering are core.prometheus, shared with the FastAPI layer.
+"""
+from django.http import HttpResponse
+
+from core.prometheus import Registry
+
+# Finer than core.prometheus's default at the low end: most Django requests take milliseconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    'django_requests_total', 'Requests handled by the Django API', ('method', 'route', 'status'))
+REQUEST_LATENCY = REGISTRY.histogram(
+    'django_request_duration_seconds', 'Time spent in Django per request', ('method', 'route'),
+    buckets=DEFAULT_BUCKETS)
+IN_FLIGHT = REGISTRY.gauge(
+    'django_requests_in_flight', 'Requests currently being handled (the route is not resolved yet)', ('method',))
+DB_QUERIES = REGISTRY.histogram(
+    'django_db_queries_per_request', 'SQL queries executed per request', ('method', 'route'),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100))
+DB_LATENCY = REGISTRY.histogram(
+    'django_db_duration_seconds', 'Time spent in SQL per request', ('method', 'route'), buckets=DEFAULT_BUCKETS)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
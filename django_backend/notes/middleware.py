@@ -0,0 +1,116 @@
+"""
+Request instrumentation for the Django API
+Times every request, counts its SQL queries and their duration, records
+them in notes.metrics and reports them to the caller in a Server-Timing
+header (db and app durations in milliseconds), so the FastAPI layer can
+split its upstream latency into Django time, SQL time and the hop itself.
+The X-Request-ID trace id sent by FastAPI is echoed back.
+
+Queries are timed by an execute wrapper installed on every connection,
+which reports to the timer of the current request through a ContextVar:
+async views run their queries in sync_to_async threads with their own
+connections, and the context follows them there.
+"""
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+
+TRACE_HEADER = 'X-Request-ID'
+_VALID_TRACE_ID = re.compile(r'[A-Za-z0-9._-]{1,128}')
+
+
+class QueryTimer:
+    """connection.execute_wrapper hook accumulating query count and time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+_query_timer = ContextVar('query_timer', default=None)
+
+
+def timed_execute(execute, sql, params, many, context):
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    connection.execute_wrappers.append(timed_execute)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token = self.start(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(request, token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timer, token = self.start(request)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(request, token)
+        return self.finish(request, response, timer, time.perf_counter() - start)
+
+    def start(self, request):
+        trace_id = request.headers.get(TRACE_HEADER, '')
+        if not _VALID_TRACE_ID.fullmatch(trace_id):
+            trace_id = uuid.uuid4().hex
+        request.trace_id = trace_id
+        metrics.IN_FLIGHT.inc(method=request.method)
+        timer = QueryTimer()
+        return timer, _query_timer.set(timer)
+
+    def stop(self, request, token):
+        _query_timer.reset(token)
+        metrics.IN_FLIGHT.dec(method=request.method)
+
+    def finish(self, request, response, timer, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        labels = {'method': request.method, 'route': match.route if match else 'unmatched'}
+        metrics.REQUESTS.inc(status=response.status_code, **labels)
+        metrics.REQUEST_LATENCY.observe(elapsed, **labels)
+        metrics.DB_QUERIES.observe(timer.count, **labels)
+        metrics.DB_LATENCY.observe(timer.duration, **labels)
+
+        response[TRACE_HEADER] = request.trace_id
+        response['Server-Timing'] = (
+            f'db;dur={timer.duration * 1000:.3f};desc="{timer.count} queries", '
+            f'app;dur={elapsed * 1000:.3f}'
+        )
+        return response
+
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# FTS5 index over notes_note kept in sync by triggers, so every write path
+# (ORM save, bulk_create/bulk_update, queryset delete, raw SQL) is covered.
+# "desc" is an SQL keyword and has to be quoted everywhere.
+FTS_SQL = [
+    '''CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, "desc", note,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )''',
+    '''CREATE TRIGGER notes_note_fts_ai AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        VALUES (new.id, new.title, new."desc", new.note);
+    END''',
+    '''CREATE TRIGGER notes_note_fts_ad AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        VALUES ('delete', old.id, old.title, old."desc", old.note);
+    END''',
+    '''CREATE TRIGGER notes_note_fts_au AFTER UPDATE OF title, "desc", note ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        VALUES ('delete', old.id, old.title, old."desc", old.note);
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        VALUES (new.id, new.title, new."desc", new.note);
+    END''',
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS notes_note_fts_au',
+    'DROP TRIGGER IF EXISTS notes_note_fts_ad',
+    'DROP TRIGGER IF EXISTS notes_note_fts_ai',
+    'DROP TABLE IF EXISTS notes_note_fts',
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in FTS_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
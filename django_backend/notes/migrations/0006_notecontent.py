@@ -0,0 +1,144 @@
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from notes.content import decode_body, encode_body
+
+OLD_FTS = import_module('notes.migrations.0003_note_fts')
+
+BATCH_SIZE = 1000
+
+# Bodies now live in notes_notecontent, compressed, so the FTS5 index can no
+# longer read them from notes_note: it becomes contentless (it stores only
+# the index) and triggers on both tables feed it, decoding bodies with the
+# note_body() SQL function registered by notes.db. A contentless table can
+# only delete a row given the exact values it indexed, so the invariant is:
+# a note's row holds (title, desc, its body or '' while it has none).
+FTS_BODY = '''coalesce((SELECT note_body(encoding, body) FROM notes_notecontent WHERE note_id = {id}), '')'''
+
+FTS_SQL = [
+    '''CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, "desc", note,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    )''',
+    f'''CREATE TRIGGER notes_note_fts_ai AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        VALUES (new.id, new.title, new."desc", {FTS_BODY.format(id='new.id')});
+    END''',
+    # Also drops the body, so deletes that bypass the ORM's cascade leave no orphans
+    f'''CREATE TRIGGER notes_note_fts_ad AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        VALUES ('delete', old.id, old.title, old."desc", {FTS_BODY.format(id='old.id')});
+        DELETE FROM notes_notecontent WHERE note_id = old.id;
+    END''',
+    f'''CREATE TRIGGER notes_note_fts_au AFTER UPDATE OF title, "desc" ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        VALUES ('delete', old.id, old.title, old."desc", {FTS_BODY.format(id='old.id')});
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        VALUES (new.id, new.title, new."desc", {FTS_BODY.format(id='new.id')});
+    END''',
+    '''CREATE TRIGGER notes_notecontent_fts_ai AFTER INSERT ON notes_notecontent BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        SELECT 'delete', id, title, "desc", '' FROM notes_note WHERE id = new.note_id;
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        SELECT id, title, "desc", note_body(new.encoding, new.body) FROM notes_note WHERE id = new.note_id;
+    END''',
+    '''CREATE TRIGGER notes_notecontent_fts_ad AFTER DELETE ON notes_notecontent BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        SELECT 'delete', id, title, "desc", note_body(old.encoding, old.body) FROM notes_note WHERE id = old.note_id;
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        SELECT id, title, "desc", '' FROM notes_note WHERE id = old.note_id;
+    END''',
+    '''CREATE TRIGGER notes_notecontent_fts_au AFTER UPDATE ON notes_notecontent BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, "desc", note)
+        SELECT 'delete', id, title, "desc", note_body(old.encoding, old.body) FROM notes_note WHERE id = old.note_id;
+        INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        SELECT id, title, "desc", note_body(new.encoding, new.body) FROM notes_note WHERE id = new.note_id;
+    END''',
+    '''INSERT INTO notes_note_fts(rowid, title, "desc", note)
+        SELECT n.id, n.title, n."desc", coalesce(note_body(c.encoding, c.body), '')
+        FROM notes_note n LEFT JOIN notes_notecontent c ON c.note_id = n.id''',
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS notes_notecontent_fts_au',
+    'DROP TRIGGER IF EXISTS notes_notecontent_fts_ad',
+    'DROP TRIGGER IF EXISTS notes_notecontent_fts_ai',
+    *OLD_FTS.DROP_SQL,
+]
+
+
+def move_bodies(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    NoteContent = apps.get_model('notes', 'NoteContent')
+    rows = Note.objects.order_by('id').values_list('id', 'note').iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for pk, text in rows:
+        encoding, body = encode_body(text)
+        batch.append(NoteContent(note_id=pk, encoding=encoding, body=body))
+        if len(batch) >= BATCH_SIZE:
+            NoteContent.objects.bulk_create(batch)
+            batch = []
+    NoteContent.objects.bulk_create(batch)
+
+
+def restore_bodies(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    NoteContent = apps.get_model('notes', 'NoteContent')
+    for content in NoteContent.objects.iterator(chunk_size=BATCH_SIZE):
+        Note.objects.filter(pk=content.note_id).update(note=decode_body(content.encoding, content.body))
+
+
+def drop_old_fts(apps, schema_editor):
+    OLD_FTS.drop_fts(apps, schema_editor)
+
+
+def create_old_fts(apps, schema_editor):
+    OLD_FTS.create_fts(apps, schema_editor)
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in FTS_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteContent',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content', serialize=False, to='notes.note')),
+                ('encoding', models.CharField(choices=[('identity', 'Identity'), ('zlib', 'Zlib')], default='identity', max_length=8)),
+                ('body', models.BinaryField()),
+            ],
+        ),
+        migrations.RunPython(move_bodies, restore_bodies),
+        migrations.RunPython(drop_old_fts, create_old_fts),
+        # A default lets the column be added back with existing rows when migrating backwards
+        migrations.AlterField(
+            model_name='note',
+            name='note',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='note',
+            name='note',
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:33
+
+from datetime import timezone
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def count_notes(apps, schema_editor):
+    # Same aggregate as notes.stats.rebuild(), on the historical models
+    Note = apps.get_model('notes', 'Note')
+    NoteDailyStats = apps.get_model('notes', 'NoteDailyStats')
+    NoteStats = apps.get_model('notes', 'NoteStats')
+    days = (
+        Note.objects.annotate(day=TruncDate('created_at', tzinfo=timezone.utc))
+        .values('day')
+        .annotate(total=Count('id'), important=Count('id', filter=Q(important=True)))
+        .order_by()
+    )
+    rows = [NoteDailyStats(**row) for row in days]
+    NoteDailyStats.objects.bulk_create(rows, batch_size=1000)
+    NoteStats.objects.create(
+        pk=1, total=sum(row.total for row in rows), important=sum(row.important for row in rows)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_notecontent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteDailyStats',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('total', models.BigIntegerField(default=0)),
+                ('important', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NoteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.BigIntegerField(default=0)),
+                ('important', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_notes, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,157 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from datetime import datetime
 
+from .content import IDENTITY, ZLIB, decode_body, encode_body
+
 class Note(models.Model):
+    """
+    A note. The body (`note`) is not a column here but a property backed by
+    the note's NoteContent row: it is loaded on first access (use
+    select_related('content') to join it in) and written by save().
+    Code that bypasses save(), such as bulk_create / bulk_update, stores
+    bodies with NoteContent.build() itself.
+    """
     title = models.CharField(max_length=200)
     desc = models.CharField(max_length=500)
-    note = models.TextField()
     important = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=datetime.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    _body_changed = False
+
     def __str__(self):
         return self.title
 
+    @property
+    def note(self):
+        if not hasattr(self, '_body'):
+            try:
+                self._body = self.content.text
+            except NoteContent.DoesNotExist:
+                self._body = ''
+        return self._body
+
+    @note.setter
+    def note(self, value):
+        self._body = value
+        self._body_changed = True
+
+    def save(self, *args, **kwargs):
+        # The row, its body and the stats/change-log rows the signals write commit together.
+        # On SQLite this is a BEGIN IMMEDIATE transaction (django_backend.sqlite3): a deferred
+        # one would read first and fail with "database is locked" under concurrent writers.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if self._body_changed:
+                content = NoteContent.build(self.pk, self._body)
+                content.save(using=kwargs.get('using'))
+                self.content = content
+                self._body_changed = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # How the stats tables count this row, for notes.stats to diff a later save against
+        if 'created_at' in field_names and 'important' in field_names:
+            instance._stats_key = (instance.created_at, instance.important)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self.__dict__.pop('_body', None)
+            self._body_changed = False
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        # One (sort key, id) index per list ordering, so every page is an index range scan
+        indexes = [
+            # Default ordering; also serves created_at range filters
+            models.Index(fields=['-created_at', '-id'], name='note_created_id_idx'),
+            # ?ordering=updated_at and updated_at range filters
+            models.Index(fields=['-updated_at', '-id'], name='note_updated_id_idx'),
+            models.Index(fields=['title', 'id'], name='note_title_id_idx'),
+            # ?important= with the default ordering
+            models.Index(fields=['important', '-created_at', '-id'], name='note_important_created_idx'),
+        ]
+
+
+class NoteChange(models.Model):
+    """
+    Append-only log of note writes, read by the change feed. seq comes from
+    an AUTOINCREMENT key, so it only grows and is never reused.
+    """
+    class Action(models.TextChoices):
+        CREATED = 'created'
+        UPDATED = 'updated'
+        DELETED = 'deleted'
+
+    seq = models.BigAutoField(primary_key=True)
+    note_id = models.BigIntegerField()  # not a ForeignKey: the log outlives deleted notes
+    action = models.CharField(max_length=7, choices=Action.choices)
+    changed_at = models.DateTimeField(default=timezone.now)
+
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['seq']
+
+    def __str__(self):
+        return f'{self.seq} {self.action} {self.note_id}'
+
+
+class NoteContent(models.Model):
+    """
+    A note's body, stored apart from notes_note so that list queries never
+    read it, and compressed when large (see notes.content). On SQLite the
+    note_body(encoding, body) SQL function decodes it; triggers use it to
+    keep the full-text index in sync (migration 0006).
+    """
+    class Encoding(models.TextChoices):
+        IDENTITY = IDENTITY
+        ZLIB = ZLIB
+
+    note = models.OneToOneField(Note, on_delete=models.CASCADE, primary_key=True, related_name='content')
+    encoding = models.CharField(max_length=8, choices=Encoding.choices, default=Encoding.IDENTITY)
+    body = models.BinaryField()
+
+    def __str__(self):
+        return f'{self.note_id} ({self.encoding}, {len(self.body)} bytes)'
+
+    @classmethod
+    def build(cls, note_id, text):
+        encoding, body = encode_body(text)
+        return cls(note_id=note_id, encoding=encoding, body=body)
+
+    @property
+    def text(self):
+        return decode_body(self.encoding, self.body)
+
+
+class NoteStats(models.Model):
+    """
+    Running totals over every note, in a single row (pk=1). Kept current by
+    notes.stats in the transaction of each note write; rebuilt from scratch
+    by `manage.py rebuild_note_stats`.
+    """
+    total = models.BigIntegerField(default=0)
+    important = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.total} notes, {self.important} important'
+
+
+class NoteDailyStats(models.Model):
+    """
+    Notes per UTC day of created_at: how many of the notes created that day
+    still exist, and how many of those are important. Maintained with
+    NoteStats.
+    """
+    day = models.DateField(primary_key=True)
+    total = models.BigIntegerField(default=0)
+    important = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+
+    def __str__(self):
+        return f'{self.day}: {self.total} notes, {self.important} important'
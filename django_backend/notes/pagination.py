@@ -0,0 +1,131 @@
+"""
+Keyset pagination for the notes list
+Pages are addressed by the (sort key, id) of the last row seen, so every
+page is an index range scan instead of an OFFSET over the whole table.
+The sort key is the ?ordering= field (created_at by default).
+"""
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .filters import parse_ordering
+
+DATETIME_KEYS = ('created_at', 'updated_at')
+
+
+def encode_cursor(key, pk):
+    """Encode a (sort key, id) position as an opaque URL-safe token"""
+    if hasattr(key, 'isoformat'):
+        key = key.isoformat()
+    raw = f"{key}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, field='created_at'):
+    """Decode a cursor token back into (sort key, id), or None if invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key, pk = base64.urlsafe_b64decode(padded).decode().rsplit('|', 1)
+        if field in DATETIME_KEYS:
+            key = parse_datetime(key)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if key is None:
+        return None
+    return key, pk
+
+
+def seek(queryset, position, field='created_at', descending=True):
+    """Restrict a queryset ordered on (field, id) to rows after position"""
+    key, pk = position
+    if descending:
+        return queryset.filter(Q(**{f'{field}__lte': key}), Q(**{f'{field}__lt': key}) | Q(id__lt=pk))
+    return queryset.filter(Q(**{f'{field}__gte': key}), Q(**{f'{field}__gt': key}) | Q(id__gt=pk))
+
+
+class NoteKeysetPagination(BasePagination):
+    """Cursor pagination on (ordering field, id); newest first by default"""
+    page_size = 50
+    max_page_size = 500
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.GET[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if limit <= 0:
+            return self.page_size
+        return min(limit, self.max_page_size)
+
+    def page_queryset(self, queryset, request):
+        """
+        The requested page of queryset, plus one extra row to know whether a
+        next page exists. Works with DRF and plain Django requests (request.GET).
+        """
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.field, descending = parse_ordering(request.GET)
+
+        sign = '-' if descending else ''
+        queryset = queryset.order_by(f'{sign}{self.field}', f'{sign}id')
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            position = decode_cursor(cursor, self.field)
+            if position is None:
+                raise NotFound('Invalid cursor')
+            queryset = seek(queryset, position, self.field, descending)
+        return queryset[:self.limit + 1]
+
+    def set_page(self, rows):
+        """Trim the extra row fetched by page_queryset() and record the next cursor"""
+        has_next = len(rows) > self.limit
+        page = rows[:self.limit]
+        self.next_cursor = encode_cursor(*self.position(page[-1])) if has_next else None
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def position(self, row):
+        """(sort key, id) of a model instance or a values() row"""
+        if isinstance(row, dict):
+            return row[self.field], row['id']
+        return getattr(row, self.field), row.pk
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
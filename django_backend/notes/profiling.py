@@ -0,0 +1,212 @@
+"""
+On-demand profiling for the Django API
+Off unless DJANGO_PROFILING_ENABLED is set: settings then put
+ProfilingMiddleware first in MIDDLEWARE and the urlconfs add the debug/
+views below. Disabled, neither is installed, so requests pay nothing for
+it. Every use needs the X-Profile-Token header to match
+settings.PROFILING_TOKEN.
+
+- One request: `X-Profile: cprofile` (or `?_profile=cprofile`) runs it
+  under cProfile, `sample` under the stack sampler. The response carries an
+  X-Profile-ID header; the last settings.PROFILING_MAX_PROFILES profiles
+  are kept in this process and downloaded from debug/profiles/<id>/.
+- The whole process: POST debug/profile/?seconds=N samples every thread's
+  stack for N seconds and returns it.
+
+cProfile results download as .pstats (python -m pstats, snakeviz) or text,
+sampled results as collapsed stacks (flamegraph.pl, speedscope). cProfile
+only sees the thread the request runs on, so the queries of an async view,
+which run in sync_to_async threads, show up in sampled profiles only.
+Same flags and formats as the FastAPI layer's core.profiling; the sampler
+and the store are the ones it uses too, from core.profiles.
+"""
+import cProfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, JsonResponse
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from core.profiles import ProfileRecord, ProfileStore, StackSampler, token_matches
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = '_profile'
+TOKEN_HEADER = 'X-Profile-Token'
+MODES = ('cprofile', 'sample')
+
+
+store = ProfileStore(settings.PROFILING_MAX_PROFILES)
+
+
+def valid_token(request):
+    return token_matches(request.headers.get(TOKEN_HEADER, ''), settings.PROFILING_TOKEN)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request sent with a profiling flag and a valid token. A
+    flagged request without a valid token is served normally; so is one
+    arriving while another is being profiled (with `X-Profile: busy`): one
+    at a time keeps overlapping async requests, which share a thread, from
+    fighting over cProfile's hook.
+    """
+    sync_capable = True
+    async_capable = True
+
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_TOKEN:
+            raise ImproperlyConfigured('DJANGO_PROFILING_ENABLED requires DJANGO_PROFILING_TOKEN')
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            return self.busy(self.get_response(request))
+        try:
+            record, profiler = self.start(request, mode)
+            try:
+                response = self.get_response(request)
+            finally:
+                self.stop(record, profiler)
+        finally:
+            self._lock.release()
+        response['X-Profile-ID'] = record.id
+        return response
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return await self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            return self.busy(await self.get_response(request))
+        try:
+            record, profiler = self.start(request, mode)
+            try:
+                response = await self.get_response(request)
+            finally:
+                self.stop(record, profiler)
+        finally:
+            self._lock.release()
+        response['X-Profile-ID'] = record.id
+        return response
+
+    @staticmethod
+    def requested_mode(request):
+        """The profiler a request asks for, if it carries a valid token"""
+        mode = (request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM, '')).lower()
+        if mode not in MODES or not valid_token(request):
+            return None
+        return mode
+
+    @staticmethod
+    def busy(response):
+        response[PROFILE_HEADER] = 'busy'
+        return response
+
+    def start(self, request, mode):
+        record = ProfileRecord(mode, f'{request.method} {request.path}')
+        store.add(record)
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL, threading.get_ident())
+            profiler.start()
+        record.clock = time.perf_counter()
+        return record, profiler
+
+    def stop(self, record, profiler):
+        if record.kind == 'cprofile':
+            profiler.disable()
+            record.profile = profiler
+        else:
+            profiler.stop()
+            record.stacks, record.samples = profiler.collapsed(), profiler.samples
+        record.duration = time.perf_counter() - record.clock
+
+
+def token_required(view):
+    def guarded(request, *args, **kwargs):
+        if not valid_token(request):
+            return JsonResponse({'detail': 'Profiling token required'}, status=403)
+        return view(request, *args, **kwargs)
+    return guarded
+
+
+def download(record, fmt=None):
+    try:
+        body, content_type, filename = record.render(fmt)
+    except ValueError as e:
+        return JsonResponse({'detail': str(e)}, status=400)
+    response = HttpResponse(body, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Profile-ID'] = record.id
+    return response
+
+
+@require_GET
+@token_required
+def profile_list_view(request):
+    """Profiles kept by this process, most recent first"""
+    return JsonResponse({'profiles': store.list()})
+
+
+@require_GET
+@token_required
+def profile_download_view(request, profile_id):
+    """Download a profile; ?format=pstats|text for cProfile ones, collapsed for sampled ones"""
+    record = store.get(profile_id)
+    if record is None:
+        return JsonResponse({'detail': 'Profile not found'}, status=404)
+    if record.duration is None:
+        return JsonResponse({'detail': 'Profile still being captured'}, status=409)
+    return download(record, request.GET.get('format'))
+
+
+@csrf_exempt
+@require_POST
+@token_required
+def process_profile_view(request):
+    """Sample every thread of this process for ?seconds= and return the collapsed stacks"""
+    try:
+        seconds = float(request.GET.get('seconds', 5))
+        interval = float(request.GET.get('interval', settings.PROFILING_SAMPLE_INTERVAL))
+    except ValueError:
+        return JsonResponse({'detail': 'seconds and interval must be numbers'}, status=400)
+    if not 0 < seconds <= settings.PROFILING_MAX_SECONDS or not 0.001 <= interval <= 1:
+        return JsonResponse(
+            {'detail': f'seconds must be in (0, {settings.PROFILING_MAX_SECONDS:g}], interval in [0.001, 1]'},
+            status=400,
+        )
+    record = ProfileRecord('sample', f'process for {seconds:g}s')
+    store.add(record)
+    sampler = StackSampler(interval, idle=request.GET.get('idle', '').lower() in ('1', 'true', 'yes'))
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        sampler.stop()
+        record.stacks, record.samples = sampler.collapsed(), sampler.samples
+        record.duration = time.perf_counter() - start
+    return download(record)
+
+
+debug_urlpatterns = [
+    path('profiles/', profile_list_view, name='profile-list'),
+    path('profiles/<str:profile_id>/', profile_download_view, name='profile-download'),
+    path('profile/', process_profile_view, name='profile-process'),
+]
@@ -0,0 +1,26 @@
+"""
+orjson renderer for the notes API
+Encodes responses several times faster than DRF's JSONRenderer and handles
+datetimes natively, which the values() read path relies on. Falls back to
+JSONRenderer when orjson is not installed.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    # UTC datetimes end in "Z", as DRF's DateTimeField renders them
+    options = orjson.OPT_UTC_Z if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        # Anything orjson cannot encode (lazy strings, Decimal, ...) goes through DRF's encoder
+        return orjson.dumps(data, default=JSONEncoder().default, option=self.options)
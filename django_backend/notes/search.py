@@ -0,0 +1,71 @@
+"""
+Full-text search over note title, desc and note
+On SQLite this uses the notes_note_fts FTS5 table kept in sync by triggers
+(see migration 0006); other databases fall back to icontains filters over
+title and desc, since bodies are stored compressed (notes.content).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+
+# bm25 column weights: title matches outrank desc, which outrank body text
+FTS_RANK = f'bm25({FTS_TABLE}, 10.0, 5.0, 1.0)'
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    Every word becomes a quoted prefix term, so user input can never be
+    parsed as FTS5 syntax; terms are ANDed together.
+    """
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _filter_icontains(queryset, text):
+    for term in re.findall(r'\w+', text):
+        queryset = queryset.filter(
+            Q(title__icontains=term) | Q(desc__icontains=term)
+        )
+    return queryset
+
+
+def search_note_ids(text, limit, offset=0):
+    """Return ids of notes matching text, best match first"""
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    if not fts_available():
+        queryset = _filter_icontains(Note.objects.all(), text)
+        return list(queryset.values_list('id', flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY {FTS_RANK} LIMIT %s OFFSET %s',
+            [match, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_matching(queryset, text):
+    """Restrict a Note queryset to rows matching text (unranked)"""
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+    if not fts_available():
+        return _filter_icontains(queryset, text)
+    return queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    )
@@ -1,7 +1,69 @@
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from .content import decode_body
 from .models import Note
 
-class NoteSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer taking an optional `fields` argument that limits the output fields"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class NoteSerializer(DynamicFieldsModelSerializer):
+    # Not a model field: Note.note reads and writes the note's NoteContent row
+    note = serializers.CharField(style={'base_template': 'textarea.html'})
+
     class Meta:
         model = Note
-        fields = ['id', 'title', 'desc', 'note', 'important', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'title', 'desc', 'note', 'important', 'created_at', 'updated_at']
+
+
+# List and search results leave the body out unless ?fields= asks for it
+LIST_FIELDS = [name for name in NoteSerializer.Meta.fields if name != 'note']
+
+
+def parse_requested_fields(value, param='fields'):
+    """Parse a ?fields= value into field names with id first, or None for the full representation"""
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(fields) - set(NoteSerializer.Meta.fields))
+    if unknown:
+        raise ValidationError({param: [f"Unknown field(s): {', '.join(unknown)}"]})
+    return list(dict.fromkeys(['id', *fields]))
+
+
+# values() columns holding a note's body, joined in from NoteContent
+BODY_COLUMNS = ('content__encoding', 'content__body')
+
+
+class NoteValuesSerializer:
+    """
+    Plain-dict serializer for note rows read with QuerySet.values(*columns).
+    Gives the same output as NoteSerializer for reads (datetimes are left to
+    the renderer), without building a DRF field tree or model instance per
+    row. The body's columns are only selected when `note` is one of the
+    fields, so other reads never join NoteContent.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = tuple(fields or NoteSerializer.Meta.fields)
+        self.columns = tuple(
+            column for name in self.fields for column in (BODY_COLUMNS if name == 'note' else (name,))
+        )
+
+    def to_representation(self, row):
+        return {
+            name: (decode_body(row['content__encoding'], row['content__body']) or '') if name == 'note' else row[name]
+            for name in self.fields
+        }
+
+    def many(self, rows):
+        if 'note' in self.fields:
+            return [self.to_representation(row) for row in rows]
+        fields = self.fields
+        return [{name: row[name] for name in fields} for row in rows]
@@ -0,0 +1,49 @@
+"""
+Change-log recording for notes
+post_save / post_delete append a NoteChange row per write. bulk_create and
+bulk_update send no signals, so the bulk endpoints call record_changes()
+themselves; batch_changes() turns the per-object signals of a queryset
+delete into a single bulk insert.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note, NoteChange
+
+_batch = ContextVar('note_change_batch', default=None)
+
+
+def record_changes(action, note_ids):
+    changes = [NoteChange(action=action, note_id=pk) for pk in note_ids]
+    batch = _batch.get()
+    if batch is not None:
+        batch.extend(changes)
+    elif changes:
+        NoteChange.objects.bulk_create(changes)
+
+
+@contextmanager
+def batch_changes():
+    """Collect changes recorded inside the block and write them with one bulk insert"""
+    batch = []
+    token = _batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _batch.reset(token)
+    NoteChange.objects.bulk_create(batch)
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:  # loaddata fixtures
+        return
+    record_changes(NoteChange.Action.CREATED if created else NoteChange.Action.UPDATED, [instance.pk])
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    record_changes(NoteChange.Action.DELETED, [instance.pk])
@@ -0,0 +1,209 @@
+"""
+Note statistics served from summary tables
+NoteStats holds the totals and NoteDailyStats the notes per day of
+created_at, so the stats endpoint reads a fixed number of rows however
+many notes there are. Every note write adjusts them in its own transaction:
+
+- post_save diffs a note against the (created_at, important) it was loaded
+  with (Note.from_db keeps them) and post_delete subtracts it;
+- bulk_create and bulk_update send no signals, so the bulk endpoints call
+  record_created() / record_updated() themselves, and batch_stats() folds
+  the per-object signals of a queryset delete into one write.
+
+The adjustments are upserts that add to the stored counts (ON CONFLICT ...
+DO UPDATE SET total = total + excluded.total), so concurrent writers never
+overwrite each other. rebuild() recomputes both tables from notes_note
+(`manage.py rebuild_note_stats`), for data written around these paths.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Note, NoteDailyStats, NoteStats
+
+MAX_DAYS = 366
+MAX_WEEKS = 104
+
+_batch = ContextVar('note_stats_batch', default=None)
+
+
+def stats_day(created_at):
+    """The UTC day a note is counted under, as the rebuild's TruncDate computes it"""
+    if timezone.is_naive(created_at):
+        # Django stores naive datetimes as in the default time zone
+        created_at = timezone.make_aware(created_at)
+    return created_at.astimezone(dt_timezone.utc).date()
+
+
+def stats_key(created_at, important):
+    return stats_day(created_at), bool(important)
+
+
+def apply_deltas(deltas, using=DEFAULT_DB_ALIAS):
+    """Add {day: [total, important]} to the daily rows and their sum to the totals"""
+    connection = connections[using]
+    rows = [
+        (connection.ops.adapt_datefield_value(day), total, important)
+        for day, (total, important) in sorted(deltas.items()) if total or important
+    ]
+    if not rows:
+        return
+    daily = connection.ops.quote_name(NoteDailyStats._meta.db_table)
+    totals = connection.ops.quote_name(NoteStats._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {daily} (day, total, important) VALUES (%s, %s, %s) '
+            f'ON CONFLICT (day) DO UPDATE SET total = {daily}.total + excluded.total, '
+            f'important = {daily}.important + excluded.important',
+            rows,
+        )
+        cursor.execute(
+            f'INSERT INTO {totals} (id, total, important) VALUES (1, %s, %s) '
+            f'ON CONFLICT (id) DO UPDATE SET total = {totals}.total + excluded.total, '
+            f'important = {totals}.important + excluded.important',
+            [sum(row[1] for row in rows), sum(row[2] for row in rows)],
+        )
+
+
+def record_stats(added=(), removed=(), using=DEFAULT_DB_ALIAS):
+    """Count the added stats keys in and the removed ones out"""
+    deltas = {}
+    for keys, sign in ((added, 1), (removed, -1)):
+        for day, important in keys:
+            delta = deltas.setdefault(day, [0, 0])
+            delta[0] += sign
+            delta[1] += sign * important
+    batch = _batch.get()
+    if batch is None:
+        apply_deltas(deltas, using)
+        return
+    for day, (total, important) in deltas.items():
+        delta = batch.setdefault(day, [0, 0])
+        delta[0] += total
+        delta[1] += important
+
+
+@contextmanager
+def batch_stats():
+    """Collect the stats changes recorded inside the block and apply them at its end"""
+    batch = {}
+    token = _batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _batch.reset(token)
+    apply_deltas(batch)
+
+
+def record_created(notes, using=DEFAULT_DB_ALIAS):
+    keys = []
+    for note in notes:
+        note._stats_key = (note.created_at, note.important)
+        keys.append(stats_key(*note._stats_key))
+    record_stats(added=keys, using=using)
+
+
+def record_updated(notes, update_fields=None, using=DEFAULT_DB_ALIAS):
+    """Count saved notes under their new day / important flag instead of the ones they were loaded with"""
+    added, removed = [], []
+    for note in notes:
+        old = note.__dict__.pop('_stats_key', None)
+        new = (note.created_at, note.important)
+        if old is not None and update_fields is not None:
+            # Fields left out of save(update_fields=...) keep their stored values
+            new = (new[0] if 'created_at' in update_fields else old[0],
+                   new[1] if 'important' in update_fields else old[1])
+        note._stats_key = new
+        if old is not None and stats_key(*old) != stats_key(*new):
+            removed.append(stats_key(*old))
+            added.append(stats_key(*new))
+    record_stats(added, removed, using)
+
+
+@receiver(pre_save, sender=Note)
+def note_loading_stats(sender, instance, using, **kwargs):
+    # A note saved by pk without having been loaded: read what the stats count for it now
+    if instance.pk is not None and '_stats_key' not in instance.__dict__:
+        row = Note.objects.using(using).filter(pk=instance.pk).values_list('created_at', 'important').first()
+        if row is not None:
+            instance._stats_key = row
+
+
+@receiver(post_save, sender=Note)
+def note_saved_stats(sender, instance, created, using, update_fields=None, **kwargs):
+    if created:
+        instance.__dict__.pop('_stats_key', None)
+        record_created([instance], using)
+    else:
+        record_updated([instance], update_fields, using)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted_stats(sender, instance, using, **kwargs):
+    old = instance.__dict__.pop('_stats_key', None) or (instance.created_at, instance.important)
+    record_stats(removed=[stats_key(*old)], using=using)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Recompute both tables from notes_note; returns the new NoteStats"""
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            # Hold writers off (readers may continue) so none lands between the count and the swap
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {connection.ops.quote_name(Note._meta.db_table)} IN SHARE MODE')
+        # Written first: on SQLite that takes the write lock before the notes are counted
+        NoteDailyStats.objects.using(using).all().delete()
+        days = (
+            Note.objects.using(using)
+            .annotate(day=TruncDate('created_at', tzinfo=dt_timezone.utc))
+            .values('day')
+            .annotate(total=Count('id'), important=Count('id', filter=Q(important=True)))
+            .order_by()
+        )
+        rows = [NoteDailyStats(**row) for row in days]
+        NoteDailyStats.objects.using(using).bulk_create(rows, batch_size=1000)
+        stats, _ = NoteStats.objects.using(using).update_or_create(pk=1, defaults={
+            'total': sum(row.total for row in rows),
+            'important': sum(row.important for row in rows),
+        })
+    return stats
+
+
+def read_stats(days=30, weeks=12, using=DEFAULT_DB_ALIAS):
+    """
+    Totals, plus notes per day for the last `days` days and per ISO week
+    (starting Monday) for the last `weeks` weeks, oldest first and
+    zero-filled, up to and including today (UTC)
+    """
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    first_day = today - timedelta(days=days - 1)
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    start = min(first_day if days else today, first_week if weeks else today)
+    rows = {
+        row.day: row for row in NoteDailyStats.objects.using(using).filter(day__gte=start, day__lte=today)
+    }
+    totals = NoteStats.objects.using(using).filter(pk=1).first() or NoteStats()
+
+    per_day = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        row = rows.get(day)
+        per_day.append({'date': day, 'total': row.total if row else 0, 'important': row.important if row else 0})
+    per_week = []
+    for offset in range(weeks):
+        week = first_week + timedelta(weeks=offset)
+        week_rows = [rows[day] for day in (week + timedelta(days=i) for i in range(7)) if day in rows]
+        per_week.append({
+            'week': week,
+            'total': sum(row.total for row in week_rows),
+            'important': sum(row.important for row in week_rows),
+        })
+    return {'total': totals.total, 'important': totals.important, 'per_day': per_day, 'per_week': per_week}
@@ -1,5 +1,33 @@
-from django.test import TestCase
-from .models import Note
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.db import DatabaseError, connection, connections
+from django.conf import settings
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+from .admin import NoteStatsPaginator
+from .models import Note, NoteChange, NoteContent, NoteDailyStats, NoteStats
+from .pagination import encode_cursor
+from .profiling import process_profile_view, profile_download_view, profile_list_view
+from .renderers import ORJSONRenderer
+from .serializers import LIST_FIELDS, NoteSerializer
+from .views import NoteExportView
 
 class NoteModelTest(TestCase):
     def setUp(self):
@@ -17,4 +45,987 @@ class NoteModelTest(TestCase):
         self.assertTrue(self.note.important)
 
     def test_note_str(self):
-        self.assertEqual(str(self.note), "Test Note")
\ No newline at end of file
+        self.assertEqual(str(self.note), "Test Note")
+
+
+class NoteKeysetPaginationTest(APITestCase):
+    def setUp(self):
+        # Several notes share a timestamp so the id tie-breaker is exercised
+        same_time = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        for i in range(5):
+            Note.objects.create(title=f"Note {i}", desc="d", note="n", created_at=same_time)
+        for i in range(5, 7):
+            Note.objects.create(title=f"Note {i}", desc="d", note="n", created_at=datetime(2025, 1, i, 12, 0, 0, tzinfo=timezone.utc))
+
+    def test_pages_cover_all_notes_in_order(self):
+        url = reverse('note-list-create')
+        seen = []
+        params = {'limit': 3}
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(note['id'] for note in response.data['results'])
+            if response.data['next_cursor'] is None:
+                self.assertIsNone(response.data['next'])
+                break
+            self.assertIn('cursor=', response.data['next'])
+            params = {'limit': 3, 'cursor': response.data['next_cursor']}
+
+        expected = list(Note.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_oversized_limit_is_clamped(self):
+        response = self.client.get(reverse('note-list-create'), {'limit': 100000})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('note-list-create'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class NoteExportTest(TestCase):
+    def setUp(self):
+        for i in range(3):
+            Note.objects.create(title=f"Note {i}", desc="d", note="line one\nline two", important=i == 0)
+
+    def export(self, **params):
+        response = self.client.get(reverse('note-export'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ["Note 0", "Note 1", "Note 2"])
+        self.assertEqual(rows[0]['note'], "line one\nline two")
+        self.assertTrue(rows[0]['important'])
+
+    def test_csv_export(self):
+        response, body = self.export(format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], NoteExportView.fields)
+        self.assertEqual(len(rows), 4)
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse('note-export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class NoteBulkTest(APITestCase):
+    def test_bulk_create_reports_each_item(self):
+        items = [{"title": f"Note {i}", "desc": "d", "note": "n"} for i in range(50)]
+        items.insert(3, {"title": "Missing fields"})
+        # One INSERT each for the batch, its bodies and its change-log rows, one
+        # upsert each for the daily and total stats, wrapped in SAVEPOINT/RELEASE
+        # inside the test transaction
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('note-bulk'), items, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 51)
+        self.assertEqual(results[3]['status'], 'error')
+        self.assertIn('desc', results[3]['errors'])
+        self.assertEqual(sum(r['status'] == 'created' for r in results), 50)
+        self.assertEqual(Note.objects.count(), 50)
+
+    def test_bulk_update(self):
+        notes = Note.objects.bulk_create([Note(title=f"Note {i}", desc="d", note="n") for i in range(3)])
+        items = [
+            {"id": notes[0].pk, "important": True},
+            {"id": notes[1].pk, "title": "Renamed"},
+            {"id": 999999, "title": "Ghost"},
+            {"title": "No id"},
+        ]
+        response = self.client.patch(reverse('note-bulk'), items, format='json')
+        self.assertEqual(response.status_code, 200)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['updated', 'updated', 'error', 'error'])
+        self.assertTrue(Note.objects.get(pk=notes[0].pk).important)
+        self.assertEqual(Note.objects.get(pk=notes[1].pk).title, "Renamed")
+        self.assertEqual(Note.objects.get(pk=notes[2].pk).title, "Note 2")
+
+    def test_bulk_delete(self):
+        notes = Note.objects.bulk_create([Note(title=f"Note {i}", desc="d", note="n") for i in range(3)])
+        ids = [notes[0].pk, notes[2].pk, 999999]
+        response = self.client.delete(reverse('note-bulk'), {"ids": ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], ['deleted', 'deleted', 'error'])
+        self.assertEqual(list(Note.objects.values_list('pk', flat=True)), [notes[1].pk])
+
+    def test_bulk_rejects_non_list(self):
+        response = self.client.post(reverse('note-bulk'), {"title": "x"}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class NoteSearchTest(APITestCase):
+    def setUp(self):
+        self.in_title = Note.objects.create(title="Quarterly budget", desc="finance", note="numbers")
+        self.in_body = Note.objects.create(title="Misc", desc="stuff", note="remember the budget review")
+        Note.objects.create(title="Groceries", desc="shopping", note="milk and eggs")
+
+    def search(self, **params):
+        response = self.client.get(reverse('note-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_results_are_ranked(self):
+        data = self.search(q="budget")
+        self.assertEqual([n['id'] for n in data['results']], [self.in_title.pk, self.in_body.pk])
+
+    def test_prefix_and_special_characters(self):
+        self.assertEqual(len(self.search(q="budg")['results']), 2)
+        self.assertEqual(len(self.search(q='(budget" *')['results']), 2)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_body.note = "nothing relevant"
+        self.in_body.save()
+        self.assertEqual([n['id'] for n in self.search(q="budget")['results']], [self.in_title.pk])
+        self.in_title.delete()
+        self.assertEqual(self.search(q="budget")['results'], [])
+        Note.objects.bulk_create([Note(title="Budget v2", desc="d", note="n")])
+        self.assertEqual(len(self.search(q="budget")['results']), 1)
+
+    def test_pagination(self):
+        first = self.search(q="budget", limit=1)
+        self.assertEqual(len(first['results']), 1)
+        self.assertIn('offset=1', first['next'])
+        second = self.search(q="budget", limit=1, offset=1)
+        self.assertEqual(second['results'][0]['id'], self.in_body.pk)
+        self.assertIsNone(second['next'])
+
+    def test_missing_query(self):
+        response = self.client.get(reverse('note-search'))
+        self.assertEqual(response.status_code, 400)
+
+
+class NoteConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.note = Note.objects.create(title="Cached", desc="d", note="n")
+        self.detail_url = reverse('note-detail', args=[self.note.pk])
+        self.list_url = reverse('note-list-create')
+
+    def test_detail_not_modified(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.note.title = "Changed"
+        self.note.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_tracks_collection(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Different page parameters get a different validator
+        self.assertNotEqual(self.client.get(self.list_url, {'limit': 1})['ETag'], etag)
+
+        other = Note.objects.create(title="Other", desc="d", note="n")
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(self.list_url)['ETag']
+        other.delete()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_needs_no_aggregate(self):
+        # The version comes from the change log, not MAX/COUNT over the filtered notes
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {'important': 'false'})
+        self.assertIn('ETag', response)
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql'] or 'MAX(' in q['sql']])
+
+    def test_missing_note(self):
+        response = self.client.get(reverse('note-detail', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_gzipped_list_still_revalidates(self):
+        Note.objects.bulk_create(Note(title=f"Note {i}", desc="d", note="n" * 50) for i in range(10))
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 11)
+        # GZipMiddleware weakens the ETag; If-None-Match compares weakly
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class NoteSparseFieldsetTest(APITestCase):
+    def setUp(self):
+        for i in range(3):
+            Note.objects.create(title=f"Note {i}", desc="d", note="long body " * 100, important=i == 0)
+        self.url = reverse('note-list-create')
+
+    def test_list_returns_only_requested_fields(self):
+        response = self.client.get(self.url, {'fields': 'title,important', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        for note in response.data['results']:
+            self.assertEqual(set(note), {'id', 'title', 'important'})
+        # Pagination still works without created_at in the output
+        response = self.client.get(self.url, {'fields': 'title', 'cursor': response.data['next_cursor']})
+        self.assertEqual([n['title'] for n in response.data['results']], ["Note 0"])
+
+    def test_only_requested_columns_are_loaded(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'fields': 'title'})
+        select = [q['sql'] for q in queries if '"notes_note"."title"' in q['sql']][0]
+        self.assertNotIn('"notes_note"."note"', select)
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get(self.url, {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+    def test_search_fields(self):
+        response = self.client.get(reverse('note-search'), {'q': 'note', 'fields': 'desc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+        self.assertEqual(set(response.data['results'][0]), {'id', 'desc'})
+
+
+class NoteFastReadPathTest(APITestCase):
+    """The values() + orjson read path must render exactly what NoteSerializer does"""
+
+    def setUp(self):
+        base = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        Note.objects.create(title="Exact second", desc="d", note="n", created_at=base)
+        Note.objects.create(title="Micro", desc="d", note="ünïcode ✓", important=True,
+                            created_at=base.replace(microsecond=123456))
+
+    def expected(self, notes, fields=None):
+        return json.loads(JSONRenderer().render(NoteSerializer(notes, many=True, fields=fields).data))
+
+    def test_list_matches_serializer(self):
+        response = self.client.get(reverse('note-list-create'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['results'], self.expected(Note.objects.all(), LIST_FIELDS))
+
+        response = self.client.get(reverse('note-list-create'), {'fields': ','.join(NoteSerializer.Meta.fields)})
+        self.assertEqual(json.loads(response.content)['results'], self.expected(Note.objects.all()))
+
+    def test_detail_matches_serializer(self):
+        note = Note.objects.get(title="Micro")
+        response = self.client.get(reverse('note-detail', args=[note.pk]))
+        self.assertEqual(json.loads(response.content), self.expected([note])[0])
+
+    def test_renderer_falls_back_for_unknown_types(self):
+        self.assertEqual(json.loads(ORJSONRenderer().render({'n': Decimal('1.5')})), {'n': 1.5})
+
+
+class NoteChangeFeedTest(APITestCase):
+    def setUp(self):
+        self.url = reverse('note-changes')
+
+    def changes_since(self, since):
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_single_writes_are_logged_in_order(self):
+        start = self.client.get(self.url).data['last_seq']
+        note = self.client.post(reverse('note-list-create'), {'title': 'a', 'desc': 'd', 'note': 'n'}).data
+        self.client.patch(reverse('note-detail', args=[note['id']]), {'title': 'b'})
+        other = Note.objects.create(title='other', desc='d', note='n')
+        self.client.delete(reverse('note-detail', args=[other.pk]))
+
+        feed = self.changes_since(start)
+        self.assertEqual(
+            [(c['action'], c['note_id']) for c in feed['changes']],
+            [('created', note['id']), ('updated', note['id']), ('created', other.pk), ('deleted', other.pk)],
+        )
+        seqs = [c['seq'] for c in feed['changes']]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(feed['last_seq'], seqs[-1])
+        # Each change carries the note's current state; deleted notes have none
+        self.assertEqual(feed['changes'][0]['note']['title'], 'b')
+        self.assertIsNone(feed['changes'][3]['note'])
+        self.assertEqual(self.changes_since(feed['last_seq'])['changes'], [])
+
+    def test_bulk_writes_are_logged(self):
+        start = self.client.get(self.url).data['last_seq']
+        created = self.client.post(reverse('note-bulk'), [
+            {'title': f'n{i}', 'desc': 'd', 'note': 'n'} for i in range(3)
+        ], format='json').data['results']
+        ids = [r['id'] for r in created]
+        self.client.patch(reverse('note-bulk'), [{'id': ids[0], 'title': 'x'}], format='json')
+        self.client.delete(reverse('note-bulk'), {'ids': ids[1:]}, format='json')
+
+        actions = [(c['action'], c['note_id']) for c in self.changes_since(start)['changes']]
+        self.assertEqual(actions[:4], [('created', pk) for pk in ids] + [('updated', ids[0])])
+        self.assertCountEqual(actions[4:], [('deleted', pk) for pk in ids[1:]])
+
+    def test_paging_and_validation(self):
+        for i in range(3):
+            Note.objects.create(title=f'n{i}', desc='d', note='n')
+        response = self.client.get(self.url, {'since': 0, 'limit': 2})
+        self.assertTrue(response.data['has_more'])
+        self.assertEqual(len(self.changes_since(response.data['last_seq'])['changes']), 1)
+        self.assertEqual(self.client.get(self.url, {'since': 'x'}).status_code, 400)
+
+
+class NoteStatsTest(APITestCase):
+    def setUp(self):
+        self.url = reverse('note-stats')
+        self.today = datetime.now(timezone.utc).date()
+
+    def stats(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assert_matches_rebuild(self):
+        """The incrementally maintained tables equal a recount from scratch"""
+        daily = {row.day: (row.total, row.important) for row in NoteDailyStats.objects.all()}
+        totals = NoteStats.objects.values_list('total', 'important').get(pk=1)
+        call_command('rebuild_note_stats', stdout=io.StringIO())
+        rebuilt = {row.day: (row.total, row.important) for row in NoteDailyStats.objects.all()}
+        self.assertEqual({day: counts for day, counts in daily.items() if counts != (0, 0)}, rebuilt)
+        self.assertEqual(totals, NoteStats.objects.values_list('total', 'important').get(pk=1))
+
+    def test_single_writes_update_the_counts(self):
+        created = self.client.post(
+            reverse('note-list-create'), {'title': 'a', 'desc': 'd', 'note': 'n', 'important': True}, format='json'
+        ).data
+        other = Note.objects.create(title='b', desc='d', note='n')
+        stats = self.stats(days=1, weeks=1)
+        self.assertEqual((stats['total'], stats['important']), (2, 1))
+        self.assertEqual(stats['per_day'], [{'date': self.today, 'total': 2, 'important': 1}])
+        self.assertEqual(stats['per_week'][0]['total'], 2)
+
+        # Moving a note to another day and flagging it moves its counts with it
+        three_days_ago = datetime.now(timezone.utc) - timedelta(days=3)
+        self.client.patch(reverse('note-detail', args=[other.pk]),
+                          {'important': True, 'created_at': three_days_ago.isoformat()}, format='json')
+        self.client.delete(reverse('note-detail', args=[created['id']]))
+        stats = self.stats(days=4)
+        self.assertEqual((stats['total'], stats['important']), (1, 1))
+        self.assertEqual([(d['total'], d['important']) for d in stats['per_day']], [(1, 1), (0, 0), (0, 0), (0, 0)])
+        self.assert_matches_rebuild()
+
+    def test_save_with_update_fields_and_unloaded_notes(self):
+        note = Note.objects.create(title='a', desc='d', note='n')
+        note.important = True
+        note.save(update_fields=['title'])  # important not saved, so not counted
+        self.assertEqual(self.stats()['important'], 0)
+        Note(pk=note.pk, title='a', desc='d', important=True, created_at=note.created_at).save()
+        self.assertEqual(self.stats()['important'], 1)
+        self.assert_matches_rebuild()
+
+    def test_bulk_writes_update_the_counts(self):
+        created = self.client.post(reverse('note-bulk'), [
+            {'title': f'n{i}', 'desc': 'd', 'note': 'n', 'important': i % 2 == 0} for i in range(5)
+        ], format='json').data['results']
+        ids = [r['id'] for r in created]
+        self.assertEqual((self.stats()['total'], self.stats()['important']), (5, 3))
+        self.client.patch(reverse('note-bulk'), [{'id': ids[1], 'important': True}], format='json')
+        self.assertEqual(self.stats()['important'], 4)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(reverse('note-bulk'), {'ids': ids[:3]}, format='json')
+        # One upsert per touched day and one for the totals, not one per deleted note
+        stats_writes = [q for q in queries.captured_queries if 'notes_note' in q['sql'] and 'stats' in q['sql']]
+        self.assertEqual(len(stats_writes), 2)
+        stats = self.stats(days=1)
+        self.assertEqual((stats['total'], stats['important']), (2, 1))
+        self.assertEqual(stats['per_day'][0]['total'], 2)
+        self.assert_matches_rebuild()
+
+    def test_reads_do_not_scan_notes(self):
+        Note.objects.bulk_create([Note(title=f'n{i}', desc='d') for i in range(50)])  # bypasses the counts
+        with CaptureQueriesContext(connection) as queries:
+            self.stats(days=30, weeks=12)
+        self.assertFalse([q for q in queries.captured_queries if 'notes_note"' in q['sql']])
+        self.assertEqual(self.stats()['total'], 0)
+        call_command('rebuild_note_stats', stdout=io.StringIO())
+        stats = self.stats(days=7, weeks=2)
+        self.assertEqual(stats['total'], 50)
+        self.assertEqual((len(stats['per_day']), len(stats['per_week'])), (7, 2))
+        self.assertEqual(stats['per_day'][-1]['date'], self.today)
+        self.assertEqual(stats['per_week'][-1]['week'], self.today - timedelta(days=self.today.weekday()))
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(self.url, {'days': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'weeks': 1000}).status_code, 400)
+        self.assertEqual(self.stats(days=0, weeks=0)['per_day'], [])
+
+    def test_admin_paginator_counts_from_stats(self):
+        Note.objects.create(title='a', desc='d', note='n', important=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(NoteStatsPaginator(Note.objects.all(), 100).count, 1)
+        self.assertEqual(NoteStatsPaginator(Note.objects.filter(important=False), 100).count, 0)
+
+
+class NoteMetricsTest(APITestCase):
+    def setUp(self):
+        self.note = Note.objects.create(title="Timed", desc="d", note="n")
+
+    def test_server_timing_and_trace_id(self):
+        response = self.client.get(reverse('note-detail', args=[self.note.pk]), HTTP_X_REQUEST_ID='abc-123')
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('app;dur=', timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    def test_invalid_trace_id_replaced(self):
+        response = self.client.get(reverse('note-list-create'), HTTP_X_REQUEST_ID='bad id\r\n')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('note-detail', args=[self.note.pk]))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE django_requests_total counter', body)
+        self.assertIn('django_requests_total{method="GET",route="api/notes/<int:pk>/",status="200"}', body)
+        self.assertIn('django_db_queries_per_request_bucket', body)
+
+    def test_health_endpoint(self):
+        response = self.client.get(reverse('health'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+
+
+@override_settings(
+    PROFILING_TOKEN='s3cret', MIDDLEWARE=['notes.profiling.ProfilingMiddleware', *settings.MIDDLEWARE],
+)
+class NoteProfilingTest(APITestCase):
+    token = {'HTTP_X_PROFILE_TOKEN': 's3cret'}
+
+    def setUp(self):
+        self.note = Note.objects.create(title="Profiled", desc="d", note="n")
+        self.url = reverse('note-detail', args=[self.note.pk])
+
+    def download(self, profile_id, **params):
+        request = RequestFactory().get('/debug/profiles/', params, **self.token)
+        return profile_download_view(request, profile_id)
+
+    def test_flag_needs_token(self):
+        for headers in ({}, {'HTTP_X_PROFILE_TOKEN': 'wrong'}):
+            response = self.client.get(self.url, HTTP_X_PROFILE='cprofile', **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile-ID', response)
+        self.assertEqual(profile_list_view(RequestFactory().get('/debug/profiles/')).status_code, 403)
+
+    def test_cprofile_request(self):
+        response = self.client.get(self.url, HTTP_X_PROFILE='cprofile', **self.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Profiled')
+        download = self.download(response['X-Profile-ID'])
+        self.assertEqual(download['Content-Type'], 'application/octet-stream')
+        with tempfile.NamedTemporaryFile(suffix='.pstats') as f:
+            f.write(download.content)
+            f.flush()
+            stats = pstats.Stats(f.name)
+        self.assertTrue(any(func[2] == 'retrieve' for func in stats.stats))
+        self.assertIn(b'cumulative', self.download(response['X-Profile-ID'], format='text').content)
+        self.assertEqual(self.download(response['X-Profile-ID'], format='collapsed').status_code, 400)
+
+    async def test_async_request(self):
+        response = await self.async_client.get(self.url, headers={'X-Profile': 'cprofile', 'X-Profile-Token': 's3cret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.download(response['X-Profile-ID']).status_code, 200)
+
+    def test_sampled_request_by_query_flag(self):
+        response = self.client.get(self.url, {'_profile': 'sample'}, **self.token)
+        profile_id = response['X-Profile-ID']
+        listed = json.loads(profile_list_view(RequestFactory().get('/debug/profiles/', **self.token)).content)
+        self.assertEqual(listed['profiles'][0]['id'], profile_id)
+        self.assertEqual(listed['profiles'][0]['kind'], 'sample')
+        self.assertEqual(self.download(profile_id)['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(self.download('missing').status_code, 404)
+
+    def test_process_profile(self):
+        busy = threading.Event()
+
+        def spin():
+            while not busy.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=spin, name='spinner')
+        worker.start()
+        try:
+            request = RequestFactory().post('/debug/profile/?seconds=0.2&interval=0.002', **self.token)
+            response = process_profile_view(request)
+        finally:
+            busy.set()
+            worker.join()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('.collapsed', response['Content-Disposition'])
+        lines = response.content.decode().splitlines()
+        spinner = [line for line in lines if line.startswith('spinner;')]
+        self.assertTrue(spinner)
+        self.assertRegex(spinner[0], r'spin \(tests\.py:\d+\) \d+$')
+        request = RequestFactory().post('/debug/profile/?seconds=3600', **self.token)
+        self.assertEqual(process_profile_view(request).status_code, 400)
+
+
+class NoteListFilterTest(APITestCase):
+    def setUp(self):
+        self.url = reverse('note-list-create')
+        for i, title in enumerate(["Cherry", "apple", "Banana", "Date", "Elder"]):
+            Note.objects.create(title=title, desc="d", note="n", important=i % 2 == 0,
+                                created_at=datetime(2024, 1, 1 + i, tzinfo=timezone.utc))
+
+    def titles(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [note['title'] for note in response.data['results']]
+
+    def test_important(self):
+        self.assertEqual(self.titles(important='true'), ["Elder", "Banana", "Cherry"])
+        self.assertEqual(self.titles(important='false'), ["Date", "apple"])
+
+    def test_created_range(self):
+        self.assertEqual(self.titles(created_after='2024-01-02', created_before='2024-01-04T00:00:00Z'),
+                         ["Banana", "apple"])
+
+    def test_updated_range(self):
+        Note.objects.filter(title="Date").update(updated_at=datetime(2030, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(self.titles(updated_after='2029-12-31'), ["Date"])
+        self.assertNotIn("Date", self.titles(updated_before='2029-12-31'))
+
+    def test_ordering_pages_through_every_note(self):
+        expected = sorted(Note.objects.values_list('title', flat=True))
+        for ordering, order in (('title', expected), ('-title', expected[::-1])):
+            seen, params = [], {'ordering': ordering, 'limit': 2}
+            while True:
+                response = self.client.get(self.url, params)
+                seen.extend(note['title'] for note in response.data['results'])
+                if response.data['next_cursor'] is None:
+                    break
+                params['cursor'] = response.data['next_cursor']
+            self.assertEqual(seen, order)
+
+    def test_ordering_by_updated_at(self):
+        Note.objects.filter(title="apple").update(updated_at=datetime(2030, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(self.titles(ordering='-updated_at')[0], "apple")
+
+    def test_invalid_parameters(self):
+        for params in ({'important': 'maybe'}, {'created_after': 'yesterday'}, {'ordering': 'note'},
+                       {'ordering': '--title'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.data)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite query plans')
+class NoteQueryPlanTest(APITestCase):
+    """The list queries behind common filter/ordering combinations must be index scans"""
+
+    def plans(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('note-list-create'), params)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append(' '.join(row[3] for row in cursor.fetchall()))
+        return plans
+
+    def assertUsesIndex(self, index, **params):
+        plans = self.plans(**params)
+        page_plan = plans[-1]  # the page SELECT; the ETag aggregate runs before it
+        self.assertIn(f'INDEX {index}', page_plan, params)
+        self.assertNotIn('TEMP B-TREE', page_plan, params)
+        for plan in plans:
+            self.assertNotRegex(plan, r'SCAN notes_note$', params)
+
+    def test_default_ordering(self):
+        self.assertUsesIndex('note_created_id_idx')
+        self.assertUsesIndex('note_created_id_idx', cursor=encode_cursor(datetime.now(timezone.utc), 1))
+
+    def test_created_range(self):
+        self.assertUsesIndex('note_created_id_idx', created_after='2024-01-01', created_before='2025-01-01')
+
+    def test_important(self):
+        self.assertUsesIndex('note_important_created_idx', important='true')
+        self.assertUsesIndex('note_important_created_idx', important='false', created_after='2024-01-01')
+
+    def test_updated_ordering_and_range(self):
+        self.assertUsesIndex('note_updated_id_idx', ordering='-updated_at')
+        self.assertUsesIndex('note_updated_id_idx', ordering='updated_at', updated_after='2024-01-01')
+
+    def test_title_ordering(self):
+        self.assertUsesIndex('note_title_id_idx', ordering='title')
+        self.assertUsesIndex('note_title_id_idx', ordering='-title', cursor=encode_cursor('M', 1))
+
+
+class NoteContentStorageTest(APITestCase):
+    """Bodies live in NoteContent, compressed when large, and list reads never touch them"""
+
+    def setUp(self):
+        self.large = Note.objects.create(title="Large", desc="d", note="zebra crossing " * 500)
+        self.small = Note.objects.create(title="Small", desc="d", note="short")
+
+    def test_large_bodies_are_compressed(self):
+        large, small = NoteContent.objects.get(pk=self.large.pk), NoteContent.objects.get(pk=self.small.pk)
+        self.assertEqual(large.encoding, NoteContent.Encoding.ZLIB)
+        self.assertLess(len(large.body), len(self.large.note) // 10)
+        self.assertEqual(small.encoding, NoteContent.Encoding.IDENTITY)
+        response = self.client.get(reverse('note-detail', args=[self.large.pk]))
+        self.assertEqual(response.data['note'], self.large.note)
+        self.assertEqual(Note.objects.get(pk=self.large.pk).note, self.large.note)
+
+    def test_list_does_not_read_bodies(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('note-list-create'))
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertNotIn('note', response.data['results'][0])
+        self.assertFalse([query for query in queries if 'notes_notecontent' in query['sql']])
+
+    def test_body_updates(self):
+        response = self.client.patch(reverse('note-detail', args=[self.large.pk]), {'note': 'giraffe'}, format='json')
+        self.assertEqual(response.data['note'], 'giraffe')
+        self.assertEqual(NoteContent.objects.get(pk=self.large.pk).encoding, NoteContent.Encoding.IDENTITY)
+
+        response = self.client.patch(
+            reverse('note-bulk'), [{'id': self.small.pk, 'note': 'okapi' * 500}, {'id': self.large.pk, 'title': 'L'}],
+            format='json'
+        )
+        self.assertEqual([r['status'] for r in response.data['results']], ['updated', 'updated'])
+        self.assertEqual(Note.objects.get(pk=self.small.pk).note, 'okapi' * 500)
+        self.assertEqual(Note.objects.get(pk=self.large.pk).note, 'giraffe')
+
+    def test_delete_removes_body(self):
+        self.client.delete(reverse('note-detail', args=[self.large.pk]))
+        self.client.delete(reverse('note-bulk'), {'ids': [self.small.pk]}, format='json')
+        self.assertFalse(NoteContent.objects.exists())
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'FTS5 triggers')
+    def test_search_index_follows_bodies(self):
+        search = lambda q: [r['id'] for r in self.client.get(reverse('note-search'), {'q': q}).data['results']]
+        self.assertEqual(search('zebra'), [self.large.pk])
+        self.client.patch(reverse('note-detail', args=[self.large.pk]), {'note': 'giraffe'}, format='json')
+        self.client.patch(reverse('note-detail', args=[self.small.pk]), {'title': 'Renamed'}, format='json')
+        self.assertEqual(search('zebra'), [])
+        self.assertEqual(search('giraffe'), [self.large.pk])
+        self.assertEqual(search('renamed short'), [self.small.pk])
+        self.client.delete(reverse('note-detail', args=[self.large.pk]))
+        self.assertEqual(search('giraffe'), [])
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO notes_note_fts(notes_note_fts, rank) VALUES ('integrity-check', 0)")
+
+
+class NoteCrudTest(APITestCase):
+    def setUp(self):
+        self.note = Note.objects.create(title="Original", desc="d", note="n")
+        self.detail_url = reverse('note-detail', args=[self.note.pk])
+
+    def test_create(self):
+        response = self.client.post(
+            reverse('note-list-create'), {'title': 't', 'desc': 'd', 'note': 'n', 'important': True}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Note.objects.get(pk=response.data['id']).important)
+        self.assertEqual(set(response.data), set(NoteSerializer.Meta.fields))
+
+    def test_create_invalid(self):
+        response = self.client.post(reverse('note-list-create'), {'title': 'x' * 201}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'title', 'desc', 'note'})
+
+    def test_put_and_patch(self):
+        response = self.client.put(self.detail_url, {'title': 'Put', 'desc': 'd2', 'note': 'n2'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['desc'], 'd2')
+        self.assertEqual(self.client.put(self.detail_url, {'title': 'Only'}, format='json').status_code, 400)
+
+        response = self.client.patch(self.detail_url, {'title': 'Patched'})  # multipart, as a browser form sends it
+        self.assertEqual(response.status_code, 200)
+        self.note.refresh_from_db()
+        self.assertEqual((self.note.title, self.note.desc), ('Patched', 'd2'))
+
+    def test_delete(self):
+        self.assertEqual(self.client.delete(self.detail_url).status_code, 204)
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertEqual(self.client.delete(self.detail_url).status_code, 404)
+
+    def test_malformed_json(self):
+        response = self.client.generic('POST', reverse('note-list-create'), '{"title":', 'application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+# The API tests again, with list/detail served by the async views (DJANGO_ASYNC_VIEWS=true)
+ASYNC_URLCONF = 'django_backend.urls_async'
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteCrudTest(NoteCrudTest):
+    async def test_concurrent_requests_on_async_client(self):
+        notes = [await Note.objects.acreate(title=f"n{i}", desc="d", note="n") for i in range(5)]
+        responses = await asyncio.gather(
+            *(self.async_client.get(reverse('note-detail', args=[note.pk])) for note in notes),
+            self.async_client.get(reverse('note-list-create')),
+        )
+        self.assertEqual([r.status_code for r in responses], [200] * 6)
+        self.assertEqual(json.loads(responses[0].content)['title'], 'n0')
+        self.assertEqual(len(json.loads(responses[-1].content)['results']), 6)
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteListFilterTest(NoteListFilterTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteKeysetPaginationTest(NoteKeysetPaginationTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteConditionalGetTest(NoteConditionalGetTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteSparseFieldsetTest(NoteSparseFieldsetTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteFastReadPathTest(NoteFastReadPathTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteContentStorageTest(NoteContentStorageTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteChangeFeedTest(NoteChangeFeedTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteMetricsTest(NoteMetricsTest):
+    pass
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncNoteStatsTest(NoteStatsTest):
+    pass
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite tuning')
+class SQLiteConcurrencyTest(SimpleTestCase):
+    """Connections opened with the project's SQLite profile on a scratch database file"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        setup = self.connect()
+        setup.connection.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, value TEXT)')
+        setup.connection.execute("INSERT INTO item (value) VALUES ('committed')")
+        setup.close()
+
+    def connect(self, timeout=None):
+        settings_dict = {**connection.settings_dict, 'NAME': self.path}
+        if timeout is not None:
+            settings_dict['OPTIONS'] = {**settings_dict['OPTIONS'], 'timeout': timeout}
+        wrapper = type(connections['default'])(settings_dict, alias='sqlite_concurrency')
+        wrapper.ensure_connection()
+        return wrapper
+
+    def read_all(self, reader):
+        with reader.cursor() as cursor:
+            cursor.execute('SELECT value FROM item')
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_pragmas_applied_on_connect(self):
+        db = self.connect()
+        self.addCleanup(db.close)
+        with db.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_reads_do_not_wait_for_writer(self):
+        writer = self.connect()
+        self.addCleanup(writer.close)
+        reader = self.connect(timeout=0.1)
+        self.addCleanup(reader.close)
+        # EXCLUSIVE is the lock a writer holds while it commits
+        writer.connection.execute('BEGIN EXCLUSIVE')
+        writer.connection.execute("INSERT INTO item (value) VALUES ('pending')")
+        start = time.perf_counter()
+        self.assertEqual(self.read_all(reader), ['committed'])
+        self.assertLess(time.perf_counter() - start, 0.1)
+        writer.connection.execute('COMMIT')
+        self.assertEqual(self.read_all(reader), ['committed', 'pending'])
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'delete'})
+    def test_rollback_journal_blocks_readers(self):
+        # The untuned default, for contrast: the same read fails once its busy timeout runs out
+        writer = self.connect()
+        self.addCleanup(writer.close)
+        reader = self.connect(timeout=0.1)
+        self.addCleanup(reader.close)
+        writer.connection.execute('BEGIN EXCLUSIVE')
+        with self.assertRaisesMessage(Exception, 'database is locked'):
+            self.read_all(reader)
+        writer.connection.execute('ROLLBACK')
+
+    def test_concurrent_writers_wait_instead_of_failing(self):
+        errors = []
+
+        def write(n):
+            db = self.connect()
+            try:
+                for i in range(25):
+                    with db.cursor() as cursor:
+                        cursor.execute('INSERT INTO item (value) VALUES (%s)', [f'{n}-{i}'])
+            except DatabaseError as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        db = self.connect()
+        self.addCleanup(db.close)
+        self.assertEqual(len(self.read_all(db)), 1 + 8 * 25)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite locking')
+class SQLiteConcurrentEndpointTest(SimpleTestCase):
+    """
+    The write endpoints hit by concurrent clients, each thread on its own
+    connection to a migrated scratch database file: the in-memory test
+    database locks differently from a real one
+    """
+    clients = 8
+    rounds = 5
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory)
+        # Connections opened from here on, one per thread, read NAME from this dict
+        settings_dict = connections.settings['default']
+        cls.addClassCleanup(settings_dict.__setitem__, 'NAME', settings_dict['NAME'])
+        settings_dict['NAME'] = os.path.join(directory, 'db.sqlite3')
+        errors = cls.run_threads(lambda n: call_command('migrate', verbosity=0), 1)
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def run_threads(target, count):
+        """Run target(n) in count threads at once; returns the exceptions they raised"""
+        errors = []
+
+        def run(n):
+            try:
+                target(n)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def counts(self):
+        """(notes, NoteStats total, change-log rows), read on a fresh connection"""
+        counts = []
+        self.run_threads(lambda n: counts.append((
+            Note.objects.count(),
+            NoteStats.objects.get(pk=1).total,
+            NoteChange.objects.count(),
+        )), 1)
+        return counts[0]
+
+    def test_single_note_writes(self):
+        statuses = []
+
+        def session(n):
+            client = APIClient()
+            for i in range(self.rounds):
+                response = client.post(reverse('note-list-create'), {'title': f'{n}-{i}', 'desc': 'd', 'note': 'n'},
+                                       format='json')
+                statuses.append(response.status_code)
+                url = reverse('note-detail', args=[response.data['id']])
+                statuses.append(client.patch(url, {'important': True}, format='json').status_code)
+                if i % 2:
+                    statuses.append(client.delete(url).status_code)
+
+        before = self.counts()
+        self.assertEqual(self.run_threads(session, self.clients), [])
+        deletes = self.clients * (self.rounds // 2)
+        self.assertEqual(sorted(set(statuses)), [200, 201, 204])
+        self.assertEqual(len(statuses), 2 * self.clients * self.rounds + deletes)
+        created = self.clients * self.rounds
+        self.assertEqual(self.counts(), (
+            before[0] + created - deletes, before[1] + created - deletes, before[2] + 2 * created + deletes,
+        ))
+
+    def test_body_writes(self):
+        # Each save writes the note row and then its NoteContent row in one transaction
+        big = 'lorem ipsum ' * 200  # stored compressed
+        statuses, ids = [], []
+
+        def session(n):
+            client = APIClient()
+            for i in range(self.rounds):
+                response = client.post(reverse('note-list-create'),
+                                       {'title': f'{n}-{i}', 'desc': 'd', 'note': f'{n}-{i} {big}'}, format='json')
+                statuses.append(response.status_code)
+                ids.append(response.data['id'])
+                statuses.append(client.patch(reverse('note-detail', args=[response.data['id']]),
+                                             {'note': f'edited {n}-{i}'}, format='json').status_code)
+
+        self.assertEqual(self.run_threads(session, self.clients), [])
+        self.assertEqual(sorted(set(statuses)), [200, 201])
+        bodies = {}
+        self.run_threads(lambda n: bodies.update(
+            (note.pk, note.note) for note in Note.objects.filter(pk__in=ids).select_related('content')
+        ), 1)
+        self.assertEqual(len(bodies), self.clients * self.rounds)
+        self.assertTrue(all(body.startswith('edited ') for body in bodies.values()))
+
+    def test_bulk_writes(self):
+        statuses = []
+
+        def session(n):
+            client = APIClient()
+            for i in range(self.rounds):
+                response = client.post(reverse('note-bulk'), [
+                    {'title': f'{n}-{i}-{j}', 'desc': 'd', 'note': 'n'} for j in range(10)
+                ], format='json')
+                statuses.append(response.status_code)
+                ids = [result['id'] for result in response.data['results']]
+                statuses.append(client.patch(
+                    reverse('note-bulk'), [{'id': pk, 'important': True} for pk in ids], format='json'
+                ).status_code)
+                statuses.append(client.delete(reverse('note-bulk'), {'ids': ids[:5]}, format='json').status_code)
+
+        before = self.counts()
+        self.assertEqual(self.run_threads(session, self.clients), [])
+        self.assertEqual(statuses, [200] * (3 * self.clients * self.rounds))
+        writes = self.clients * self.rounds
+        self.assertEqual(self.counts(), (before[0] + 5 * writes, before[1] + 5 * writes, before[2] + 25 * writes))
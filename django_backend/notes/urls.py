@@ -1,7 +1,19 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
-urlpatterns = [
-    path('notes/', views.NoteListCreateView.as_view(), name='note-list-create'),
-    path('notes/<int:pk>/', views.NoteDetailView.as_view(), name='note-detail'),
-]
\ No newline at end of file
+
+def note_urlpatterns(async_crud=False):
+    """Notes API routes; async_crud serves list/detail CRUD with the async views"""
+    crud = async_views if async_crud else views
+    return [
+        path('notes/', crud.NoteListCreateView.as_view(), name='note-list-create'),
+        path('notes/search/', views.NoteSearchView.as_view(), name='note-search'),
+        path('notes/changes/', views.NoteChangesView.as_view(), name='note-changes'),
+        path('notes/stats/', views.NoteStatsView.as_view(), name='note-stats'),
+        path('notes/bulk/', views.NoteBulkView.as_view(), name='note-bulk'),
+        path('notes/export/', views.NoteExportView.as_view(), name='note-export'),
+        path('notes/<int:pk>/', crud.NoteDetailView.as_view(), name='note-detail'),
+    ]
+
+
+urlpatterns = note_urlpatterns()
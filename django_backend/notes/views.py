@@ -1,12 +1,350 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import Note
-from .serializers import NoteSerializer
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from .conditional import (
+    collection_etag, collection_version, not_modified_response, note_etag, set_validators,
+)
+from .filters import filter_notes, parse_ordering
+from .models import Note, NoteChange, NoteContent
+from .pagination import NoteKeysetPagination
+from .search import search_note_ids
+from .serializers import LIST_FIELDS, NoteSerializer, NoteValuesSerializer, parse_requested_fields
+from .signals import batch_changes, record_changes
+from .stats import MAX_DAYS, MAX_WEEKS, batch_stats, read_stats, record_created, record_updated
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for note reads: ?fields=title,desc,important returns
+    only those fields (plus id) and loads only those columns.
+    """
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self):
+        """Requested field names with id first, or None for the full representation"""
+        if self.request.method != 'GET':
+            return None
+        value = self.request.query_params.get(self.fields_query_param)
+        return parse_requested_fields(value, self.fields_query_param)
 
-class NoteListCreateView(generics.ListCreateAPIView):
+class NoteListCreateView(SparseFieldsetMixin, generics.ListCreateAPIView):
     queryset = Note.objects.all()
     serializer_class = NoteSerializer
+    pagination_class = NoteKeysetPagination
+
+    def filter_queryset(self, queryset):
+        return filter_notes(queryset, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        # Only an ETag: a delete moves no updated_at, so Last-Modified could not detect it
+        queryset = self.filter_queryset(self.get_queryset())
+        etag = collection_etag(collection_version(), request.META.get('QUERY_STRING', ''))
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        # Read path on values() rows: no model instances or DRF fields per note.
+        # The sort field is the pagination key, so it is read even when not returned.
+        sort_field, _ = parse_ordering(request.query_params)
+        serializer = NoteValuesSerializer(self.get_requested_fields() or LIST_FIELDS)
+        page = self.paginate_queryset(queryset.values(*dict.fromkeys([*serializer.columns, sort_field])))
+        return set_validators(self.get_paginated_response(serializer.many(page)), etag)
 
 class NoteDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Note.objects.all()
-    serializer_class = NoteSerializer
\ No newline at end of file
+    queryset = Note.objects.select_related('content')
+    serializer_class = NoteSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        # Check validators against updated_at alone before loading the full row
+        updated_at = self.get_queryset().filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            raise Http404
+        not_modified = not_modified_response(request, note_etag(kwargs['pk'], updated_at), updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = NoteValuesSerializer()
+        row = self.get_queryset().filter(pk=kwargs['pk']).values(*serializer.columns).first()
+        if row is None:
+            raise Http404
+        response = Response(serializer.to_representation(row))
+        return set_validators(response, note_etag(row['id'], row['updated_at']), row['updated_at'])
+
+
+class NoteSearchView(SparseFieldsetMixin, APIView):
+    """
+    Ranked full-text search: GET /api/notes/search/?q=<text>&limit=&offset=&fields=
+    Results are ordered by relevance (bm25) and paginated by offset.
+    """
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'detail': 'Query parameter q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', self.page_size)), self.max_page_size)
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({'detail': 'limit and offset must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit <= 0 or offset < 0:
+            return Response({'detail': 'limit must be positive and offset non-negative'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Ask for one extra id to know whether another page exists
+        ids = search_note_ids(query, limit=limit + 1, offset=offset)
+        has_next = len(ids) > limit
+        ids = ids[:limit]
+        serializer = NoteValuesSerializer(self.get_requested_fields() or LIST_FIELDS)
+        notes = {row['id']: row for row in Note.objects.filter(id__in=ids).values(*serializer.columns)}
+        ranked = [notes[pk] for pk in ids if pk in notes]
+
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(request.build_absolute_uri(), 'offset', offset + limit)
+        return Response({
+            'next': next_link,
+            'results': serializer.many(ranked),
+        })
+
+
+class NoteChangesView(APIView):
+    """
+    Incremental change feed: GET /api/notes/changes/?since=<seq>&limit=
+    Returns the changes after seq, oldest first, each with the note's current
+    representation (null once deleted), plus last_seq to pass as the next
+    since. Without since only last_seq is returned, to start following from.
+    """
+    page_size = 500
+    max_page_size = 1000
+
+    def get(self, request):
+        try:
+            since = request.query_params.get('since')
+            since = None if since is None else int(since)
+            limit = min(int(request.query_params.get('limit', self.page_size)), self.max_page_size)
+        except ValueError:
+            return Response({'detail': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if (since is not None and since < 0) or limit <= 0:
+            return Response({'detail': 'since must be non-negative and limit positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since is None:
+            last_seq = NoteChange.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+            return Response({'changes': [], 'last_seq': last_seq, 'has_more': False})
+
+        changes = list(
+            NoteChange.objects.filter(seq__gt=since).values('seq', 'action', 'note_id', 'changed_at')[:limit + 1]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        serializer = NoteValuesSerializer()
+        live_ids = {change['note_id'] for change in changes if change['action'] != NoteChange.Action.DELETED}
+        notes = {row['id']: row for row in Note.objects.filter(id__in=live_ids).values(*serializer.columns)}
+        for change in changes:
+            row = notes.get(change['note_id'])
+            change['note'] = serializer.to_representation(row) if row is not None else None
+        return Response({
+            'changes': changes,
+            'last_seq': changes[-1]['seq'] if changes else since,
+            'has_more': has_more,
+        })
+
+
+class NoteStatsView(APIView):
+    """
+    Note statistics: GET /api/notes/stats/?days=30&weeks=12
+    Total and important counts, plus notes per day and per week (by
+    created_at, UTC) over the requested window. Read from the summary
+    tables notes.stats maintains, so the cost does not grow with the notes.
+    """
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+            weeks = int(request.query_params.get('weeks', 12))
+        except ValueError:
+            return Response({'detail': 'days and weeks must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= days <= MAX_DAYS or not 0 <= weeks <= MAX_WEEKS:
+            return Response(
+                {'detail': f'days must be in [0, {MAX_DAYS}] and weeks in [0, {MAX_WEEKS}]'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(read_stats(days, weeks))
+
+
+class NoteBulkView(APIView):
+    """
+    Batch create (POST), update (PATCH) and delete (DELETE) of notes.
+    Each batch is validated item by item and written in one transaction with
+    bulk_create / bulk_update / a single DELETE ... WHERE id IN (...).
+    Every item gets its own result entry, in request order.
+    """
+    max_batch_size = 10000
+    write_batch_size = 500
+
+    def get_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return None, Response({'detail': 'Expected a list of notes'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return None, Response(
+                {'detail': f'At most {self.max_batch_size} items per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return items, None
+
+    def post(self, request):
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        # One serializer validates every item, so DRF builds its fields only once
+        serializer = NoteSerializer()
+        results = [None] * len(items)
+        to_create = []
+        for index, item in enumerate(items):
+            try:
+                to_create.append((index, Note(**serializer.run_validation(item))))
+            except ValidationError as exc:
+                results[index] = {'index': index, 'status': 'error', 'errors': exc.detail}
+
+        with transaction.atomic():
+            Note.objects.bulk_create([note for _, note in to_create], batch_size=self.write_batch_size)
+            NoteContent.objects.bulk_create(
+                [NoteContent.build(note.pk, note.note) for _, note in to_create], batch_size=self.write_batch_size
+            )
+            record_changes(NoteChange.Action.CREATED, [note.pk for _, note in to_create])
+            record_created([note for _, note in to_create])
+        for index, note in to_create:
+            results[index] = {'index': index, 'status': 'created', 'id': note.pk}
+        return Response({'results': results})
+
+    def patch(self, request):
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        with transaction.atomic():
+            existing = Note.objects.select_for_update().in_bulk([pk for pk in ids if isinstance(pk, int)])
+            serializer = NoteSerializer(partial=True)
+            results = []
+            to_update = {}
+            fields = set()
+            for index, item in enumerate(items):
+                pk = item.get('id') if isinstance(item, dict) else None
+                if not isinstance(pk, int):
+                    results.append({'index': index, 'status': 'error', 'errors': {'id': ['An integer id is required.']}})
+                    continue
+                if pk not in existing:
+                    results.append({'index': index, 'status': 'error', 'id': pk, 'errors': {'id': ['Not found.']}})
+                    continue
+                if pk in to_update:
+                    results.append({'index': index, 'status': 'error', 'id': pk, 'errors': {'id': ['Duplicate id in batch.']}})
+                    continue
+                try:
+                    validated_data = serializer.run_validation(item)
+                except ValidationError as exc:
+                    results.append({'index': index, 'status': 'error', 'id': pk, 'errors': exc.detail})
+                    continue
+                note = existing[pk]
+                for field, value in validated_data.items():
+                    setattr(note, field, value)
+                    fields.add(field)
+                to_update[pk] = note
+                results.append({'index': index, 'status': 'updated', 'id': pk})
+
+            if to_update:
+                # bulk_update() bypasses save(), so auto_now and the bodies have to be applied by hand
+                now = timezone.now()
+                for note in to_update.values():
+                    note.updated_at = now
+                Note.objects.bulk_update(
+                    to_update.values(), sorted(fields - {'note'} | {'updated_at'}), batch_size=self.write_batch_size
+                )
+                if 'note' in fields:
+                    NoteContent.objects.bulk_create(
+                        [NoteContent.build(note.pk, note.note) for note in to_update.values() if note._body_changed],
+                        batch_size=self.write_batch_size,
+                        update_conflicts=True, unique_fields=['note'], update_fields=['encoding', 'body'],
+                    )
+                record_changes(NoteChange.Action.UPDATED, to_update)
+                record_updated(to_update.values(), fields)
+        return Response({'results': results})
+
+    def delete(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            return Response({'detail': 'Expected {"ids": [<int>, ...]}'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_batch_size:
+            return Response(
+                {'detail': f'At most {self.max_batch_size} items per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic(), batch_changes(), batch_stats():
+            existing = set(Note.objects.filter(id__in=ids).values_list('id', flat=True))
+            Note.objects.filter(id__in=existing).delete()
+        results = [
+            {'index': index, 'status': 'deleted', 'id': pk} if pk in existing
+            else {'index': index, 'status': 'error', 'id': pk, 'errors': {'id': ['Not found.']}}
+            for index, pk in enumerate(ids)
+        ]
+        return Response({'results': results})
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+
+class NoteExportView(View):
+    """
+    Stream every note as NDJSON (default) or CSV.
+    Rows are read with QuerySet.iterator() so memory stays flat regardless of table size.
+    """
+    chunk_size = 2000
+    fields = ['id', 'title', 'desc', 'note', 'important', 'created_at', 'updated_at']
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in self.content_types:
+            return HttpResponseBadRequest('format must be one of: ndjson, csv')
+
+        serializer = NoteValuesSerializer(self.fields)
+        rows = (
+            serializer.to_representation(row)
+            for row in Note.objects.order_by('id').values(*serializer.columns).iterator(chunk_size=self.chunk_size)
+        )
+        if export_format == 'csv':
+            content = self.stream_csv(rows)
+        else:
+            content = self.stream_ndjson(rows)
+
+        response = StreamingHttpResponse(content, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="notes.{export_format}"'
+        return response
+
+    def stream_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+    def stream_csv(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.fields)
+        for row in rows:
+            yield writer.writerow(row.values())
@@ -1,14 +1,51 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from routes.note import note
-from routes.integration import integration_router
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from routes.note import note, templates
+from routes.integration import integration_router, invalidate_changes
+from config.http_client import create_http_client
+from config.services import ServiceConfig
+from core.admission import create_admission_controller
+from core.cache import create_cache
+from core.changes import ChangeFeed
+from core.compression import CompressionMiddleware
+from core.metrics import REGISTRY, MetricsMiddleware
+from core.repository import create_note_repository
+from core.serialization import FastJSONResponse
+from core.static import AssetFiles
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    app.state.http_client = create_http_client()
+    app.state.admission = create_admission_controller()
+    app.state.cache = create_cache()
+    app.state.note_repository = await create_note_repository(app.state.http_client)
+    app.state.change_feed = ChangeFeed(
+        app.state.note_repository,
+        invalidate=partial(invalidate_changes, app.state.cache),
+        poll_interval=ServiceConfig.CHANGE_FEED_POLL_INTERVAL,
+        queue_size=ServiceConfig.CHANGE_FEED_QUEUE_SIZE,
+    )
+    try:
+        yield
+    finally:
+        await app.state.change_feed.close()
+        await app.state.note_repository.close()
+        await app.state.http_client.aclose()
+        await app.state.cache.close()
+        await app.state.admission.close()
+
 
 app = FastAPI(
     title="FastAPI Integration Layer",
     description="FastAPI service that integrates Django backend with React frontend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -18,17 +55,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Request-ID", "Retry-After"],
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=ServiceConfig.COMPRESSION_MIN_SIZE,
+    gzip_level=ServiceConfig.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=ServiceConfig.COMPRESSION_BROTLI_QUALITY,
 )
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Outermost middleware, so its timings include CORS handling and compression
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in profiling; when disabled neither the middleware nor the /debug routes exist, nor are they imported
+if ServiceConfig.PROFILING_ENABLED:
+    from core.profiling import ProfilingMiddleware, create_profile_store
+    from routes.debug import debug_router
+
+    app.state.profiles = create_profile_store()
+    app.add_middleware(ProfilingMiddleware, store=app.state.profiles)
+    app.include_router(debug_router)
+
+static_files = AssetFiles(directory="static")
+app.mount("/static", static_files, name="static")
+# Templates link assets by their fingerprinted, immutably cached URL
+templates.env.globals["static_url"] = lambda path: f"/static/{static_files.url(path)}"
+
+@lru_cache(maxsize=1)
+def demo_html() -> bytes:
+    """The demo page, read from disk once"""
+    with open("frontend_demo.html", "rb") as f:
+        return f.read()
 
 # Add a route to serve the demo HTML
 @app.get("/demo")
 async def demo_page():
     """Serve the integration demo HTML page"""
-    with open("frontend_demo.html", "r", encoding="utf-8") as f:
-        html_content = f.read()
-    return HTMLResponse(content=html_content)
+    try:
+        return HTMLResponse(content=demo_html())
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Demo page not found")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for the integration layer"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 # Include routers
 app.include_router(note)  # Original note routes (for HTML templates)
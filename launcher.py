@@ -0,0 +1,233 @@
+"""
+Start the stack: Django and the FastAPI integration layer, each under
+several uvicorn worker processes
+
+    python launcher.py                      # Django, then FastAPI once Django is healthy
+    python launcher.py all --frontend       # ... and the React dev server
+    python launcher.py django --workers 4   # one service
+    python launcher.py fastapi --production
+    python launcher.py fastapi --reload     # development: one process, restarts on code changes
+
+Each service runs under core.supervisor: the app is loaded once (modules
+imported, templates compiled, Django set up and its URLconf resolved),
+then the workers are forked from it. Send a service's supervisor SIGHUP
+for a rolling reload, SIGTTIN/SIGTTOU to add/remove a worker, and
+SIGTERM/SIGINT to stop it gracefully; `all` forwards these to both
+services.
+
+`all` waits for Django's /health/ before starting FastAPI, and for
+FastAPI's health check to see Django before it reports the stack ready.
+It stops everything if either service dies. --production skips Django's
+system checks (run them in CI or at deploy time instead) and the access
+log.
+
+Without os.fork (Windows), each service falls back to uvicorn's own
+--workers, which start every worker from scratch.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from config.services import ServiceConfig
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DJANGO_DIR = os.path.join(ROOT, "django_backend")
+
+SERVICES = {
+    # name: (import string, app dir, default port, health path, lifespan)
+    "django": ("django_backend.asgi:application", DJANGO_DIR, int(ServiceConfig.DJANGO_PORT), "/health/", "off"),
+    "fastapi": ("index:app", ROOT, int(ServiceConfig.FASTAPI_PORT), "/api/integration/health", "on"),
+}
+# Templates worth compiling before forking; the Django API renders this one for browsers
+DJANGO_PRELOAD_TEMPLATES = ("rest_framework/api.html",)
+
+logger = logging.getLogger("launcher")
+
+
+def load_fastapi(production=False):
+    """Import the FastAPI app and compile its templates"""
+    import index
+    from routes.note import templates
+
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+    return index.app
+
+
+def load_django(production=False):
+    """Set up Django, import every view through the URLconf and compile the common templates"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_backend.settings")
+    from django.core.asgi import get_asgi_application
+    from django.core.management import call_command
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    application = get_asgi_application()
+    if not production:
+        call_command("check")
+    get_resolver().url_patterns
+    for name in DJANGO_PRELOAD_TEMPLATES:
+        get_template(name)
+    # Connections opened by the checks must not be shared with forked workers
+    connections.close_all()
+    return application
+
+
+LOADERS = {"django": load_django, "fastapi": load_fastapi}
+DEFAULT_WORKERS = {"django": ServiceConfig.DJANGO_WORKERS, "fastapi": ServiceConfig.FASTAPI_WORKERS}
+
+
+def serve(name, args):
+    """Run one service in this process"""
+    import uvicorn
+
+    import_string, app_dir, default_port, _, lifespan = SERVICES[name]
+    port = args.port or default_port
+    os.chdir(app_dir)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    options = {"lifespan": lifespan, "access_log": not args.production, "log_level": args.log_level}
+
+    if args.reload:
+        uvicorn.run(import_string, host=args.host, port=port, reload=True, reload_dirs=[app_dir], **options)
+        return 0
+    workers = args.workers or DEFAULT_WORKERS[name] or os.cpu_count() or 1
+    if not hasattr(os, "fork"):
+        uvicorn.run(import_string, host=args.host, port=port, workers=workers, **options)
+        return 0
+
+    from core.supervisor import Supervisor
+
+    supervisor = Supervisor(
+        name,
+        lambda: LOADERS[name](args.production),
+        args.host,
+        port,
+        workers,
+        preload=not args.no_preload,
+        graceful_timeout=ServiceConfig.WORKER_GRACEFUL_TIMEOUT,
+        ready_timeout=ServiceConfig.WORKER_READY_TIMEOUT,
+        **options,
+    )
+    return supervisor.run()
+
+
+def wait_healthy(url, process, timeout, check=None):
+    """Poll url until it answers 200 (and check(body) holds); False if process exits or timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200 and (check is None or check(json.loads(response.read()))):
+                    return True
+        except (urllib.error.URLError, OSError, ValueError):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_all(args):
+    """Django, then FastAPI pointed at it, then optionally the React dev server"""
+    processes = {}
+    received = []
+    for signum in (signal.SIGTERM, signal.SIGINT) + ((signal.SIGHUP,) if hasattr(signal, "SIGHUP") else ()):
+        signal.signal(signum, lambda signum, frame: received.append(signum))
+
+    def start(name, port, workers, env=None):
+        command = [sys.executable, os.path.abspath(__file__), name, "--host", args.host, "--port", str(port),
+                   "--workers", str(workers), "--log-level", args.log_level]
+        command += [flag for flag, on in (("--production", args.production), ("--no-preload", args.no_preload),
+                                          ("--reload", args.reload)) if on]
+        processes[name] = subprocess.Popen(command, cwd=ROOT, env={**os.environ, **(env or {})})
+        return processes[name]
+
+    def stop_all():
+        # FastAPI first, so it stops taking requests before Django goes away
+        for name in ("frontend", "fastapi", "django"):
+            process = processes.get(name)
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(ServiceConfig.WORKER_GRACEFUL_TIMEOUT + 5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    django_port = args.django_port or SERVICES["django"][2]
+    fastapi_port = args.port or SERVICES["fastapi"][2]
+    host = "127.0.0.1" if args.host in ("0.0.0.0", "::") else args.host
+    base = f"http://{host}"
+    started = time.perf_counter()
+    try:
+        django = start("django", django_port, args.django_workers)
+        if not wait_healthy(f"{base}:{django_port}{SERVICES['django'][3]}", django, ServiceConfig.WORKER_READY_TIMEOUT):
+            logger.error("Django did not become healthy")
+            return 1
+        logger.info("Django ready on %s:%d", base, django_port)
+
+        fastapi = start("fastapi", fastapi_port, args.workers, env={
+            "DJANGO_SERVICE_HOST": host, "DJANGO_SERVICE_PORT": str(django_port),
+            "DJANGO_SERVICE_URLS": "",
+        })
+        if not wait_healthy(f"{base}:{fastapi_port}{SERVICES['fastapi'][3]}", fastapi, ServiceConfig.WORKER_READY_TIMEOUT,
+                            check=lambda body: body.get("django_backend_status") == "connected"):
+            logger.error("FastAPI did not become healthy")
+            return 1
+        logger.info("FastAPI ready on %s:%d (docs at /docs)", base, fastapi_port)
+
+        if args.frontend:
+            npm = "npm.cmd" if os.name == "nt" else "npm"
+            processes["frontend"] = subprocess.Popen([npm, "start"], cwd=os.path.join(ROOT, "react_frontend"))
+            logger.info("React dev server starting on %s", ServiceConfig.REACT_URL)
+        logger.info("Stack ready in %.2fs", time.perf_counter() - started)
+
+        while True:
+            for signum in received:
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    return 0
+                for name in ("django", "fastapi"):
+                    processes[name].send_signal(signum)
+            received.clear()
+            for name, process in processes.items():
+                if process.poll() is not None:
+                    logger.error("%s exited with status %s; stopping the stack", name, process.returncode)
+                    return 1
+            time.sleep(0.2)
+    finally:
+        stop_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", nargs="?", choices=["all", *SERVICES], default="all")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="listen port (FastAPI's for all)")
+    parser.add_argument("--django-port", type=int, help="Django's port with all")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes (default: FASTAPI_WORKERS / DJANGO_WORKERS, else one per CPU)")
+    parser.add_argument("--django-workers", type=int, default=0, help="Django's worker processes with all")
+    parser.add_argument("--production", action="store_true", help="skip Django system checks and the access log")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="load the app in each worker, so SIGHUP picks up code changes")
+    parser.add_argument("--reload", action="store_true", help="development: one process, restarted on code changes")
+    parser.add_argument("--frontend", action="store_true", help="with all, also run the React dev server")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s %(name)s %(message)s")
+    for name in ("launcher", "supervisor"):
+        logging.getLogger(name).setLevel(args.log_level.upper())
+    sys.exit(run_all(args) if args.service == "all" else serve(args.service, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,9 @@ import notesService from './services/notesService';
 
 function App() {
   const [notes, setNotes] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [success, setSuccess] = useState(null);
   const [editingNote, setEditingNote] = useState(null);
@@ -15,8 +17,23 @@ function App() {
   useEffect(() => {
     loadNotes();
     checkHealth();
+    // Apply other clients' changes as they happen instead of refetching the list.
+    // Our own writes arrive here too, so each delta is applied idempotently.
+    return notesService.subscribeToChanges(applyChange, loadNotes);
   }, []);
 
+  const applyChange = ({ action, id, note }) => {
+    setNotes(prev => {
+      if (action === 'deleted' || !note) {
+        return prev.filter(existing => existing.id !== id);
+      }
+      if (prev.some(existing => existing.id === id)) {
+        return prev.map(existing => (existing.id === id ? note : existing));
+      }
+      return action === 'created' ? [note, ...prev] : prev;
+    });
+  };
+
   const checkHealth = async () => {
     try {
       const health = await notesService.healthCheck();
@@ -35,8 +52,9 @@ function App() {
     try {
       setLoading(true);
       setError(null);
-      const fetchedNotes = await notesService.getAllNotes();
-      setNotes(fetchedNotes);
+      const page = await notesService.getAllNotes();
+      setNotes(page.notes);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       setError(error.message);
       console.error('Error loading notes:', error);
@@ -45,11 +63,30 @@ function App() {
     }
   };
 
+  const loadMoreNotes = async () => {
+    if (!nextCursor) {
+      return;
+    }
+    try {
+      setLoadingMore(true);
+      setError(null);
+      const page = await notesService.getAllNotes({ cursor: nextCursor });
+      setNotes(prev => [...prev, ...page.notes]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      setError(error.message);
+      console.error('Error loading more notes:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCreateNote = async (noteData) => {
     try {
       setError(null);
       const newNote = await notesService.createNote(noteData);
-      setNotes(prev => [newNote, ...prev]);
+      // The SSE 'created' event may have added it already
+      applyChange({ action: 'created', id: newNote.id, note: newNote });
       setSuccess('Note created successfully!');
       setTimeout(() => setSuccess(null), 3000);
     } catch (error) {
@@ -74,9 +111,18 @@ function App() {
     }
   };
 
-  const handleEditNote = (note) => {
-    setEditingNote(note);
+  const handleEditNote = async (note) => {
     setError(null);
+    if (note.note !== undefined) {
+      setEditingNote(note);
+      return;
+    }
+    // The list has no bodies; the form needs the whole note
+    try {
+      setEditingNote(await notesService.getNote(note.id));
+    } catch (error) {
+      setError(error.message);
+    }
   };
 
   const handleCancelEdit = () => {
@@ -134,6 +180,9 @@ function App() {
         <NotesList
           notes={notes}
           loading={loading}
+          hasMore={Boolean(nextCursor)}
+          loadingMore={loadingMore}
+          onLoadMore={loadMoreNotes}
           onEdit={handleEditNote}
           onDelete={handleDeleteNote}
         />
@@ -1,7 +1,24 @@
 import React, { useState } from 'react';
+import notesService from '../services/notesService';
 
 const NoteCard = ({ note, onEdit, onDelete }) => {
   const [isDeleting, setIsDeleting] = useState(false);
+  // List pages come without bodies; one is fetched when the reader asks for it
+  const [loadedBody, setLoadedBody] = useState(null);
+  const [isLoadingBody, setIsLoadingBody] = useState(false);
+  const body = note.note ?? loadedBody;
+
+  const handleShowNote = async () => {
+    setIsLoadingBody(true);
+    try {
+      const fullNote = await notesService.getNote(note.id);
+      setLoadedBody(fullNote.note);
+    } catch (error) {
+      console.error('Error loading note:', error);
+    } finally {
+      setIsLoadingBody(false);
+    }
+  };
 
   const handleDelete = async () => {
     if (!window.confirm('Are you sure you want to delete this note?')) {
@@ -39,9 +56,15 @@ const NoteCard = ({ note, onEdit, onDelete }) => {
       
       <p className="note-desc">{note.desc}</p>
       
-      <div className="note-content">
-        {note.note}
-      </div>
+      {body != null ? (
+        <div className="note-content">
+          {body}
+        </div>
+      ) : (
+        <button className="btn" onClick={handleShowNote} disabled={isLoadingBody}>
+          {isLoadingBody ? 'Loading...' : 'Show note'}
+        </button>
+      )}
       
       <div className="note-meta">
         <small>Created: {formatDate(note.created_at)}</small>
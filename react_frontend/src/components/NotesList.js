@@ -1,7 +1,7 @@
 import React from 'react';
 import NoteCard from './NoteCard';
 
-const NotesList = ({ notes, loading, onEdit, onDelete }) => {
+const NotesList = ({ notes, loading, hasMore, loadingMore, onLoadMore, onEdit, onDelete }) => {
   if (loading) {
     return <div className="loading">Loading notes...</div>;
   }
@@ -16,7 +16,7 @@ const NotesList = ({ notes, loading, onEdit, onDelete }) => {
 
   return (
     <div>
-      <h2>Your Notes ({notes.length})</h2>
+      <h2>Your Notes ({notes.length}{hasMore ? '+' : ''})</h2>
       <div className="notes-grid">
         {notes.map((note) => (
           <NoteCard
@@ -27,6 +27,13 @@ const NotesList = ({ notes, loading, onEdit, onDelete }) => {
           />
         ))}
       </div>
+      {hasMore && (
+        <div className="load-more">
+          <button className="btn" onClick={onLoadMore} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,6 +1,8 @@
 import axios from 'axios';
 
 const API_BASE_URL = 'http://localhost:8000/api/integration';
+const PAGE_SIZE = 50;
+const MAX_VALIDATOR_ENTRIES = 100;
 
 class NotesService {
   constructor() {
@@ -11,13 +13,65 @@ class NotesService {
         'Content-Type': 'application/json',
       },
     });
+    // ETag / Last-Modified and body of earlier GETs, keyed by URL + params
+    this.validatorCache = new Map();
   }
 
-  // Get all notes
-  async getAllNotes() {
+  // GET that revalidates a previously fetched body; a 304 reuses it
+  async conditionalGet(url, params = {}) {
+    const key = `${url}?${new URLSearchParams(params).toString()}`;
+    const cached = this.validatorCache.get(key);
+    const headers = {};
+    if (cached?.etag) {
+      headers['If-None-Match'] = cached.etag;
+    } else if (cached?.lastModified) {
+      headers['If-Modified-Since'] = cached.lastModified;
+    }
+
+    const response = await this.api.get(url, {
+      params,
+      headers,
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    });
+    if (response.status === 304 && cached) {
+      return cached.data;
+    }
+
+    const etag = response.headers.etag;
+    const lastModified = response.headers['last-modified'];
+    this.validatorCache.delete(key);
+    if (etag || lastModified) {
+      this.validatorCache.set(key, { etag, lastModified, data: response.data });
+      if (this.validatorCache.size > MAX_VALIDATOR_ENTRIES) {
+        this.validatorCache.delete(this.validatorCache.keys().next().value);
+      }
+    }
+    return response.data;
+  }
+
+  // Get one page of notes; pass the returned nextCursor to load the next page.
+  // fields (e.g. ['title', 'desc']) asks for only those fields of each note;
+  // note bodies are only included when fields names 'note' (use getNote otherwise).
+  async getAllNotes({ cursor = null, limit = PAGE_SIZE, fields = null, important = null, ordering = null } = {}) {
     try {
-      const response = await this.api.get('/notes');
-      return response.data;
+      const params = { limit };
+      if (cursor) {
+        params.cursor = cursor;
+      }
+      if (fields) {
+        params.fields = fields.join(',');
+      }
+      if (important !== null) {
+        params.important = important;
+      }
+      if (ordering) {
+        params.ordering = ordering;
+      }
+      const data = await this.conditionalGet('/notes', params);
+      return {
+        notes: data.results,
+        nextCursor: data.next_cursor,
+      };
     } catch (error) {
       throw new Error(`Failed to fetch notes: ${error.response?.data?.detail || error.message}`);
     }
@@ -26,8 +80,7 @@ class NotesService {
   // Get single note
   async getNote(id) {
     try {
-      const response = await this.api.get(`/notes/${id}`);
-      return response.data;
+      return await this.conditionalGet(`/notes/${id}`);
     } catch (error) {
       throw new Error(`Failed to fetch note: ${error.response?.data?.detail || error.message}`);
     }
@@ -63,6 +116,17 @@ class NotesService {
     }
   }
 
+  // Follow note changes made by anyone (Server-Sent Events). onChange gets
+  // { seq, action, id, note }; onResync means events were missed and the list
+  // should be reloaded. EventSource reconnects by itself, resuming after the
+  // last event it saw. Returns a function that closes the stream.
+  subscribeToChanges(onChange, onResync) {
+    const source = new EventSource(`${API_BASE_URL}/notes/events`);
+    source.addEventListener('change', (event) => onChange(JSON.parse(event.data)));
+    source.addEventListener('resync', () => onResync());
+    return () => source.close();
+  }
+
   // Health check
   async healthCheck() {
     try {
@@ -0,0 +1,68 @@
+# Profiling routes, included by index.py only when PROFILING_ENABLED is set (see core.profiling)
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+
+from config.services import ServiceConfig
+from core.profiles import ProfileRecord, ProfileStore, StackSampler
+from core.profiling import get_profile_store, require_profiling_token
+
+debug_router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(require_profiling_token)])
+
+
+def download(record: ProfileRecord, fmt: Optional[str] = None) -> Response:
+    try:
+        body, media_type, filename = record.render(fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Profile-ID": record.id},
+    )
+
+
+@debug_router.get("/profiles")
+async def list_profiles(store: ProfileStore = Depends(get_profile_store)):
+    """Profiles kept in memory, most recent first"""
+    return {"profiles": store.list()}
+
+
+@debug_router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Optional[str] = Query(None, description="pstats or text for cprofile profiles, collapsed for sampled ones"),
+    store: ProfileStore = Depends(get_profile_store),
+):
+    """Download a profile"""
+    record = store.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if record.duration is None:
+        raise HTTPException(status_code=409, detail="Profile still being captured")
+    return download(record, format)
+
+
+@debug_router.post("/profile")
+async def profile_process(
+    seconds: float = Query(5.0, gt=0, le=ServiceConfig.PROFILING_MAX_SECONDS),
+    interval: float = Query(ServiceConfig.PROFILING_SAMPLE_INTERVAL, ge=0.001, le=1.0),
+    idle: bool = Query(False, description="Include threads waiting on I/O or locks"),
+    store: ProfileStore = Depends(get_profile_store),
+):
+    """Sample every thread of this process for `seconds` and return the collapsed stacks"""
+    record = ProfileRecord("sample", f"process for {seconds:g}s")
+    store.add(record)
+    sampler = StackSampler(interval, idle=idle)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+        record.stacks, record.samples = sampler.collapsed(), sampler.samples
+        record.duration = time.perf_counter() - start
+    return download(record)
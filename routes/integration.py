@@ -1,9 +1,27 @@
 # FastAPI Integration Layer Routes - Integration with Django Backend
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Literal, Optional
 from pydantic import BaseModel
+import asyncio
 import httpx
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
+
+from config.http_client import get_http_client
+from core.admission import AdmittedRoute
+from core.balancer import get_balancer
+from config.services import ServiceConfig
+from core.cache import CacheBackend, get_cache
+from core.changes import ChangeFeed, Resync, get_change_feed
+from core.conditional import conditional_headers, not_modified, validator_headers, validators_match
+from core.repository import (
+    NoteRepository, NotModified, RepositoryError, UpstreamUnavailable, get_note_repository, parse_fields,
+    upstream_unavailable,
+)
+from core.resilience import get_circuit_breaker
+from core.serialization import dumps, loads
 
 # Pydantic models for request/response
 class NoteCreate(BaseModel):
@@ -18,158 +36,572 @@ class NoteUpdate(BaseModel):
     note: Optional[str] = None
     important: Optional[bool] = None
 
+class NoteBulkUpdate(NoteUpdate):
+    id: int
+
+class NoteBulkDelete(BaseModel):
+    ids: List[int]
+
 class NoteResponse(BaseModel):
     id: str
     title: str
     desc: str
-    note: str
+    note: Optional[str] = None  # left out of list pages unless requested with ?fields=
     important: bool
     created_at: str
 
 # FastAPI router
-integration_router = APIRouter(prefix="/api/integration", tags=["Integration Layer"])
+# Requests pass admission control (concurrency limits, rate limiting) before their handler
+integration_router = APIRouter(prefix="/api/integration", tags=["Integration Layer"], route_class=AdmittedRoute)
+
+# Cache keys: one entry per list page (keyed by its query) and one per note
+LIST_CACHE_PREFIX = "notes:list:"
+
+def list_cache_key(params: dict) -> str:
+    return LIST_CACHE_PREFIX + "&".join(f"{k}={params[k]}" for k in sorted(params))
 
-@integration_router.get("/notes", response_model=List[dict])
-async def get_all_notes():
+def note_cache_key(note_id) -> str:
+    return f"notes:detail:{note_id}"
+
+async def invalidate_changes(cache: CacheBackend, changes: list) -> None:
+    """Drop cached reads made stale by changes from the Django change log"""
+    await cache.delete(*{note_cache_key(change["note_id"]) for change in changes})
+    await cache.delete_prefix(LIST_CACHE_PREFIX)
+
+# Marks responses served from an expired cache entry while Django is unavailable
+STALE_HEADERS = {"X-Cache-Status": "stale"}
+
+async def cached_read(cache: CacheBackend, key: str, load) -> tuple[dict, bool]:
     """
-    Get all notes from Django backend
+    Return (entry, stale) for a cached read, calling load() and storing its
+    result on a miss. If Django is unavailable the last known entry is
+    served instead of an error, as long as it is still in its stale window.
+    The result is not stored if a write invalidated key while it loaded,
+    since it may predate that write.
     """
+    entry = await cache.get(key)
+    if entry is not None:
+        return entry, False
+    generation = cache.generation(key)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://localhost:8002/api/notes/")
-            if response.status_code == 200:
-                notes = response.json()
-                # Transform to match expected format
-                transformed_notes = []
-                for note in notes:
-                    transformed_notes.append({
-                        "id": str(note["id"]),
-                        "title": note["title"],
-                        "desc": note["desc"],
-                        "note": note["note"],
-                        "important": note["important"],
-                        "created_at": str(note["created_at"])
-                    })
-                return transformed_notes
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch notes from Django")
+        entry = await load()
+    except UpstreamUnavailable:
+        entry = await cache.get_stale(key)
+        if entry is None:
+            raise
+        return entry, True
+    if cache.generation(key) == generation:
+        await cache.set(key, entry)
+    return entry, False
+
+def json_response(body: bytes, headers: Optional[dict] = None) -> Response:
+    """Send an already encoded JSON body as-is"""
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def page_body(results_json: str, **extra) -> bytes:
+    """
+    Encode a page around its pre-encoded results, so cached pages are not
+    decoded and re-encoded on every hit
+    """
+    body = b'{"results":' + results_json.encode()
+    for name, value in extra.items():
+        body += b',"' + name.encode() + b'":' + dumps(value)
+    return body + b"}"
+
+# Fields whose integration API format differs from Django's
+STRING_FIELDS = ("id", "created_at", "updated_at")
+
+def note_to_response(note: dict, fields: Optional[tuple] = None) -> dict:
+    """Transform a Django-shaped note into the integration API format"""
+    if fields is not None:
+        # Sparse fieldset: Django already returned only these fields
+        return {name: str(note[name]) if name in STRING_FIELDS else note[name] for name in fields}
+    response = {
+        "id": str(note["id"]),
+        "title": note["title"],
+        "desc": note["desc"],
+    }
+    if "note" in note:
+        # List pages come without bodies; single notes and change events carry them
+        response["note"] = note["note"]
+    response["important"] = note["important"]
+    response["created_at"] = str(note["created_at"])
+    return response
+
+async def load_list_page(repository: NoteRepository, params: dict, selected: Optional[tuple] = None,
+                         headers: Optional[dict] = None) -> dict:
+    """Fetch one list page as the cache entry shared by the list routes"""
+    upstream_page, validators = await repository.list_notes(params, headers=headers)
+    # Transform to match expected format, then encode once for every later cache hit
+    transformed_notes = [note_to_response(note, selected) for note in upstream_page["results"]]
+    return {
+        "results_json": dumps(transformed_notes).decode(),
+        "next_cursor": upstream_page.get("next_cursor"),
+        "validators": validators
+    }
+
+# Orderings the Django list endpoint has indexes for (notes/filters.py)
+ORDERINGS = ("-created_at", "created_at", "-updated_at", "updated_at", "title", "-title")
+
+@integration_router.get("/notes", response_model=dict)
+async def get_all_notes(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,desc"),
+    important: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    ordering: Optional[Literal[ORDERINGS]] = None,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
+    """
+    Get a page of notes from Django backend (newest first by default).
+    Pass the returned next_cursor back as `cursor` to fetch the next page,
+    and `fields` to return only some fields of each note; bodies (`note`)
+    are only included when `fields` names them. `important` and
+    the `*_after` (inclusive) / `*_before` (exclusive) bounds filter the
+    list; `ordering` sorts it. Naive datetimes are taken as UTC.
+    """
+    try:
+        params = {}
+        if limit is not None:
+            params["limit"] = limit
+        if cursor:
+            params["cursor"] = cursor
+        if important is not None:
+            params["important"] = "true" if important else "false"
+        bounds = {
+            "created_after": created_after, "created_before": created_before,
+            "updated_after": updated_after, "updated_before": updated_before,
+        }
+        for name, moment in bounds.items():
+            if moment is not None:
+                # One canonical spelling per instant, so equivalent queries share a cache entry
+                params[name] = (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).isoformat()
+        if ordering and ordering != "-created_at":
+            params["ordering"] = ordering
+        selected = parse_fields(fields)
+        if selected is not None:
+            params["fields"] = ",".join(selected)
+
+        load = partial(load_list_page, repository, params, selected, conditional_headers(request))
+        entry, stale = await cached_read(cache, list_cache_key(params), load)
+        if validators_match(request, entry["validators"]):
+            return not_modified(entry["validators"])
+        next_url = None
+        if entry["next_cursor"]:
+            next_url = str(request.url.include_query_params(cursor=entry["next_cursor"]))
+        headers = validator_headers(entry["validators"])
+        if stale:
+            headers.update(STALE_HEADERS)
+        return json_response(
+            page_body(entry["results_json"], next_cursor=entry["next_cursor"], next=next_url), headers=headers
+        )
+    except NotModified as e:
+        return not_modified(e.validators)
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @integration_router.post("/notes", response_model=dict)
-async def create_note(note: NoteCreate):
+async def create_note(
+    note: NoteCreate,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
     """
     Create a new note in Django backend
     """
     try:
-        async with httpx.AsyncClient() as client:
-            data = {
-                "title": note.title,
-                "desc": note.desc,
-                "note": note.note,
-                "important": note.important
+        data = {
+            "title": note.title,
+            "desc": note.desc,
+            "note": note.note,
+            "important": note.important
+        }
+        created_note = await repository.create_note(data)
+        # A new note can appear on any list page
+        await cache.delete_prefix(LIST_CACHE_PREFIX)
+        return note_to_response(created_note)
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+def _bulk_results(results: list) -> list:
+    """Normalize per-item bulk results from Django (ids as strings)"""
+    for result in results:
+        if "id" in result:
+            result["id"] = str(result["id"])
+    return results
+
+@integration_router.get("/notes/search", response_model=dict)
+async def search_notes(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,desc"),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    cache: CacheBackend = Depends(get_cache)
+):
+    """
+    Ranked full-text search over title, description and content
+    """
+    try:
+        params = {"q": q, "limit": limit, "offset": offset}
+        selected = parse_fields(fields)
+        if selected is not None:
+            params["fields"] = ",".join(selected)
+        async def load():
+            try:
+                response = await client.get("/api/notes/search/", params=params)
+            except httpx.TransportError as e:
+                raise upstream_unavailable(e)
+            if response.status_code >= 500:
+                raise UpstreamUnavailable(502, "Notes service error")
+            if response.status_code != 200:
+                raise HTTPException(status_code=response.status_code, detail="Failed to search notes")
+            upstream_page = loads(response.content)
+            return {
+                "results_json": dumps([note_to_response(note, selected) for note in upstream_page["results"]]).decode(),
+                "has_next": upstream_page["next"] is not None
             }
-            response = await client.post("http://localhost:8002/api/notes/", json=data)
-            if response.status_code == 201:
-                created_note = response.json()
-                return {
-                    "id": str(created_note["id"]),
-                    "title": created_note["title"],
-                    "desc": created_note["desc"],
-                    "note": created_note["note"],
-                    "important": created_note["important"],
-                    "created_at": str(created_note["created_at"])
-                }
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to create note")
+
+        # Search pages live under the list prefix so any write invalidates them
+        page, stale = await cached_read(cache, list_cache_key({"search": 1, **params}), load)
+        next_url = None
+        if page["has_next"]:
+            next_url = str(request.url.include_query_params(offset=offset + limit))
+        return json_response(page_body(page["results_json"], next=next_url), headers=STALE_HEADERS if stale else None)
+    except HTTPException:
+        raise
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@integration_router.post("/notes/bulk", response_model=dict)
+async def bulk_create_notes(
+    notes: List[NoteCreate],
+    client: httpx.AsyncClient = Depends(get_http_client),
+    cache: CacheBackend = Depends(get_cache)
+):
+    """
+    Create many notes in one Django transaction; returns one result per item
+    """
+    try:
+        data = [note.dict() for note in notes]
+        response = await client.post("/api/notes/bulk/", json=data, timeout=ServiceConfig.HTTP_BULK_TIMEOUT)
+        if response.status_code == 200:
+            await cache.delete_prefix(LIST_CACHE_PREFIX)
+            return {"results": _bulk_results(loads(response.content)["results"])}
+        raise HTTPException(status_code=response.status_code, detail="Failed to create notes")
+    except HTTPException:
+        raise
+    except httpx.TransportError as e:
+        error = upstream_unavailable(e)
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@integration_router.patch("/notes/bulk", response_model=dict)
+async def bulk_update_notes(
+    notes: List[NoteBulkUpdate],
+    client: httpx.AsyncClient = Depends(get_http_client),
+    cache: CacheBackend = Depends(get_cache)
+):
+    """
+    Partially update many notes in one Django transaction; returns one result per item
+    """
+    try:
+        data = [{k: v for k, v in note.dict().items() if v is not None} for note in notes]
+        response = await client.patch("/api/notes/bulk/", json=data, timeout=ServiceConfig.HTTP_BULK_TIMEOUT)
+        if response.status_code == 200:
+            results = _bulk_results(loads(response.content)["results"])
+            updated = [note_cache_key(r["id"]) for r in results if r["status"] == "updated"]
+            await cache.delete(*updated)
+            await cache.delete_prefix(LIST_CACHE_PREFIX)
+            return {"results": results}
+        raise HTTPException(status_code=response.status_code, detail="Failed to update notes")
+    except HTTPException:
+        raise
+    except httpx.TransportError as e:
+        error = upstream_unavailable(e)
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@integration_router.delete("/notes/bulk", response_model=dict)
+async def bulk_delete_notes(
+    payload: NoteBulkDelete,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    cache: CacheBackend = Depends(get_cache)
+):
+    """
+    Delete many notes with a single Django query; returns one result per id
+    """
+    try:
+        response = await client.request(
+            "DELETE", "/api/notes/bulk/", json={"ids": payload.ids}, timeout=ServiceConfig.HTTP_BULK_TIMEOUT
+        )
+        if response.status_code == 200:
+            results = _bulk_results(loads(response.content)["results"])
+            deleted = [note_cache_key(r["id"]) for r in results if r["status"] == "deleted"]
+            await cache.delete(*deleted)
+            await cache.delete_prefix(LIST_CACHE_PREFIX)
+            return {"results": results}
+        raise HTTPException(status_code=response.status_code, detail="Failed to delete notes")
+    except HTTPException:
+        raise
+    except httpx.TransportError as e:
+        error = upstream_unavailable(e)
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@integration_router.get("/notes/export")
+async def export_notes(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
+    """
+    Stream every note from Django backend as NDJSON or CSV.
+    The upstream body is relayed chunk by chunk, so memory use does not grow with the table.
+    """
+    try:
+        # Streamed straight through, so never buffered for request coalescing
+        upstream_request = client.build_request(
+            "GET", "/api/notes/export/", params={"format": format}, extensions={"single_flight": False}
+        )
+        response = await client.send(upstream_request, stream=True)
+    except httpx.TransportError as e:
+        error = upstream_unavailable(e)
+        raise HTTPException(status_code=error.status_code, detail=error.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    if response.status_code != 200:
+        await response.aclose()
+        raise HTTPException(status_code=response.status_code, detail="Failed to export notes")
+
+    # Raw bytes are relayed as-is, so any upstream content encoding must travel with them
+    headers = {
+        name: response.headers[name]
+        for name in ("content-disposition", "content-encoding")
+        if name in response.headers
+    }
+    return StreamingResponse(
+        response.aiter_raw(),
+        media_type=response.headers.get("content-type"),
+        headers=headers,
+        background=BackgroundTask(response.aclose)
+    )
+
+@integration_router.get("/notes/stats", response_model=dict)
+async def note_stats(
+    days: int = Query(30, ge=0, le=366, description="Days of per-day counts, up to today (UTC)"),
+    weeks: int = Query(12, ge=0, le=104, description="ISO weeks of per-week counts, up to this one"),
+    repository: NoteRepository = Depends(get_note_repository)
+):
+    """
+    Total and important note counts, plus notes per day and per week.
+    Django keeps these in summary tables updated with every write, so a
+    read costs the same however many notes there are.
+    """
+    try:
+        return await repository.note_stats(days, weeks)
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+# Comment line sent when idle, so proxies keep the event stream open
+SSE_HEARTBEAT = 15.0
+
+def sse_event(event: str, data, event_id: Optional[int] = None) -> bytes:
+    """Encode one Server-Sent Event"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode() + b"data: " + dumps(data) + b"\n\n"
+
+def change_event(change: dict) -> bytes:
+    note = change["note"]
+    return sse_event("change", {
+        "seq": change["seq"],
+        "action": change["action"],
+        "id": str(change["note_id"]),
+        "note": note_to_response(note) if note is not None else None,
+    }, change["seq"])
+
+@integration_router.get("/notes/events")
+async def note_events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Change seq already seen; defaults to now"),
+    feed: ChangeFeed = Depends(get_change_feed)
+):
+    """
+    Server-Sent Events stream of note changes (created, updated, deleted).
+    Each event's id is its change seq: a reconnecting EventSource sends it
+    back as Last-Event-ID and receives only what it missed. A `resync`
+    event means the client fell too far behind and should reload its list.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    try:
+        if since is None:
+            since = await feed.head()
+        subscription, published = feed.subscribe(since)
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    try:
+        # Subscribed first, so nothing falls between the backlog and the live events
+        backlog = await feed.backlog(since, published)
+    except RepositoryError as e:
+        feed.unsubscribe(subscription)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    async def stream():
+        last_sent = since
+        try:
+            yield b"retry: 3000\n" + sse_event("ready", {"seq": since}, since)
+            if backlog is None:
+                last_sent = published
+                yield sse_event("resync", {"seq": published}, published)
+            else:
+                for change in backlog:
+                    last_sent = change["seq"]
+                    yield change_event(change)
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if isinstance(item, Resync):
+                    last_sent = item.seq
+                    yield sse_event("resync", {"seq": item.seq}, item.seq)
+                elif item["seq"] > last_sent:
+                    last_sent = item["seq"]
+                    yield change_event(item)
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @integration_router.get("/notes/{note_id}", response_model=dict)
-async def get_note(note_id: str):
+async def get_note(
+    note_id: str,
+    request: Request,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
     """
     Get a specific note from Django backend
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"http://localhost:8002/api/notes/{note_id}/")
-            if response.status_code == 200:
-                note = response.json()
-                return {
-                    "id": str(note["id"]),
-                    "title": note["title"],
-                    "desc": note["desc"],
-                    "note": note["note"],
-                    "important": note["important"],
-                    "created_at": str(note["created_at"])
-                }
-            elif response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Note not found")
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to fetch note")
+        async def load():
+            note, validators = await repository.get_note(note_id, headers=conditional_headers(request))
+            return {"json": dumps(note_to_response(note)).decode(), "validators": validators}
+
+        entry, stale = await cached_read(cache, note_cache_key(note_id), load)
+        if validators_match(request, entry["validators"]):
+            return not_modified(entry["validators"])
+        headers = validator_headers(entry["validators"])
+        if stale:
+            headers.update(STALE_HEADERS)
+        return json_response(entry["json"].encode(), headers=headers)
+    except NotModified as e:
+        return not_modified(e.validators)
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @integration_router.put("/notes/{note_id}", response_model=dict)
-async def update_note(note_id: str, note: NoteUpdate):
+async def update_note(
+    note_id: str,
+    note: NoteUpdate,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
     """
     Update a note in Django backend
     """
     try:
-        async with httpx.AsyncClient() as client:
-            data = {k: v for k, v in note.dict().items() if v is not None}
-            response = await client.put(f"http://localhost:8002/api/notes/{note_id}/", json=data)
-            if response.status_code == 200:
-                updated_note = response.json()
-                return {
-                    "id": str(updated_note["id"]),
-                    "title": updated_note["title"],
-                    "desc": updated_note["desc"],
-                    "note": updated_note["note"],
-                    "important": updated_note["important"],
-                    "created_at": str(updated_note["created_at"])
-                }
-            elif response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Note not found")
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to update note")
+        data = {k: v for k, v in note.dict().items() if v is not None}
+        updated_note = await repository.update_note(note_id, data)
+        await cache.delete(note_cache_key(note_id))
+        await cache.delete_prefix(LIST_CACHE_PREFIX)
+        return note_to_response(updated_note)
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @integration_router.delete("/notes/{note_id}")
-async def delete_note(note_id: str):
+async def delete_note(
+    note_id: str,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
     """
     Delete a note from Django backend
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(f"http://localhost:8002/api/notes/{note_id}/")
-            if response.status_code == 204:
-                return {"message": "Note deleted successfully"}
-            elif response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Note not found")
-            else:
-                raise HTTPException(status_code=response.status_code, detail="Failed to delete note")
+        await repository.delete_note(note_id)
+        await cache.delete(note_cache_key(note_id))
+        await cache.delete_prefix(LIST_CACHE_PREFIX)
+        return {"message": "Note deleted successfully"}
+    except RepositoryError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@integration_router.get("/cache/stats")
+async def cache_stats(cache: CacheBackend = Depends(get_cache)):
+    """
+    Hit/miss/eviction counters for the integration response cache
+    """
+    return cache.stats()
+
+@integration_router.get("/admission/stats")
+async def admission_stats(request: Request):
+    """
+    Admitted, queued and shed request counts per route, and rate limiter counters
+    """
+    return request.app.state.admission.stats()
+
 @integration_router.get("/health")
-async def health_check():
+async def health_check(client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Health check endpoint that checks Django backend connectivity
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://localhost:8002/api/notes/")
-            if response.status_code == 200:
-                django_status = "connected"
-            else:
-                django_status = "disconnected"
+        response = await client.get("/api/notes/")
+        if response.status_code == 200:
+            django_status = "connected"
+        else:
+            django_status = "disconnected"
     except Exception:
         django_status = "disconnected"
     
+    breaker = get_circuit_breaker(client)
+    balancer = get_balancer(client)
     return {
         "fastapi_status": "healthy",
+        "notes_backend": ServiceConfig.NOTES_BACKEND,
+        "django_circuit": breaker.stats() if breaker else None,
+        "django_instances": balancer.stats() if balancer else None,
         "django_backend_status": django_status,
         "message": "FastAPI Integration Layer is running with Django backend"
     }
\ No newline at end of file
@@ -1,75 +1,99 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+"""
+Server-rendered home page
+GET / streams the page in three parts: the shell (form and headings) goes
+out before any note is loaded, then one page of notes, then the footer.
+The notes part comes from the same cached list page as
+GET /api/integration/notes, and its rendered HTML is cached under the
+collection ETag, so an unchanged list is neither refetched nor re-rendered.
+Older notes are reached through ?cursor=, so the page costs the same
+however many notes exist. POST / creates the note and redirects back
+(Post/Redirect/Get) instead of rendering the list itself.
+"""
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-import httpx
+
+from core.cache import CacheBackend, get_cache
+from core.repository import NoteRepository, RepositoryError, get_note_repository
+from core.serialization import loads
+from routes.integration import LIST_CACHE_PREFIX, cached_read, list_cache_key, load_list_page
 
 
 note=APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+HOME_PAGE_SIZE = 20
+HOME_PAGE_FIELDS = ("id", "title", "desc", "note", "important")
+# Rendered note lists, keyed by the collection ETag of their page
+FRAGMENT_CACHE_PREFIX = "notes:fragment:"
+
+
+def render_block(name: str, **context) -> str:
+    """Render one block of index.html"""
+    template = templates.get_template("index.html")
+    return "".join(template.blocks[name](template.new_context(context)))
 
 
-@note.get("/", response_class=HTMLResponse)
-async def read_home(request: Request):
-    # Call Django API to get notes
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get("http://localhost:8000/api/notes/")
-            if response.status_code == 200:
-                docs = response.json()
-                newdoc = []
-                for doc in docs:
-                    newdoc.append({
-                        "id": doc["id"],
-                        "title": doc["title"],
-                        "desc": doc["desc"],
-                        "note": doc["note"],
-                        "important": doc["important"]
-                    })
-            else:
-                newdoc = []
-        except httpx.ConnectError:
-            # If Django backend is not running, return empty list
-            newdoc = []
-    return templates.TemplateResponse(name="index.html", context={"request": request, "newdoc":newdoc})
+async def notes_fragment(repository: NoteRepository, cache: CacheBackend, cursor: Optional[str]) -> str:
+    """HTML for one page of notes, rendered at most once per collection version"""
+    # The page shows bodies, so it asks for them (list pages leave them out by default)
+    params = {"limit": HOME_PAGE_SIZE, "fields": ",".join(HOME_PAGE_FIELDS)}
+    if cursor:
+        params["cursor"] = cursor
+    try:
+        load = partial(load_list_page, repository, params, HOME_PAGE_FIELDS)
+        entry, _ = await cached_read(cache, list_cache_key(params), load)
+    except RepositoryError as e:
+        message = "Notes are unavailable right now." if e.status_code >= 500 else str(e.detail)
+        return render_block("notes", newdoc=[], unavailable=message)
 
+    etag = entry["validators"].get("ETag")
+    html = await cache.get(FRAGMENT_CACHE_PREFIX + etag) if etag else None
+    if html is None:
+        html = render_block("notes", newdoc=loads(entry["results_json"]), next_cursor=entry["next_cursor"])
+        if etag:
+            await cache.set(FRAGMENT_CACHE_PREFIX + etag, html)
+    return html
+
+
+@note.get("/")
+async def read_home(
+    cursor: Optional[str] = None,
+    error: bool = False,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
+    async def page():
+        yield render_block("page_start", error=error)
+        yield await notes_fragment(repository, cache, cursor)
+        yield render_block("page_end")
+
+    return StreamingResponse(page(), media_type="text/html; charset=utf-8")
 
 
 @note.post("/")
-async def create_item(request: Request):
+async def create_item(
+    request: Request,
+    repository: NoteRepository = Depends(get_note_repository),
+    cache: CacheBackend = Depends(get_cache)
+):
     form = await request.form()
     note_data = {
         "title": form.get("title"),
-        "desc": form.get("desc"), 
+        "desc": form.get("desc"),
         "note": form.get("note"),
         "important": form.get("important") == "on"
     }
-    
-    # Call Django API to create note
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post("http://localhost:8000/api/notes/", json=note_data)
-        except httpx.ConnectError:
-            # If Django backend is not running, handle gracefully
-            pass
-    
-    # Redirect to GET route to show updated list
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get("http://localhost:8000/api/notes/")
-            if response.status_code == 200:
-                docs = response.json()
-                newdoc = []
-                for doc in docs:
-                    newdoc.append({
-                        "id": doc["id"],
-                        "title": doc["title"],
-                        "desc": doc["desc"],
-                        "note": doc["note"],
-                        "important": doc["important"]
-                    })
-            else:
-                newdoc = []
-        except httpx.ConnectError:
-            newdoc = []
-    return templates.TemplateResponse(name="index.html", context={"request": request, "newdoc": newdoc})
+
+    if not all(note_data[name] for name in ("title", "desc", "note")):
+        return RedirectResponse("/?error=true", status_code=303)
+    try:
+        await repository.create_note(note_data)
+    except RepositoryError:
+        return RedirectResponse("/?error=true", status_code=303)
+    await cache.delete_prefix(LIST_CACHE_PREFIX)
+    # 303 makes the browser GET the home page, so reloading it cannot resubmit the form
+    return RedirectResponse("/", status_code=303)
@@ -0,0 +1,95 @@
+"""
+Shared fixtures for the integration layer tests
+The tests run against a throwaway SQLite database migrated with the real
+Django schema (benchmarks/common.py), emptied before each test, and call
+the integration routes in-process through httpx.ASGITransport.
+"""
+import sqlite3
+from functools import partial
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.common import setup_django
+from core.cache import MemoryCache
+from core.changes import ChangeFeed
+from core.repository import _decode_body
+from core.serialization import FastJSONResponse
+from routes.integration import integration_router, invalidate_changes
+
+NOTE_TABLES = ("notes_notechange", "notes_notestats", "notes_notedailystats", "notes_notecontent", "notes_note")
+
+_db_path = None
+
+
+def django_database() -> str:
+    """Path of the test database, set up and migrated on first use"""
+    global _db_path
+    if _db_path is None:
+        _db_path = setup_django()
+    return _db_path
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path)
+    # The FTS triggers on the notes tables call note_body()
+    db.create_function("note_body", 2, _decode_body, deterministic=True)
+    return db
+
+
+def reset_database(path: str) -> None:
+    db = open_database(path)
+    try:
+        with db:
+            for table in NOTE_TABLES:
+                db.execute(f"DELETE FROM {table}")
+    finally:
+        db.close()
+
+
+def table_counts(path: str) -> dict:
+    """Rows per note table, plus the note total the stats tables hold"""
+    db = open_database(path)
+    try:
+        counts = {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in NOTE_TABLES}
+        row = db.execute("SELECT total FROM notes_notestats WHERE id = 1").fetchone()
+        counts["stats_total"] = row[0] if row else 0
+        counts["daily_total"] = db.execute("SELECT COALESCE(SUM(total), 0) FROM notes_notedailystats").fetchone()[0]
+        return counts
+    finally:
+        db.close()
+
+
+class Clock:
+    """
+    Settable stand-in for a module's `time` import, e.g.
+    mock.patch("core.cache.time", clock). Patching time.monotonic itself
+    would stop the event loop's clock too.
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    monotonic = time = __call__
+
+
+def integration_app(repository, cache=None, admission=None, http_client=None, change_feed=None) -> FastAPI:
+    """The integration routes, with the app state index.py's lifespan would create set directly"""
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(integration_router)
+    app.state.note_repository = repository
+    app.state.cache = cache if cache is not None else MemoryCache()
+    app.state.admission = admission
+    app.state.http_client = http_client
+    app.state.change_feed = change_feed or ChangeFeed(
+        repository, invalidate=partial(invalidate_changes, app.state.cache), poll_interval=0.01
+    )
+    return app
+
+
+def asgi_client(app, **kwargs) -> httpx.AsyncClient:
+    """httpx client that calls an ASGI app in-process"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver", **kwargs)
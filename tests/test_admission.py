@@ -0,0 +1,199 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from config.services import ServiceConfig
+from core.admission import (
+    AdmissionController, ConcurrencyLimiter, MemoryBucketStore, RateLimiter, Rejected, create_admission_controller,
+)
+from core.cache import NullCache
+from core.repository import NoteRepository
+from tests.support import Clock, asgi_client, integration_app
+
+NOTE = {"id": 1, "title": "Title", "desc": "Description", "note": "Body", "important": False,
+        "created_at": "2024-01-01T00:00:00Z", "updated_at": "2024-01-01T00:00:00Z"}
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("core.admission.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = MemoryBucketStore()
+
+    async def take(self, key="client"):
+        return await self.store.take(key, rate=2, burst=3)
+
+    async def test_burst_then_wait_for_refill(self):
+        self.assertEqual([await self.take() for _ in range(3)], [0, 0, 0])
+        self.assertEqual(await self.take(), 0.5)
+        self.clock.now += 0.25
+        self.assertEqual(await self.take(), 0.25)
+        self.clock.now += 0.25
+        self.assertEqual(await self.take(), 0)
+        self.assertEqual(await self.take(), 0.5)
+
+    async def test_refill_stops_at_the_burst_size(self):
+        for _ in range(3):
+            await self.take()
+        self.clock.now += 60
+        self.assertEqual([await self.take() for _ in range(4)], [0, 0, 0, 0.5])
+
+    async def test_clients_have_separate_buckets(self):
+        for _ in range(3):
+            await self.take("a")
+        self.assertGreater(await self.take("a"), 0)
+        self.assertEqual(await self.take("b"), 0)
+
+    async def test_least_recently_seen_clients_are_forgotten(self):
+        store = MemoryBucketStore(max_clients=2)
+        for key in ("a", "b", "a", "c"):
+            await store.take(key, 1, 1)
+        self.assertEqual(list(store._buckets), ["a", "c"])
+
+    async def test_rate_limiter_rejects_with_the_wait(self):
+        limiter = RateLimiter(self.store, rate=2, burst=1)
+        await limiter.check("client", "/notes")
+        with self.assertRaises(Rejected) as raised:
+            await limiter.check("client", "/notes")
+        self.assertEqual((raised.exception.status_code, raised.exception.retry_after), (429, 0.5))
+        self.assertEqual((limiter.counters["allowed"], limiter.counters["limited"]), (1, 1))
+
+    async def test_rate_limiter_fails_open_when_the_store_fails(self):
+        store = mock.Mock()
+        store.take = mock.AsyncMock(side_effect=ConnectionError("redis down"))
+        limiter = RateLimiter(store, rate=1, burst=1)
+        await limiter.check("client", "/notes")
+        self.assertEqual(limiter.counters["store_errors"], 1)
+
+
+class ConcurrencyLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_waiter_gets_the_released_slot(self):
+        limiter = ConcurrencyLimiter("/notes", limit=1, queue_size=1, queue_timeout=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        self.assertEqual(limiter.waiting, 1)
+        limiter.release()
+        await waiter
+        self.assertEqual(limiter.stats()["active"], 1)
+        self.assertEqual((limiter.counters["admitted"], limiter.counters["queued"]), (2, 1))
+
+    async def test_queue_timeout_and_full_queue_are_shed(self):
+        limiter = ConcurrencyLimiter("/notes", limit=1, queue_size=1, queue_timeout=0.01, retry_after=3)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with self.assertRaises(Rejected) as full:
+            await limiter.acquire()
+        with self.assertRaises(Rejected) as timed_out:
+            await waiter
+        self.assertEqual((full.exception.status_code, full.exception.reason), (503, "queue_full"))
+        self.assertEqual((timed_out.exception.reason, timed_out.exception.retry_after), ("queue_timeout", 3))
+        self.assertEqual((limiter.active, limiter.waiting), (1, 0))
+
+
+class BlockingRepository(NoteRepository):
+    """get_note waits until released, so requests stay in flight"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def get_note(self, note_id, headers=None):
+        await self.release.wait()
+        return {**NOTE, "id": int(note_id)}, {}
+
+    async def note_stats(self, days=30, weeks=12):
+        await self.release.wait()
+        return {"total": 0, "important": 0, "per_day": [], "per_week": []}
+
+
+class AdmittedRouteTest(unittest.IsolatedAsyncioTestCase):
+    """Admission control as the integration routes apply it"""
+
+    async def asyncSetUp(self):
+        self.repository = BlockingRepository()
+
+    def client(self, admission, **kwargs):
+        client = asgi_client(integration_app(self.repository, cache=NullCache(), admission=admission), **kwargs)
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    def controller(self, **kwargs):
+        kwargs.setdefault("route_limits", {"/notes/stats": 0})
+        kwargs.setdefault("queue_size", 1)
+        kwargs.setdefault("queue_timeout", 0.05)
+        return AdmissionController(default_limit=kwargs.pop("default_limit", 1), retry_after=2, **kwargs)
+
+    async def test_rate_limited_requests_get_429_with_retry_after(self):
+        self.repository.release.set()
+        limiter = RateLimiter(MemoryBucketStore(), rate=0.4, burst=2)
+        client = self.client(self.controller(default_limit=10, rate_limiter=limiter, client_header="X-API-Key"))
+        statuses = [(await client.get(f"/api/integration/notes/{i}", headers={"X-API-Key": "a"})).status_code
+                    for i in range(2)]
+        self.assertEqual(statuses, [200, 200])
+        response = await client.get("/api/integration/notes/3", headers={"X-API-Key": "a"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], "3")  # 1 token at 0.4/s, rounded up
+        self.assertEqual(response.json(), {"detail": "Too many requests", "reason": "rate_limited"})
+        # Another client has its own bucket
+        self.assertEqual((await client.get("/api/integration/notes/4", headers={"X-API-Key": "b"})).status_code, 200)
+
+    async def test_requests_past_the_queue_are_shed_with_503(self):
+        controller = self.controller()
+        client = self.client(controller)
+        holder = asyncio.ensure_future(client.get("/api/integration/notes/1"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(client.get("/api/integration/notes/2"))
+        await asyncio.sleep(0.01)
+
+        full = await client.get("/api/integration/notes/3")
+        self.assertEqual(full.status_code, 503)
+        self.assertEqual(full.json()["reason"], "queue_full")
+        timed_out = await queued
+        self.assertEqual(timed_out.status_code, 503)
+        self.assertEqual(timed_out.headers["retry-after"], "2")
+        self.assertEqual(timed_out.json(), {"detail": "Service overloaded, retry later", "reason": "queue_timeout"})
+
+        self.repository.release.set()
+        self.assertEqual((await holder).status_code, 200)
+        stats = controller.stats()["routes"]["/notes/{note_id}"]
+        self.assertEqual(
+            (stats["active"], stats["admitted"], stats["shed_queue_full"], stats["shed_queue_timeout"]), (0, 1, 1, 1)
+        )
+
+    async def test_queued_request_is_served_when_a_slot_frees(self):
+        client = self.client(self.controller(queue_timeout=1))
+        holder = asyncio.ensure_future(client.get("/api/integration/notes/1"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(client.get("/api/integration/notes/2"))
+        await asyncio.sleep(0.01)
+        self.repository.release.set()
+        self.assertEqual([(await holder).status_code, (await queued).status_code], [200, 200])
+
+    async def test_unlimited_routes_are_never_shed(self):
+        client = self.client(self.controller())
+        requests = [asyncio.ensure_future(client.get("/api/integration/notes/stats")) for _ in range(5)]
+        await asyncio.sleep(0.1)
+        self.repository.release.set()
+        self.assertEqual([(await request).status_code for request in requests], [200] * 5)
+
+
+class CreateAdmissionControllerTest(unittest.TestCase):
+    def test_settings(self):
+        with mock.patch.multiple(ServiceConfig, RATE_LIMIT_BACKEND="memory", RATE_LIMIT_RPS=5.0, RATE_LIMIT_BURST=10.0,
+                                 ADMISSION_ROUTE_LIMITS="/notes/bulk=4,/health=0"):
+            controller = create_admission_controller()
+        self.assertEqual(controller.route_limits, {"/notes/bulk": 4, "/health": 0})
+        self.assertEqual((controller.rate_limiter.rate, controller.rate_limiter.burst), (5.0, 10.0))
+        self.assertIsNone(controller.limiter("/api/integration/health"))
+        self.assertEqual(controller.limiter("/api/integration/notes/bulk").limit, 4)
+
+    def test_rate_limiting_off(self):
+        with mock.patch.object(ServiceConfig, "RATE_LIMIT_BACKEND", "none"):
+            self.assertIsNone(create_admission_controller().rate_limiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from core.balancer import BalancingTransport
+from tests.support import Clock
+
+URLS = ["http://a:8002", "http://b:8002", "http://c:8002"]
+
+
+class Upstreams:
+    """Inner transport answering for every instance; status[host] sets an instance's status (or exception)"""
+
+    def __init__(self):
+        self.status = {}
+        self.hosts = []
+        self.health_checks = []
+
+    def __call__(self, request):
+        host = request.url.host
+        if request.url.path == "/health/":
+            self.health_checks.append(host)
+        else:
+            self.hosts.append(host)
+        outcome = self.status.get(host, 200)
+        if isinstance(outcome, type):
+            raise outcome("scripted failure", request=request)
+        # An open stream, as real transports return; the balancer releases the instance when it is closed
+        return httpx.Response(outcome, stream=httpx.ByteStream(request.headers["host"].encode()))
+
+
+class BalancingTransportTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("core.balancer.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.upstreams = Upstreams()
+
+    def balance(self, urls=URLS, **kwargs):
+        kwargs.setdefault("health_interval", 0)
+        self.balancer = BalancingTransport(httpx.MockTransport(self.upstreams), urls, **kwargs)
+        self.client = httpx.AsyncClient(transport=self.balancer, base_url="http://django")
+        self.addAsyncCleanup(self.client.aclose)
+
+    async def get(self, count=1):
+        for _ in range(count):
+            await self.client.get("/api/notes/")
+
+    async def test_round_robin_cycles_through_instances(self):
+        self.balance(strategy="round_robin")
+        response = await self.client.get("/api/notes/")
+        self.assertEqual(response.text, "a:8002")
+        await self.get(5)
+        self.assertEqual(self.upstreams.hosts, ["a", "b", "c"] * 2)
+
+    async def test_least_outstanding_avoids_busy_instances(self):
+        self.balance(URLS[:2])
+        # A streamed response holds its instance until it is closed
+        busy = await self.client.send(self.client.build_request("GET", "/api/notes/export/"), stream=True)
+        busy_host = self.upstreams.hosts[0]
+        await self.get(4)
+        self.assertNotIn(busy_host, self.upstreams.hosts[1:])
+        self.assertEqual([i.outstanding for i in self.balancer.instances if i.url.host == busy_host], [1])
+
+        await busy.aclose()
+        self.upstreams.hosts.clear()
+        await self.get(4)
+        self.assertEqual(sorted(self.upstreams.hosts), ["a", "a", "b", "b"])
+        self.assertEqual([i.outstanding for i in self.balancer.instances], [0, 0])
+
+    async def test_unknown_strategy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            BalancingTransport(httpx.MockTransport(self.upstreams), URLS, strategy="random")
+
+    async def test_consecutive_failures_eject_an_instance(self):
+        self.balance(strategy="round_robin", eject_failures=2, eject_duration=10)
+        self.upstreams.status["b"] = 503
+        await self.get(6)  # b fails twice
+        self.assertEqual(self.upstreams.hosts, ["a", "b", "c", "a", "b", "c"])
+        self.upstreams.hosts.clear()
+        await self.get(4)
+        self.assertNotIn("b", self.upstreams.hosts)
+        self.assertFalse(self.balancer.stats()["instances"][1]["available"])
+
+        # Back in rotation once eject_duration has passed
+        self.upstreams.status["b"] = 200
+        self.clock.now += 10
+        self.upstreams.hosts.clear()
+        await self.get(3)
+        self.assertIn("b", self.upstreams.hosts)
+
+    async def test_transport_errors_count_as_failures(self):
+        self.balance(strategy="round_robin", eject_failures=1)
+        self.upstreams.status["a"] = httpx.ConnectError
+        with self.assertRaises(httpx.ConnectError):
+            await self.get()
+        self.assertFalse(self.balancer.instances[0].available(self.clock()))
+        self.assertEqual(self.balancer.instances[0].outstanding, 0)
+
+    async def test_success_resets_the_failure_count(self):
+        self.balance(URLS[:1], eject_failures=2)
+        self.upstreams.status["a"] = 503
+        await self.get()
+        self.upstreams.status["a"] = 200
+        await self.get()
+        self.upstreams.status["a"] = 503
+        await self.get()
+        self.assertTrue(self.balancer.instances[0].available(self.clock()))
+
+    async def test_with_every_instance_ejected_the_longest_out_is_tried(self):
+        self.balance(strategy="round_robin", eject_failures=1)
+        for host in "abc":
+            self.upstreams.status[host] = 503
+        await self.get(3)
+        self.assertEqual([instance.available(self.clock()) for instance in self.balancer.instances], [False] * 3)
+        self.upstreams.hosts.clear()
+        await self.get()
+        self.assertEqual(self.upstreams.hosts, ["a"])
+
+    async def test_health_check_restores_an_ejected_instance(self):
+        self.balance(eject_failures=1)
+        instance = self.balancer.instances[0]
+        self.upstreams.status["a"] = 503
+        self.assertFalse(await self.balancer.check(instance))
+        self.assertFalse(instance.available(self.clock()))
+
+        self.upstreams.status["a"] = 200
+        self.assertTrue(await self.balancer.check(instance))
+        self.assertTrue(instance.available(self.clock()))
+        self.assertEqual(instance.failures, 0)
+
+    async def test_health_check_ejects_an_unreachable_instance(self):
+        self.balance()
+        self.upstreams.status["c"] = httpx.ConnectError
+        self.assertFalse(await self.balancer.check(self.balancer.instances[2]))
+        await self.get(6)
+        self.assertNotIn("c", self.upstreams.hosts)
+
+    async def test_health_loop_runs_once_requests_start(self):
+        self.balance(health_interval=0.01)
+        self.balancer.instances[1].ejected_until = self.clock() + 60
+        await self.get()
+        for _ in range(100):
+            if self.balancer.instances[1].available(self.clock()):
+                break
+            await asyncio.sleep(0.01)
+        self.assertTrue(self.balancer.instances[1].available(self.clock()))
+        self.assertEqual(sorted(set(self.upstreams.health_checks)), ["a", "b", "c"])
+        await self.balancer.aclose()
+        self.assertIsNone(self.balancer._health_task)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+import asyncio
+import fnmatch
+import json
+import unittest
+from unittest import mock
+
+from benchmarks.common import django_asgi_client
+from core.cache import MemoryCache, RedisCache
+from core.repository import HttpNoteRepository
+from routes.integration import LIST_CACHE_PREFIX, cached_read, note_cache_key
+from tests.support import Clock, asgi_client, django_database, integration_app, reset_database
+
+NOTE = {"title": "Title", "desc": "Description", "note": "Body", "important": False}
+
+
+class MemoryCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("core.cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_entries_expire_after_their_ttl(self):
+        cache = MemoryCache(default_ttl=30)
+        await cache.set("default", 1)
+        await cache.set("short", 2, ttl=5)
+        self.clock.now += 4.9
+        self.assertEqual((await cache.get("default"), await cache.get("short")), (1, 2))
+        self.clock.now += 0.1
+        self.assertIsNone(await cache.get("short"))
+        self.assertEqual(await cache.get("default"), 1)
+        self.clock.now += 25
+        self.assertIsNone(await cache.get("default"))
+        self.assertEqual((cache.counters["hits"], cache.counters["misses"]), (3, 2))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    async def test_expired_entries_are_kept_for_the_stale_window(self):
+        cache = MemoryCache(default_ttl=10, stale_ttl=5)
+        await cache.set("key", "value")
+        self.clock.now += 12
+        self.assertIsNone(await cache.get("key"))
+        self.assertEqual(await cache.get_stale("key"), "value")
+        self.clock.now += 3
+        self.assertIsNone(await cache.get_stale("key"))
+        self.assertEqual(cache.counters["stale_hits"], 1)
+
+    async def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+        self.assertIsNone(await cache.get("b"))
+        self.assertEqual((await cache.get("a"), await cache.get("c")), (1, 3))
+        self.assertEqual(cache.counters["evictions"], 1)
+        # Setting an existing key refreshes it too
+        await cache.set("a", 10)
+        await cache.set("d", 4)
+        self.assertIsNone(await cache.get("c"))
+        self.assertEqual(cache.stats()["size"], 2)
+
+    async def test_delete_and_delete_prefix(self):
+        cache = MemoryCache()
+        for key in ("notes:list:a", "notes:list:b", "notes:detail:1"):
+            await cache.set(key, key)
+        await cache.delete_prefix("notes:list:")
+        await cache.delete("notes:detail:1", "missing")
+        self.assertEqual(cache.stats()["size"], 0)
+        self.assertEqual(cache.counters["invalidations"], 3)
+
+
+    async def test_generation_moves_on_invalidation(self):
+        cache = MemoryCache()
+        key = LIST_CACHE_PREFIX + "limit=20"
+        generation = cache.generation(key)
+        await cache.delete("notes:detail:1")
+        await cache.delete_prefix("notes:detail:")
+        self.assertEqual(cache.generation(key), generation)
+        await cache.delete_prefix(LIST_CACHE_PREFIX)
+        self.assertNotEqual(cache.generation(key), generation)
+        generation = cache.generation(key)
+        await cache.delete(key)
+        self.assertNotEqual(cache.generation(key), generation)
+
+    async def test_load_overtaken_by_a_write_is_not_stored(self):
+        cache = MemoryCache()
+        loaded, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_load():
+            loaded.set()
+            await release.wait()
+            return "before the write"
+
+        read = asyncio.create_task(cached_read(cache, "notes:detail:1", slow_load))
+        await loaded.wait()
+        await cache.delete("notes:detail:1")
+        release.set()
+        self.assertEqual(await read, ("before the write", False))
+        self.assertNotIn("notes:detail:1", cache._entries)
+        # Loads that no write overtook are stored as before
+        await cached_read(cache, "notes:detail:1", slow_load)
+        self.assertIn("notes:detail:1", cache._entries)
+
+
+class StubRedis:
+    """The part of the redis.asyncio client RedisCache uses, with PX expiry on a Clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+        self.closed = False
+
+    def _live(self, key):
+        entry = self.values.get(key)
+        if entry is not None and entry[1] <= self.clock():
+            del self.values[key]
+            entry = None
+        return entry
+
+    async def get(self, key):
+        entry = self._live(key)
+        return None if entry is None else entry[0]
+
+    async def set(self, key, value, px):
+        self.values[key] = (value.encode(), self.clock() + px / 1000)
+
+    async def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    async def scan_iter(self, match):
+        for key in list(self.values):
+            if self._live(key) is not None and fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def aclose(self):
+        self.closed = True
+
+
+class RedisCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("core.cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.redis = StubRedis(self.clock)
+        self.cache = RedisCache(self.redis, default_ttl=10, namespace="test:", stale_ttl=5)
+
+    async def test_values_round_trip_as_json_under_the_namespace(self):
+        await self.cache.set("key", {"results": [1, 2]})
+        self.assertEqual(await self.cache.get("key"), {"results": [1, 2]})
+        value, expires = self.redis.values["test:key"]
+        self.assertEqual(json.loads(value)["value"], {"results": [1, 2]})
+        # Redis keeps the entry through the stale window
+        self.assertEqual(expires, self.clock() + 15)
+        self.assertIsNone(await self.cache.get("missing"))
+        self.assertEqual((self.cache.counters["hits"], self.cache.counters["misses"]), (1, 1))
+
+    async def test_entries_expire_then_serve_stale(self):
+        await self.cache.set("key", "value", ttl=2)
+        self.clock.now += 2
+        self.assertIsNone(await self.cache.get("key"))
+        self.assertEqual(await self.cache.get_stale("key"), "value")
+        self.clock.now += 5
+        self.assertIsNone(await self.cache.get_stale("key"))
+        self.assertEqual(self.cache.counters["stale_hits"], 1)
+
+    async def test_delete_prefix_stays_in_the_namespace(self):
+        await self.cache.set("notes:list:a", 1)
+        await self.cache.set("notes:list:b", 2)
+        await self.cache.set("notes:detail:1", 3)
+        self.redis.values["other:notes:list:a"] = (b"{}", self.clock() + 60)
+        await self.cache.delete_prefix("notes:list:")
+        await self.cache.delete("notes:detail:1", "missing")
+        self.assertEqual(list(self.redis.values), ["other:notes:list:a"])
+        self.assertEqual(self.cache.counters["invalidations"], 3)
+
+    async def test_close_closes_the_client(self):
+        await self.cache.close()
+        self.assertTrue(self.redis.closed)
+
+
+class RouteInvalidationTest(unittest.IsolatedAsyncioTestCase):
+    """Writes through the integration routes drop the cached list pages and note they change"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = django_database()
+
+    async def asyncSetUp(self):
+        reset_database(self.path)
+        self.django = django_asgi_client()
+        self.cache = MemoryCache()
+        self.repository = HttpNoteRepository(self.django)
+        self.client = asgi_client(integration_app(self.repository, cache=self.cache))
+        response = await self.client.post("/api/integration/notes", json=NOTE)
+        self.assertEqual(response.status_code, 200)
+        self.note = response.json()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.django.aclose()
+
+    async def cached_reads(self):
+        """List and detail responses, read twice so the second read comes from the cache"""
+        for _ in range(2):
+            listed = await self.client.get("/api/integration/notes")
+            detail = await self.client.get(f"/api/integration/notes/{self.note['id']}")
+        self.assertTrue(self.detail_cached())
+        return listed.json()["results"], detail
+
+    def detail_cached(self):
+        return note_cache_key(self.note["id"]) in self.cache._entries
+
+    def cached_list_pages(self):
+        return [key for key in self.cache._entries if key.startswith(LIST_CACHE_PREFIX)]
+
+    async def test_reads_are_cached(self):
+        await self.cached_reads()
+        self.assertEqual(self.cache.counters["hits"], 2)
+        self.assertEqual(len(self.cached_list_pages()), 1)
+
+    async def test_create_invalidates_list_pages(self):
+        await self.cached_reads()
+        await self.client.post("/api/integration/notes", json={**NOTE, "title": "Second"})
+        self.assertEqual(self.cached_list_pages(), [])
+        results, _ = await self.cached_reads()
+        self.assertEqual([note["title"] for note in results], ["Second", "Title"])
+
+    async def test_update_invalidates_list_pages_and_the_note(self):
+        await self.cached_reads()
+        response = await self.client.put(f"/api/integration/notes/{self.note['id']}", json={"title": "Changed"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.detail_cached())
+        self.assertEqual(self.cached_list_pages(), [])
+        results, detail = await self.cached_reads()
+        self.assertEqual(results[0]["title"], "Changed")
+        self.assertEqual(detail.json()["title"], "Changed")
+
+    async def test_delete_invalidates_list_pages_and_the_note(self):
+        await self.cached_reads()
+        response = await self.client.delete(f"/api/integration/notes/{self.note['id']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await self.client.get("/api/integration/notes")).json()["results"], [])
+        self.assertEqual((await self.client.get(f"/api/integration/notes/{self.note['id']}")).status_code, 404)
+
+    async def test_read_started_before_a_write_does_not_cache_old_data(self):
+        loaded, release = asyncio.Event(), asyncio.Event()
+        get_note = self.repository.get_note
+
+        async def slow_get_note(*args, **kwargs):
+            result = await get_note(*args, **kwargs)
+            loaded.set()
+            await release.wait()
+            return result
+
+        with mock.patch.object(self.repository, "get_note", slow_get_note):
+            read = asyncio.create_task(self.client.get(f"/api/integration/notes/{self.note['id']}"))
+            await loaded.wait()
+            response = await self.client.put(f"/api/integration/notes/{self.note['id']}", json={"title": "Changed"})
+            self.assertEqual(response.status_code, 200)
+            release.set()
+            self.assertEqual((await read).json()["title"], "Title")
+        self.assertFalse(self.detail_cached())
+        response = await self.client.get(f"/api/integration/notes/{self.note['id']}")
+        self.assertEqual(response.json()["title"], "Changed")
+
+    async def test_failed_write_keeps_the_cache(self):
+        await self.cached_reads()
+        response = await self.client.put(f"/api/integration/notes/{self.note['id']}", json={"title": ""})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.cached_list_pages()), 1)
+        self.assertTrue(self.detail_cached())
+
+
+if __name__ == "__main__":
+    unittest.main()
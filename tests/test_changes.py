@@ -0,0 +1,257 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime, timezone
+from functools import partial
+from unittest import mock
+
+from core.cache import MemoryCache
+from core.changes import ChangeFeed, Resync, Subscription
+from core.repository import SqliteNoteRepository
+from routes.integration import invalidate_changes, note_cache_key
+from tests.support import django_database, integration_app, open_database, reset_database
+
+NOTE = {"title": "Title", "desc": "Description", "note": "Body", "important": False}
+TIMEOUT = 5
+
+
+class SSEStream:
+    """
+    One GET of an event-stream route, driven over raw ASGI so events can be
+    read while the response is still open (httpx.ASGITransport buffers the
+    whole body). close() disconnects the client.
+    """
+
+    def __init__(self, app, path, headers=()):
+        self.app = app
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "server": ("testserver", 80), "client": ("127.0.0.1", 50000),
+            "root_path": "", "path": path.partition("?")[0], "raw_path": path.partition("?")[0].encode(),
+            "query_string": path.partition("?")[2].encode(),
+            "headers": [(b"host", b"testserver"), *((k.lower().encode(), v.encode()) for k, v in headers)],
+        }
+        self.status = None
+        self.events: asyncio.Queue = asyncio.Queue()
+        self._buffer = b""
+        self._requested = False
+        self._disconnected = asyncio.Event()
+        self._task = None
+
+    async def __aenter__(self):
+        self._task = asyncio.ensure_future(self.app(self.scope, self._receive, self._send))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            return
+        self._buffer += message.get("body", b"")
+        while b"\n\n" in self._buffer:
+            block, self._buffer = self._buffer.split(b"\n\n", 1)
+            event = {}
+            for line in block.decode().splitlines():
+                name, _, value = line.partition(": ")
+                if name in ("id", "event", "data"):
+                    event[name] = json.loads(value) if name == "data" else value
+            if "event" in event:
+                await self.events.put(event)
+
+    async def next(self) -> dict:
+        return await asyncio.wait_for(self.events.get(), TIMEOUT)
+
+    async def close(self):
+        self._disconnected.set()
+        await asyncio.wait_for(self._task, TIMEOUT)
+
+
+class ChangeFeedTestCase(unittest.IsolatedAsyncioTestCase):
+    queue_size = 256
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = django_database()
+
+    async def asyncSetUp(self):
+        reset_database(self.path)
+        self.repository = await SqliteNoteRepository(self.path).open()
+        self.addAsyncCleanup(self.repository.close)
+        self.invalidated = []
+        self.feed = ChangeFeed(self.repository, invalidate=self.invalidate, poll_interval=0.01,
+                               queue_size=self.queue_size)
+        self.addAsyncCleanup(self.feed.close)
+
+    async def invalidate(self, changes):
+        self.invalidated.extend(change["seq"] for change in changes)
+
+    async def create_notes(self, count):
+        return [await self.repository.create_note({**NOTE, "title": f"Note {i}"}) for i in range(count)]
+
+    async def seqs(self):
+        return [change["seq"] for change in (await self.repository.list_changes(0))["changes"]]
+
+
+class ChangeFeedTest(ChangeFeedTestCase):
+    async def test_subscriber_receives_changes_after_it_subscribed(self):
+        subscription, published = self.feed.subscribe(await self.feed.head())
+        note = await self.repository.create_note(NOTE)
+        # Changes carry the note as it is when polled, so wait for the create before deleting
+        changes = [await asyncio.wait_for(subscription.queue.get(), TIMEOUT)]
+        await self.repository.update_note(note["id"], {"important": True})
+        await self.repository.delete_note(note["id"])
+        changes += [await asyncio.wait_for(subscription.queue.get(), TIMEOUT) for _ in range(2)]
+        self.assertEqual([change["action"] for change in changes], ["created", "updated", "deleted"])
+        self.assertEqual({change["note_id"] for change in changes}, {note["id"]})
+        self.assertEqual(changes[0]["note"]["title"], "Title")
+        self.assertIsNone(changes[2]["note"])
+        # Cached reads were dropped before the changes were published
+        self.assertEqual(self.invalidated, [change["seq"] for change in changes])
+
+    async def test_backlog_reads_changes_between_two_seqs(self):
+        await self.create_notes(3)
+        seqs = await self.seqs()
+        backlog = await self.feed.backlog(seqs[0], seqs[-1])
+        self.assertEqual([change["seq"] for change in backlog], seqs[1:])
+        self.assertEqual(await self.feed.backlog(seqs[-1], seqs[-1]), [])
+
+    async def test_backlog_pages_through_the_change_log(self):
+        self.feed.page_size = 2
+        await self.create_notes(5)
+        seqs = await self.seqs()
+        self.assertEqual([change["seq"] for change in await self.feed.backlog(0, seqs[-1])], seqs)
+
+    async def test_poller_stops_with_the_last_subscriber(self):
+        subscription, _ = self.feed.subscribe(await self.feed.head())
+        self.assertIsNotNone(self.feed._task)
+        self.feed.unsubscribe(subscription)
+        for _ in range(100):
+            if self.feed._task is None:
+                break
+            await asyncio.sleep(0.01)
+        self.assertIsNone(self.feed._task)
+
+    async def test_poll_failures_keep_subscribers(self):
+        subscription, _ = self.feed.subscribe(await self.feed.head())
+        with mock.patch.object(self.repository, "list_changes", side_effect=ConnectionError("down")):
+            await asyncio.sleep(0.05)
+        await self.repository.create_note(NOTE)
+        change = await asyncio.wait_for(subscription.queue.get(), TIMEOUT)
+        self.assertEqual(change["action"], "created")
+
+
+class SubscriptionTest(unittest.TestCase):
+    def test_overflow_is_replaced_by_a_resync(self):
+        subscription = Subscription(queue_size=2)
+        for seq in (1, 2, 3, 4):
+            subscription.push({"seq": seq})
+        first = subscription.queue.get_nowait()
+        self.assertIsInstance(first, Resync)
+        self.assertEqual(first.seq, 3)
+        self.assertEqual(subscription.queue.get_nowait(), {"seq": 4})
+
+
+class NoteEventsTest(ChangeFeedTestCase):
+    """GET /api/integration/notes/events"""
+    queue_size = 3
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.cache = MemoryCache()
+        self.feed.invalidate = partial(invalidate_changes, self.cache)
+        self.app = integration_app(self.repository, cache=self.cache, change_feed=self.feed)
+
+    def events(self, query="", headers=()):
+        return SSEStream(self.app, f"/api/integration/notes/events{query}", headers)
+
+    async def test_live_change_event(self):
+        async with self.events() as stream:
+            ready = await stream.next()
+            self.assertEqual(stream.status, 200)
+            self.assertEqual((ready["event"], ready["data"]), ("ready", {"seq": 0}))
+            note = await self.repository.create_note(NOTE)
+            event = await stream.next()
+        self.assertEqual(event["event"], "change")
+        self.assertEqual(event["id"], str(event["data"]["seq"]))
+        self.assertEqual((event["data"]["action"], event["data"]["id"]), ("created", str(note["id"])))
+        self.assertEqual(event["data"]["note"]["title"], "Title")
+        # The stream unsubscribed when the client went away
+        self.assertEqual(self.feed._subscribers, set())
+
+    async def test_change_invalidates_the_cached_note(self):
+        note = await self.repository.create_note(NOTE)
+        async with self.events() as stream:
+            await stream.next()
+            await self.cache.set(note_cache_key(note["id"]), {"json": "{}", "validators": {}})
+            await self.repository.update_note(note["id"], {"title": "Changed"})
+            event = await stream.next()
+            self.assertEqual(event["data"]["note"]["title"], "Changed")
+            self.assertIsNone(await self.cache.get(note_cache_key(note["id"])))
+
+    async def test_resume_from_last_event_id(self):
+        await self.create_notes(3)
+        seqs = await self.seqs()
+        # Last-Event-ID, sent by a reconnecting EventSource, wins over ?since=
+        async with self.events("?since=0", headers=[("Last-Event-ID", str(seqs[0]))]) as stream:
+            ready = await stream.next()
+            missed = [await stream.next() for _ in range(2)]
+            await self.repository.create_note(NOTE)
+            live = await stream.next()
+        self.assertEqual(ready["data"], {"seq": seqs[0]})
+        self.assertEqual([event["data"]["seq"] for event in missed], seqs[1:])
+        self.assertEqual(live["data"]["seq"], seqs[-1] + 1)
+
+    async def test_backlog_resumes_behind_a_running_feed(self):
+        await self.create_notes(2)
+        seqs = await self.seqs()
+        async with self.events() as first:
+            # The feed is running from the head, so the later client's missed changes come from the backlog
+            await first.next()
+            async with self.events(f"?since={seqs[0]}") as late:
+                self.assertEqual((await late.next())["event"], "ready")
+                self.assertEqual((await late.next())["data"]["seq"], seqs[1])
+
+    async def test_resync_when_the_backlog_is_too_long(self):
+        await self.create_notes(5)
+        seqs = await self.seqs()
+        async with self.events() as first:
+            await first.next()
+            async with self.events("?since=0") as late:
+                events = [await late.next() for _ in range(2)]
+        self.assertEqual([event["event"] for event in events], ["ready", "resync"])
+        self.assertEqual(events[1]["data"], {"seq": seqs[-1]})
+
+    def log_deletes(self, count):
+        """Append count changes to the change log in one transaction, so one poll reads them all"""
+        db = open_database(self.path)
+        changed_at = str(datetime.now(timezone.utc).replace(tzinfo=None))
+        with db:
+            db.executemany(
+                "INSERT INTO notes_notechange (note_id, action, changed_at) VALUES (?, 'deleted', ?)",
+                [(404, changed_at)] * count,
+            )
+        db.close()
+
+    async def test_resync_when_a_subscriber_falls_behind(self):
+        async with self.events() as stream:
+            await stream.next()
+            # More changes than the subscriber's queue holds, published before it reads any
+            self.log_deletes(5)
+            events = [await stream.next() for _ in range(2)]
+        seqs = await self.seqs()
+        self.assertEqual([event["event"] for event in events], ["resync", "change"])
+        self.assertEqual(events[0]["data"]["seq"], seqs[3])
+        self.assertEqual(events[1]["data"]["seq"], seqs[4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from core.prometheus import Registry
+
+
+class RegistryTest(unittest.TestCase):
+    """The exposition format both services' /metrics endpoints render"""
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter("requests_total", "Requests", ("route",)).inc(route='a\\b"c\nd')
+        self.assertIn('requests_total{route="a\\\\b\\"c\\nd"} 1', registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("method",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, method="GET")
+        histogram.observe(0.5, method="GET")
+        lines = registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"])
+        self.assertEqual(lines[2:], [
+            'latency_seconds_bucket{method="GET",le="0.1"} 1',
+            'latency_seconds_bucket{method="GET",le="1.0"} 2',
+            'latency_seconds_bucket{method="GET",le="+Inf"} 2',
+            'latency_seconds_sum{method="GET"} 0.55',
+            'latency_seconds_count{method="GET"} 2',
+        ])
+
+    def test_gauge_moves_both_ways(self):
+        registry = Registry()
+        gauge = registry.gauge("in_flight", "In flight")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertIn("in_flight 1", registry.render())
+        gauge.set(7)
+        self.assertIn("in_flight 7", registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import sqlite3
+import unittest
+from unittest import mock
+
+from core.repository import NoteNotFound, RepositoryError, SqliteNoteRepository
+from tests.support import django_database, reset_database, table_counts
+
+NOTE = {"title": "Title", "desc": "Description", "note": "Body", "important": False}
+
+
+class SqliteNoteRepositoryTransactionTest(unittest.IsolatedAsyncioTestCase):
+    """Writes in direct mode commit whole or not at all"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = django_database()
+
+    async def asyncSetUp(self):
+        reset_database(self.path)
+        self.repository = await SqliteNoteRepository(self.path).open()
+
+    async def asyncTearDown(self):
+        await self.repository.close()
+
+    def assertConsistent(self, notes):
+        counts = table_counts(self.path)
+        self.assertEqual(counts["notes_note"], notes)
+        self.assertEqual(counts["notes_notecontent"], notes)
+        self.assertEqual(counts["stats_total"], notes)
+        self.assertEqual(counts["daily_total"], notes)
+        return counts
+
+    def failing_change_log(self):
+        # The change-log row is written last, after the note, its body and the stats
+        return mock.patch.object(SqliteNoteRepository, "_log_change", side_effect=sqlite3.OperationalError("disk I/O error"))
+
+    async def test_failed_create_leaves_nothing_behind(self):
+        with self.failing_change_log(), self.assertRaises(sqlite3.OperationalError):
+            await self.repository.create_note(NOTE)
+        self.assertEqual(self.assertConsistent(0)["notes_notechange"], 0)
+
+        # The next write does not commit the failed one's statements
+        await self.repository.create_note(NOTE)
+        self.assertEqual(self.assertConsistent(1)["notes_notechange"], 1)
+        self.assertEqual((await self.repository.note_stats())["total"], 1)
+
+    async def test_failed_update_is_rolled_back(self):
+        note = await self.repository.create_note(NOTE)
+        with self.failing_change_log(), self.assertRaises(sqlite3.OperationalError):
+            await self.repository.update_note(note["id"], {"title": "Changed", "important": True, "note": "Changed"})
+        stored, _ = await self.repository.get_note(note["id"])
+        self.assertEqual(stored, note)
+        self.assertEqual((await self.repository.note_stats())["important"], 0)
+        self.assertEqual(self.assertConsistent(1)["notes_notechange"], 1)
+
+    async def test_unencodable_body_is_rejected(self):
+        # A lone surrogate cannot be stored as UTF-8; Django's serializer rejects it too
+        with self.assertRaises(RepositoryError) as raised:
+            await self.repository.create_note({**NOTE, "note": "\ud800"})
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertEqual(self.assertConsistent(0)["notes_notechange"], 0)
+
+    async def test_update_of_missing_note_writes_nothing(self):
+        with self.assertRaises(NoteNotFound):
+            await self.repository.update_note(404, {"title": "Missing", "important": True})
+        self.assertEqual(self.assertConsistent(0)["notes_notechange"], 0)
+        self.assertEqual((await self.repository.list_changes(None))["changes"], [])
+
+    async def test_delete_of_missing_note_writes_nothing(self):
+        await self.repository.create_note(NOTE)
+        with self.assertRaises(NoteNotFound):
+            await self.repository.delete_note(404)
+        self.assertEqual(self.assertConsistent(1)["notes_notechange"], 1)
+
+    async def test_concurrent_writes(self):
+        notes = await asyncio.gather(*(
+            self.repository.create_note({**NOTE, "title": f"Note {i}", "important": i % 2 == 0}) for i in range(20)
+        ))
+        results = await asyncio.gather(
+            *(self.repository.update_note(note["id"], {"important": True}) for note in notes[:10]),
+            *(self.repository.delete_note(note["id"]) for note in notes[10:15]),
+            self.repository.update_note(404, {"important": True}),
+            return_exceptions=True,
+        )
+        self.assertIsInstance(results[-1], NoteNotFound)
+        self.assertFalse([result for result in results[:-1] if isinstance(result, Exception)])
+
+        counts = self.assertConsistent(15)
+        self.assertEqual(counts["notes_notechange"], 35)
+        stats = await self.repository.note_stats()
+        # Notes 0-9 are now important, plus the even ones among 15-19
+        self.assertEqual((stats["total"], stats["important"]), (15, 12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from benchmarks.common import django_asgi_client
+from core.repository import HttpNoteRepository, RepositoryError, SqliteNoteRepository
+from tests.support import django_database, reset_database
+
+NOTE = {"title": "Title", "desc": "Description", "note": "Body", "important": False}
+
+# (name, data)
+CREATE_CASES = [
+    ("create", NOTE),
+    ("create trims whitespace", {**NOTE, "title": "  Padded  ", "note": "\tBody\n"}),
+    ("create without a body", {"title": "Title", "desc": "Description"}),
+    ("create with a long title", {**NOTE, "title": "x" * 201}),
+    ("create with a blank desc", {**NOTE, "desc": "   "}),
+    ("create with a lone surrogate", {**NOTE, "note": "\ud800"}),
+    ("create with a null character", {**NOTE, "title": "a\x00b"}),
+]
+# (name, note id or None for a note created from NOTE first, data)
+UPDATE_CASES = [
+    ("partial update", None, {"important": True}),
+    ("partial body update", None, {"note": "New body"}),
+    ("empty update", None, {}),
+    ("update trims whitespace", None, {"desc": "  Padded  "}),
+    ("update with a long title", None, {"title": "x" * 201, "desc": "y" * 501}),
+    ("update with a blank title", None, {"title": ""}),
+    ("update with a lone surrogate", None, {"note": "\ud800"}),
+    ("update of a missing note", 999999, {"title": "Missing"}),
+    ("invalid update of a missing note", 999999, {"title": ""}),
+    ("update of a non-numeric id", "abc", {"title": "Missing"}),
+]
+
+
+async def outcome(call):
+    """(status, body) of a repository call, without the fields that differ between runs"""
+    try:
+        note = await call
+    except RepositoryError as e:
+        return e.status_code, e.detail
+    return 200, {k: v for k, v in note.items() if k not in ("id", "created_at", "updated_at")}
+
+
+class RepositoryParityTest(unittest.IsolatedAsyncioTestCase):
+    """HttpNoteRepository (through Django) and SqliteNoteRepository give the same results for the same writes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = django_database()
+
+    async def asyncSetUp(self):
+        self.client = django_asgi_client()
+        self.backends = {
+            "http": HttpNoteRepository(self.client),
+            "sqlite": await SqliteNoteRepository(self.path).open(),
+        }
+
+    async def asyncTearDown(self):
+        await self.backends["sqlite"].close()
+        await self.client.aclose()
+
+    async def run_case(self, name, operation):
+        """Run operation(repository) against each backend on an empty database; returns its outcome"""
+        outcomes = {}
+        for backend, repository in self.backends.items():
+            reset_database(self.path)
+            outcomes[backend] = await outcome(operation(repository))
+        self.assertEqual(outcomes["sqlite"], outcomes["http"], name)
+        return outcomes["http"]
+
+    async def test_create(self):
+        for name, data in CREATE_CASES:
+            with self.subTest(name):
+                await self.run_case(name, lambda repository: repository.create_note(data))
+
+    async def test_update(self):
+        for name, note_id, data in UPDATE_CASES:
+            with self.subTest(name):
+                await self.run_case(name, lambda repository: update(repository, note_id, data))
+
+    async def test_expected_outcomes(self):
+        self.assertEqual(
+            await self.run_case("partial update", lambda repository: update(repository, None, {"important": True})),
+            (200, {**NOTE, "important": True}),
+        )
+        self.assertEqual(
+            await self.run_case("blank title", lambda repository: update(repository, None, {"title": " "})),
+            (400, {"title": ["This field may not be blank."]}),
+        )
+        status, _ = await self.run_case("non-numeric id", lambda repository: update(repository, "abc", {}))
+        self.assertEqual(status, 404)
+
+
+async def update(repository, note_id, data):
+    if note_id is None:
+        note_id = (await repository.create_note(NOTE))["id"]
+    return await repository.update_note(note_id, data)
+
+
+if __name__ == "__main__":
+    unittest.main()
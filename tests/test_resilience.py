@@ -0,0 +1,246 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from core.resilience import CircuitBreaker, CircuitOpen, ResilientTransport
+from tests.support import Clock
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("core.resilience.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+
+    def open_circuit(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 10)
+
+    def test_success_resets_the_failure_count(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 2)
+
+    def test_half_open_lets_one_trial_through(self):
+        self.open_circuit()
+        self.clock.now += 9.5
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 0.5)
+        self.clock.now += 0.5
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_successful_trial_closes(self):
+        self.open_circuit()
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        self.open_circuit()
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 10)
+
+    def test_abandoned_trial_lets_another_through(self):
+        self.open_circuit()
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_abandoned()
+        self.assertTrue(self.breaker.allow())
+
+
+class Upstream:
+    """Inner transport replaying scripted outcomes (a status code or an exception), then 200s"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def __call__(self, request):
+        self.calls.append(request.method)
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, type) and issubclass(outcome, Exception):
+            raise outcome("scripted failure", request=request)
+        return httpx.Response(outcome, text="ok")
+
+
+class RetryTest(unittest.IsolatedAsyncioTestCase):
+    retries = 2
+
+    def client(self, upstream, failure_threshold=5):
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold)
+        transport = ResilientTransport(httpx.MockTransport(upstream), breaker=self.breaker, retries=self.retries, backoff=0)
+        return httpx.AsyncClient(transport=transport, base_url="http://django")
+
+    async def test_get_is_retried_up_to_the_limit(self):
+        upstream = Upstream(503, 503, 503, 503)
+        async with self.client(upstream) as client:
+            response = await client.get("/api/notes/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(upstream.calls), self.retries + 1)
+
+    async def test_get_recovers_on_retry(self):
+        for failure in (httpx.ConnectError, httpx.ReadTimeout, 502):
+            with self.subTest(failure=failure):
+                upstream = Upstream(failure)
+                async with self.client(upstream) as client:
+                    response = await client.get("/api/notes/")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(upstream.calls), 2)
+                self.assertEqual((self.breaker.state, self.breaker.failures), (CircuitBreaker.CLOSED, 0))
+
+    async def test_client_errors_are_not_retried(self):
+        upstream = Upstream(404, 500)
+        async with self.client(upstream) as client:
+            self.assertEqual((await client.get("/api/notes/1/")).status_code, 404)
+            self.assertEqual((await client.get("/api/notes/1/")).status_code, 500)
+        self.assertEqual(len(upstream.calls), 2)
+
+    async def test_writes_are_not_retried_once_sent(self):
+        for method in ("PUT", "DELETE", "POST", "PATCH"):
+            for failure in (httpx.ReadTimeout, httpx.RemoteProtocolError, 503):
+                with self.subTest(method=method, failure=failure):
+                    upstream = Upstream(failure)
+                    async with self.client(upstream) as client:
+                        if isinstance(failure, int):
+                            self.assertEqual((await client.request(method, "/api/notes/1/")).status_code, failure)
+                        else:
+                            with self.assertRaises(failure):
+                                await client.request(method, "/api/notes/1/")
+                    self.assertEqual(upstream.calls, [method])
+
+    async def test_idempotent_writes_are_retried_when_never_sent(self):
+        for method in ("PUT", "DELETE"):
+            for failure in (httpx.ConnectError, httpx.ConnectTimeout):
+                with self.subTest(method=method, failure=failure):
+                    upstream = Upstream(failure)
+                    async with self.client(upstream) as client:
+                        response = await client.request(method, "/api/notes/1/")
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(upstream.calls, [method, method])
+
+    async def test_other_writes_are_never_retried(self):
+        for method in ("POST", "PATCH"):
+            with self.subTest(method=method):
+                upstream = Upstream(httpx.ConnectError)
+                async with self.client(upstream) as client:
+                    with self.assertRaises(httpx.ConnectError):
+                        await client.request(method, "/api/notes/")
+                self.assertEqual(upstream.calls, [method])
+
+    async def test_a_call_counts_once_in_the_breaker(self):
+        upstream = Upstream(*[httpx.ConnectError] * 6)
+        async with self.client(upstream, failure_threshold=2) as client:
+            with self.assertRaises(httpx.ConnectError):
+                await client.get("/api/notes/")
+            # Three failed attempts, one failed call
+            self.assertEqual(len(upstream.calls), 3)
+            self.assertEqual((self.breaker.state, self.breaker.failures), (CircuitBreaker.CLOSED, 1))
+            with self.assertRaises(httpx.ConnectError):
+                await client.get("/api/notes/")
+            self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(CircuitOpen):
+                await client.get("/api/notes/")
+        self.assertEqual(len(upstream.calls), 6)
+
+    async def test_5xx_after_retries_counts_once(self):
+        upstream = Upstream(503, 503, 503)
+        async with self.client(upstream) as client:
+            await client.get("/api/notes/")
+        self.assertEqual(self.breaker.failures, 1)
+
+    async def test_retries_stop_when_the_circuit_opens(self):
+        async def upstream(request):
+            # Another call's failure opens the circuit while this one is in flight
+            self.breaker.record_failure()
+            return httpx.Response(503)
+
+        async with self.client(upstream, failure_threshold=1) as client:
+            response = await client.get("/api/notes/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+        async def upstream(request):
+            self.calls.append((request.url.path, request.headers.get("accept")))
+            await self.release.wait()
+            return httpx.Response(200, json={"path": request.url.path})
+
+        transport = ResilientTransport(httpx.MockTransport(upstream), retries=0)
+        self.client = httpx.AsyncClient(transport=transport, base_url="http://django")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def gather(self, *requests):
+        tasks = [asyncio.ensure_future(request) for request in requests]
+        await asyncio.sleep(0.01)
+        self.release.set()
+        return await asyncio.gather(*tasks)
+
+    async def test_identical_gets_share_one_call(self):
+        responses = await self.gather(*(self.client.get("/api/notes/") for _ in range(5)))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([response.json() for response in responses], [{"path": "/api/notes/"}] * 5)
+
+    async def test_different_requests_are_not_coalesced(self):
+        await self.gather(
+            self.client.get("/api/notes/"),
+            self.client.get("/api/notes/", params={"limit": 5}),
+            self.client.get("/api/notes/", headers={"Accept": "text/csv"}),
+            self.client.get("/api/notes/", extensions={"single_flight": False}),
+            self.client.delete("/api/notes/1/"),
+            self.client.delete("/api/notes/1/"),
+        )
+        self.assertEqual(len(self.calls), 6)
+
+    async def test_a_caller_giving_up_does_not_cancel_the_call(self):
+        first = asyncio.ensure_future(self.client.get("/api/notes/"))
+        second = asyncio.ensure_future(self.client.get("/api/notes/"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.release.set()
+        self.assertEqual((await second).status_code, 200)
+        self.assertTrue(first.cancelled())
+        self.assertEqual(len(self.calls), 1)
+
+    async def test_later_calls_are_sent_again(self):
+        self.release.set()
+        await self.client.get("/api/notes/")
+        await self.client.get("/api/notes/")
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()